@@ -1,14 +1,26 @@
 """Composable MCP server that can host multiple services."""
 from __future__ import annotations
 
-from mcp_framework import ServiceDefinition, attach_request_logger, create_mcp_server, log_interaction
+from iban_utils import normalize_iban
+from mcp_framework import (
+    AdmissionPolicy,
+    CachePolicy,
+    ProcessPolicy,
+    ServiceDefinition,
+    attach_request_logger,
+    create_mcp_server,
+    log_interaction,
+)
 from services import (
     register_echo_service,
     register_iban_service,
+    register_local_index_service,
     register_math_service,
     register_newsapi_service,
     register_mysql_service,
     register_web_fetch_service,
+    warm_up_local_index_service,
+    warm_up_mysql_service,
 )
 
 SYSTEM_INSTRUCTIONS = (
@@ -22,31 +34,97 @@ services = [
         name="iban",
         description="Validate IBAN strings and return normalized details.",
         register=register_iban_service,
+        cache={
+            "iban_check": CachePolicy(
+                ttl=None,
+                max_entries=4096,
+                key=lambda args: normalize_iban(args["iban"]),
+            ),
+        },
+        admission=AdmissionPolicy(max_concurrency=16, max_queue=64, reserved=4, offload=False),
     ),
     ServiceDefinition(
         name="web_fetch",
         description="Fetch a web page and return its plain text content.",
         register=register_web_fetch_service,
+        cache={
+            "fetch_plain_text": CachePolicy(
+                ttl=600,
+                max_entries=256,
+                max_bytes=32 * 1024 * 1024,
+                key=lambda args: args["url"].strip(),
+                # Archived copies stand in while the site is down; fetch it again next time.
+                cacheable=lambda result: result.get("source") != "archive",
+                backend="shared",
+            ),
+        },
+        admission=AdmissionPolicy(max_concurrency=8, max_queue=16, max_wait=10),
+        streaming={"fetch_plain_text"},
+        # HTML parsing holds the GIL; fetches mostly wait, so each process runs several.
+        processes=ProcessPolicy(processes=2, threads=4, max_pending=16),
     ),
     ServiceDefinition(
         name="newsapi",
         description="Search the NewsAPI.org index for articles by keyword.",
         register=register_newsapi_service,
+        cache={
+            "search_news": CachePolicy(
+                ttl=300,
+                max_entries=512,
+                max_bytes=16 * 1024 * 1024,
+                key=lambda args: {**args, "query": " ".join(args["query"].lower().split())},
+                # Searches cut short by a failed page are retried rather than served for 5 minutes.
+                cacheable=lambda result: not result.get("truncated"),
+                backend="shared",
+            ),
+        },
+        admission=AdmissionPolicy(max_concurrency=4, max_queue=8, max_wait=10),
+        streaming={"search_news"},
+    ),
+    ServiceDefinition(
+        name="local_index",
+        description="Search previously retrieved articles and pages offline.",
+        register=register_local_index_service,
+        warmup=warm_up_local_index_service,
+        admission=AdmissionPolicy(max_concurrency=4, max_queue=16, max_wait=2),
     ),
     ServiceDefinition(
         name="mysql",
         description="Interact with the llm_playground MySQL database (DDL/DML).",
         register=register_mysql_service,
+        warmup=warm_up_mysql_service,
+        # The connectivity check can take many seconds when the database host is
+        # unreachable; it must not hold up worker startup (and reloads).
+        warmup_mode="background",
+        cache={
+            "get_db_schema": CachePolicy(ttl=300, max_entries=64, backend="shared"),
+        },
+        admission=AdmissionPolicy(max_concurrency=4, max_queue=16, max_wait=5),
+        streaming={"mysql_select"},
     ),
     ServiceDefinition(
         name="math_operations",
         description="Perform arithmetic calculations including factorial and Fibonacci.",
         register=register_math_service,
+        cache={
+            "math_operations": CachePolicy(
+                ttl=None,
+                max_entries=2048,
+                max_bytes=16 * 1024 * 1024,
+                eviction="lfu",
+                key=lambda args: [args["operation"].strip().lower(), args["values"]],
+            ),
+        },
+        admission=AdmissionPolicy(max_concurrency=4, max_queue=16, max_wait=5),
+        # Big-integer results would otherwise stall every other tool of the worker.
+        processes=ProcessPolicy(processes=2, max_pending=8),
     ),
     ServiceDefinition(
         name="echo",
         description="Repeat any provided message for quick connectivity checks.",
         register=register_echo_service,
+        cache={"echo": CachePolicy(ttl=600, max_entries=256)},
+        admission=AdmissionPolicy(max_concurrency=16, max_queue=64, reserved=2, offload=False),
     ),
 ]
 
@@ -54,7 +132,10 @@ mcp, http_app = create_mcp_server(
     services,
     app_name="utility-suite",
     instructions=SYSTEM_INSTRUCTIONS,
-    json_response=True,
+    json_response=False,
+    warmup="startup",
+    warm_state=True,
+    max_concurrency=32,
 )
 attach_request_logger(http_app)
 
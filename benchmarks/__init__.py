@@ -0,0 +1 @@
+"""Benchmarks for the MCP server; run modules with ``python -m benchmarks.<name>``."""
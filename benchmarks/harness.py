@@ -0,0 +1,226 @@
+"""MCP client and latency statistics shared by the benchmark scripts.
+
+:class:`McpClient` speaks the streamable HTTP transport: it initializes a
+session and sends JSON-RPC ``tools/call`` requests, either to an ASGI app in
+this process (through ``httpx.ASGITransport``, running the app's lifespan) or
+to a server listening on a URL. Responses may be plain JSON
+(``json_response=True``) or an SSE stream; :meth:`McpClient.stream_tool`
+yields the messages of a stream as they arrive.
+"""
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+import httpx
+
+PROTOCOL_VERSION = "2025-06-18"
+ACCEPT = "application/json, text/event-stream"
+
+
+@dataclass
+class ToolCallResult:
+    """Outcome of one ``tools/call`` request as seen by the client."""
+
+    tool: str
+    status_code: int
+    elapsed_ms: float
+    result: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def rejected(self) -> bool:
+        """True when admission control shed the call (HTTP 503)."""
+
+        return self.status_code == 503
+
+
+class McpClient:
+    """Minimal MCP client for driving tools over HTTP."""
+
+    def __init__(self, http: httpx.AsyncClient, path: str = "/mcp") -> None:
+        self._http = http
+        self._path = path
+        self._headers = {"Accept": ACCEPT}
+        self._ids = itertools.count(1)
+        # Bytes read by stream_tool, as sent (i.e. compressed).
+        self.bytes_received = 0
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def in_process(cls, app: Any, *, timeout: float = 60.0) -> AsyncIterator["McpClient"]:
+        """Run ``app``'s lifespan and yield an initialized client talking to it directly."""
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as http:
+                client = cls(http)
+                await client.initialize()
+                yield client
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def remote(cls, url: str, *, timeout: float = 60.0) -> AsyncIterator["McpClient"]:
+        """Yield an initialized client for the MCP endpoint at ``url`` (e.g. ``http://host:8000/mcp``)."""
+
+        parsed = httpx.URL(url)
+        limits = httpx.Limits(max_connections=256, max_keepalive_connections=256)
+        async with httpx.AsyncClient(
+            base_url=str(parsed.copy_with(path="/", query=None)), timeout=timeout, limits=limits
+        ) as http:
+            client = cls(http, path=parsed.path or "/mcp")
+            await client.initialize()
+            yield client
+
+    async def initialize(self) -> dict[str, Any]:
+        # A new session replaces the previous one (e.g. after the server answered 404 for it).
+        self._headers.pop("mcp-session-id", None)
+        response = await self._post(
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "mcp-benchmark", "version": "1.0"},
+                },
+            }
+        )
+        response.raise_for_status()
+        session_id = response.headers.get("mcp-session-id")
+        if session_id:
+            self._headers["mcp-session-id"] = session_id
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        return _decode_message(response) or {}
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any], *, headers: dict[str, str] | None = None
+    ) -> ToolCallResult:
+        """Call a tool and time the full round trip, including reading the response."""
+
+        request_id = next(self._ids)
+        payload = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "tools/call",
+            "params": {"name": name, "arguments": arguments},
+        }
+        started = time.perf_counter()
+        try:
+            response = await self._post(payload, headers=headers)
+            message = _decode_message(response, request_id)
+        except httpx.HTTPError as exc:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            return ToolCallResult(name, 0, elapsed_ms, error=f"{exc.__class__.__name__}: {exc}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if message is None:
+            return ToolCallResult(name, response.status_code, elapsed_ms, error=f"HTTP {response.status_code}")
+        if "error" in message:
+            return ToolCallResult(name, response.status_code, elapsed_ms, error=message["error"].get("message"))
+
+        result = message.get("result", {})
+        if result.get("isError"):
+            text = " ".join(block.get("text", "") for block in result.get("content", []))
+            return ToolCallResult(name, response.status_code, elapsed_ms, result=result, error=text or "tool error")
+        return ToolCallResult(name, response.status_code, elapsed_ms, result=result)
+
+    async def stream_tool(
+        self, name: str, arguments: dict[str, Any], *, request_id: int | None = None, meta: dict[str, Any] | None = None
+    ) -> AsyncIterator[tuple[float, dict[str, Any]]]:
+        """Call a tool and yield ``(elapsed_ms, message)`` for each SSE message when it is received.
+
+        Notifications come first and the JSON-RPC response last. ``meta`` is sent
+        as the call's ``_meta`` (e.g. a ``progressToken``); pass a ``request_id``
+        from :meth:`next_request_id` to be able to :meth:`cancel` the call.
+        """
+
+        params: dict[str, Any] = {"name": name, "arguments": arguments}
+        if meta:
+            params["_meta"] = meta
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids) if request_id is None else request_id,
+            "method": "tools/call",
+            "params": params,
+        }
+        started = time.perf_counter()
+        async with self._http.stream("POST", self._path, json=payload, headers=self._headers) as response:
+            if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                await response.aread()
+                yield (time.perf_counter() - started) * 1000, _decode_message(response) or {}
+                return
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    yield (time.perf_counter() - started) * 1000, json.loads(line[5:])
+            self.bytes_received += response.num_bytes_downloaded
+
+    def next_request_id(self) -> int:
+        return next(self._ids)
+
+    async def cancel(self, request_id: int, reason: str = "cancelled by client") -> None:
+        """Send ``notifications/cancelled`` for an in-flight call."""
+
+        await self._post(
+            {
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {"requestId": request_id, "reason": reason},
+            }
+        )
+
+    async def _post(self, payload: dict[str, Any], headers: dict[str, str] | None = None) -> httpx.Response:
+        return await self._http.post(self._path, json=payload, headers={**self._headers, **(headers or {})})
+
+
+def _decode_message(response: httpx.Response, request_id: Any = None) -> dict[str, Any] | None:
+    """Return the JSON-RPC response carried by a JSON or SSE HTTP response."""
+
+    if not response.content:
+        return None
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        # Progress and log notifications precede the response on the stream.
+        message = None
+        for line in response.text.splitlines():
+            if not line.startswith("data:"):
+                continue
+            candidate = json.loads(line[5:])
+            if "id" in candidate and (request_id is None or candidate["id"] == request_id):
+                message = candidate
+        return message
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    values = sorted(latencies_ms)
+    if not values:
+        return {"p50": math.nan, "p95": math.nan, "p99": math.nan, "mean": math.nan, "max": math.nan}
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "mean": round(sum(values) / len(values), 3),
+        "max": round(values[-1], 3),
+    }
@@ -0,0 +1,149 @@
+"""Latency of cheap tools while CPU-heavy tools run, with and without process pools.
+
+Usage::
+
+    python -m benchmarks.isolation_benchmark [--duration 10] [--heavy 4] [--probes 4] [--json isolation.json]
+
+The services of ``app_mcp`` are served twice, in-process through
+``httpx.ASGITransport`` as in ``load_benchmark``: once as configured (with
+``math_operations`` and ``web_fetch`` in their process pools) and once with
+every service in the app process. In both runs ``--heavy`` callers keep big
+Fibonacci numbers and 256 KiB pages busy (distinct arguments, so nothing is
+served from the cache) while ``--probes`` callers measure ``echo`` and
+``iban_check``. The report shows the probe latency and the heavy calls
+completed in ``--duration`` seconds.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from .harness import McpClient, latency_summary
+from .load_benchmark import _german_iban
+from .standins import FakeMySQL, StandInServer, install_standins
+
+MODES = ("in-process", "processes")
+
+
+async def run_mode(mode: str, args: argparse.Namespace, server: StandInServer) -> dict[str, Any]:
+    import app_mcp
+    from mcp_framework import create_mcp_server
+
+    services = app_mcp.services
+    if mode == "in-process":
+        services = [dataclasses.replace(service, processes=None) for service in services]
+    _, http_app = create_mcp_server(
+        services, app_name="utility-suite", json_response=False, warmup="startup", max_concurrency=32
+    )
+
+    keys = itertools.count()
+    heavy_done = {"math_operations": 0, "fetch_plain_text": 0}
+    heavy_errors = 0
+    probes: dict[str, list[float]] = {"echo": [], "iban_check": []}
+    probe_errors = 0
+
+    async with McpClient.in_process(http_app) as client:
+        until = time.monotonic() + args.duration
+
+        async def heavy(index: int) -> None:
+            nonlocal heavy_errors
+            while time.monotonic() < until:
+                key = next(keys)
+                if index % 2 == 0:
+                    tool, arguments = "math_operations", {"operation": "fibonacci", "values": [args.fibonacci + key % 5000]}
+                else:
+                    tool, arguments = "fetch_plain_text", {"url": server.page_url(256, f"isolation-{mode}-{key}")}
+                result = await client.call_tool(tool, arguments)
+                if result.ok:
+                    heavy_done[tool] += 1
+                else:
+                    heavy_errors += 1
+
+        async def probe(index: int) -> None:
+            nonlocal probe_errors
+            # Let the heavy calls get going first.
+            await asyncio.sleep(0.5)
+            while time.monotonic() < until:
+                key = next(keys)
+                if index % 2 == 0:
+                    tool, arguments = "echo", {"message": f"isolation {mode} {key}"}
+                else:
+                    tool, arguments = "iban_check", {"iban": _german_iban(key)}
+                result = await client.call_tool(tool, arguments)
+                if result.ok:
+                    probes[tool].append(result.elapsed_ms)
+                else:
+                    probe_errors += 1
+                await asyncio.sleep(args.probe_interval)
+
+        await asyncio.gather(*(heavy(index) for index in range(args.heavy)),
+                             *(probe(index) for index in range(args.probes)))
+
+    return {
+        "mode": mode,
+        "probes": {tool: latency_summary(latencies) for tool, latencies in probes.items()},
+        "probe_calls": {tool: len(latencies) for tool, latencies in probes.items()},
+        "probe_errors": probe_errors,
+        "heavy_completed": heavy_done,
+        "heavy_errors": heavy_errors,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace, server: StandInServer) -> list[dict[str, Any]]:
+    return [await run_mode(mode, args, server) for mode in args.modes]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=list(MODES),
+                        help=f"Comma-separated modes ({', '.join(MODES)}).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per mode.")
+    parser.add_argument("--heavy", type=int, default=4, help="Callers of CPU-heavy tools.")
+    parser.add_argument("--probes", type=int, default=4, help="Callers of cheap tools.")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="Pause between probe calls.")
+    parser.add_argument("--fibonacci", type=int, default=15_000, help="Smallest Fibonacci index computed.")
+    parser.add_argument("--db-latency-ms", type=float, default=0.5, help="Simulated MySQL round trip.")
+    parser.add_argument("--web-latency-ms", type=float, default=5.0, help="Simulated web latency.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(latency_ms=args.web_latency_ms) as server:
+        workdir = Path(tmp)
+        install_standins(workdir, server, FakeMySQL(workdir, latency_ms=args.db_latency_ms))
+        rows = asyncio.run(run_benchmark(args, server))
+
+    print(f"{'mode':<11} {'probe':<11} {'calls':>6} {'p50':>9} {'p95':>9} {'p99':>9}   heavy calls done")
+    for row in rows:
+        heavy = ", ".join(f"{tool} {count}" for tool, count in row["heavy_completed"].items())
+        for index, (tool, latency) in enumerate(row["probes"].items()):
+            print(
+                f"{row['mode'] if index == 0 else '':<11} {tool:<11} {row['probe_calls'][tool]:>6} "
+                f"{latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms   {heavy if index == 0 else ''}"
+            )
+        if row["probe_errors"] or row["heavy_errors"]:
+            print(f"{'':<11} errors: {row['probe_errors']} probe, {row['heavy_errors']} heavy")
+
+    if args.json:
+        report = {
+            "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+            "cpu_count": os.cpu_count(),
+            "results": rows,
+        }
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
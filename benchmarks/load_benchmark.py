@@ -0,0 +1,211 @@
+"""Load and latency benchmark of every tool of ``app_mcp``.
+
+Usage::
+
+    python -m benchmarks.load_benchmark [--concurrency 8] [--requests 200] [--scenarios echo,mysql_select]
+                                        [--json results.json] [--baseline previous.json] [--threshold 0.2]
+
+The real ``http_app`` is driven in-process through ``httpx.ASGITransport`` with
+MCP ``tools/call`` requests, so the numbers include the middleware stack,
+admission control, caching and serialization. MySQL, the web and NewsAPI are
+replaced by the local stand-ins from ``benchmarks.standins``.
+
+Each scenario runs ``--requests`` calls with ``--concurrency`` callers after a
+short warm-up and reports throughput and p50/p95/p99 latency. By default every
+call uses distinct arguments, so cached tools are measured on the miss path;
+``--key-space N`` cycles through N argument sets to measure cache hits.
+
+With ``--baseline`` the results are compared to a previous ``--json`` report
+and the exit status is 1 if a scenario's p95 latency grew or its throughput
+dropped by more than ``--threshold`` (relative), or if it produced errors the
+baseline did not have.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .harness import McpClient, ToolCallResult, latency_summary
+from .standins import TOPICS, FakeMySQL, StandInServer, install_standins
+
+
+@dataclass
+class Scenario:
+    name: str
+    tool: str
+    arguments: Callable[[int], dict[str, Any]]
+
+
+def _german_iban(account: int) -> str:
+    bban = f"37040044{account % 10**10:010d}"
+    # "DE" followed by check digits 00 maps to 131400 for the mod-97 check.
+    check = 98 - int(bban + "131400") % 97
+    return f"DE{check:02d}{bban}"
+
+
+def build_scenarios(server: StandInServer) -> list[Scenario]:
+    select_sql = (
+        "SELECT c.id, c.name, c.balance, c.created_at, o.amount, o.status FROM customers AS c "
+        "JOIN orders AS o ON o.customer_id = c.id WHERE c.id > %(min_id)s ORDER BY c.id LIMIT 100"
+    )
+    return [
+        Scenario("echo", "echo", lambda k: {"message": f"benchmark message {k}"}),
+        Scenario("iban_check", "iban_check", lambda k: {"iban": _german_iban(k)}),
+        Scenario("math_operations", "math_operations",
+                 lambda k: {"operation": "fibonacci", "values": [1000 + k % 4000]}),
+        Scenario("fetch_plain_text[16k]", "fetch_plain_text", lambda k: {"url": server.page_url(16, f"p{k}")}),
+        Scenario("fetch_plain_text[256k]", "fetch_plain_text", lambda k: {"url": server.page_url(256, f"p{k}")}),
+        Scenario("search_news", "search_news", lambda k: {"query": f"energy {k}", "max_articles": 200}),
+        Scenario("search_local", "search_local", lambda k: {"query": TOPICS[k % len(TOPICS)], "limit": 20}),
+        Scenario("mysql_ping", "mysql_ping", lambda k: {}),
+        Scenario("get_db_schema", "get_db_schema", lambda k: {"table_name": ["customers", "orders"][k % 2]}),
+        Scenario("mysql_select", "mysql_select",
+                 lambda k: {"sql": select_sql, "params": {"min_id": k % 4000}}),
+    ]
+
+
+async def run_scenario(
+    client: McpClient, scenario: Scenario, *, requests: int, concurrency: int, warmup: int, key_space: int
+) -> dict[str, Any]:
+    def key(index: int) -> int:
+        return index % key_space if key_space else index
+
+    # Warm-up calls use keys outside the measured range unless keys are shared on purpose.
+    for index in range(warmup):
+        await client.call_tool(scenario.tool, scenario.arguments(key(index) if key_space else requests + index))
+
+    results: list[ToolCallResult] = []
+    pending = iter(range(requests))
+
+    async def caller() -> None:
+        for index in pending:
+            results.append(await client.call_tool(scenario.tool, scenario.arguments(key(index))))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    ok = [result for result in results if result.ok]
+    errors = [result for result in results if not result.ok and not result.rejected]
+    return {
+        "scenario": scenario.name,
+        "tool": scenario.tool,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": len(errors),
+        "rejected": sum(result.rejected for result in results),
+        "first_error": errors[0].error if errors else None,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(ok) / duration, 1) if duration else 0.0,
+        "latency_ms": latency_summary([result.elapsed_ms for result in ok]),
+    }
+
+
+def compare_to_baseline(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float, min_delta_ms: float
+) -> list[str]:
+    """Return a description of every regression against ``baseline``."""
+
+    previous = {row["scenario"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row["scenario"])
+        if before is None:
+            continue
+        p95, base_p95 = row["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if p95 > base_p95 * (1 + threshold) and p95 - base_p95 > min_delta_ms:
+            regressions.append(f"{row['scenario']}: p95 {base_p95:.1f} ms -> {p95:.1f} ms")
+        if row["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{row['scenario']}: throughput {before['throughput_rps']:.0f} -> {row['throughput_rps']:.0f} req/s"
+            )
+        if row["errors"] > before["errors"]:
+            regressions.append(f"{row['scenario']}: errors {before['errors']} -> {row['errors']}")
+    return regressions
+
+
+async def run_benchmark(args: argparse.Namespace, server: StandInServer) -> list[dict[str, Any]]:
+    import app_mcp
+
+    scenarios = build_scenarios(server)
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [scenario for scenario in scenarios if scenario.name in wanted or scenario.tool in wanted]
+
+    rows = []
+    async with McpClient.in_process(app_mcp.http_app) as client:
+        for scenario in scenarios:
+            rows.append(
+                await run_scenario(
+                    client,
+                    scenario,
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                    key_space=args.key_space,
+                )
+            )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Measured calls per scenario.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured calls per scenario.")
+    parser.add_argument("--scenarios", help="Comma-separated scenario or tool names (default: all).")
+    parser.add_argument("--key-space", type=int, default=0, help="Distinct argument sets (0: all distinct).")
+    parser.add_argument("--db-latency-ms", type=float, default=0.5, help="Simulated MySQL round trip.")
+    parser.add_argument("--web-latency-ms", type=float, default=5.0, help="Simulated web/NewsAPI latency.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    parser.add_argument("--baseline", type=Path, help="Previous report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression.")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore p95 changes below this.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(latency_ms=args.web_latency_ms) as server:
+        workdir = Path(tmp)
+        install_standins(workdir, server, FakeMySQL(workdir, latency_ms=args.db_latency_ms))
+        rows = asyncio.run(run_benchmark(args, server))
+
+    report = {
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "cpu_count": os.cpu_count(),
+        "results": rows,
+    }
+
+    print(f"{'scenario':<24} {'ok':>6} {'err':>5} {'shed':>5} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for row in rows:
+        latency = row["latency_ms"]
+        print(
+            f"{row['scenario']:<24} {row['ok']:>6} {row['errors']:>5} {row['rejected']:>5} "
+            f"{row['throughput_rps']:>9.1f} {latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms"
+        )
+        if row["first_error"]:
+            print(f"  first error: {row['first_error'][:200]}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(rows, baseline["results"], args.threshold, args.min_delta_ms)
+        if regressions:
+            print("\nregressions against", args.baseline)
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nno regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
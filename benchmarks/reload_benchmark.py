@@ -0,0 +1,286 @@
+"""Latency dip and errors while ``app_mcp`` is restarted or reloaded under load.
+
+Usage::
+
+    python -m benchmarks.reload_benchmark [--workers 2] [--clients 8] [--duration 20] [--json reload.json]
+
+``app_mcp`` is served by a real ``uvicorn --workers N`` process (see
+``benchmarks.standin_app``) while ``--clients`` clients call a mix of cached
+and uncached tools with arguments from a small key space. After
+``--reload-at`` seconds the server is cycled in one of three ways:
+
+* ``cold-restart``: what ``pull.sh`` did before — stop uvicorn (SIGTERM), wait
+  for it to exit and start it again without a warm-state snapshot;
+* ``restart``: the same, but the new workers restore the snapshot;
+* ``reload``: ``systemctl reload`` — SIGHUP, upon which uvicorn replaces its
+  workers one at a time, each new one only after it finished warming up.
+
+Each mode runs against a fresh server. The report shows the latency of calls
+before the cycle and in the ``--window`` seconds after it, the calls that
+failed, the longest time without any successful call, and how often a client
+had to open a new MCP session. Sessions live in one worker, so a client whose
+worker was replaced gets HTTP 400/404 and re-initializes, as the MCP specification
+asks clients to do; the call is then retried once and only counts as failed
+if the retry fails too. A few calls per retired worker may still fail with
+a read error: uvicorn closes idle kept-alive connections as soon as a worker
+shuts down, and a call sent on one at that moment is lost.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .harness import McpClient
+from .load_benchmark import _german_iban
+from .standins import FakeMySQL, StandInServer
+
+MODES = ("cold-restart", "restart", "reload")
+REPOSITORY = Path(__file__).resolve().parent.parent
+
+SELECT_SQL = "SELECT id, name, email, balance FROM customers WHERE id > %(min_id)s ORDER BY id LIMIT 20"
+
+
+def _workload(server: StandInServer, key_space: int) -> list[tuple[str, Any]]:
+    return [
+        ("math_operations", lambda k: {"operation": "fibonacci", "values": [20_000 + k % key_space]}),
+        ("iban_check", lambda k: {"iban": _german_iban(k % key_space)}),
+        ("echo", lambda k: {"message": f"reload benchmark {k % key_space}"}),
+        ("fetch_plain_text", lambda k: {"url": server.page_url(16, f"reload-{k % key_space}")}),
+        ("mysql_select", lambda k: {"sql": SELECT_SQL, "params": {"min_id": k % 4000}}),
+    ]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class UvicornProcess:
+    """``uvicorn --workers N`` serving ``benchmarks.standin_app`` in a child process."""
+
+    def __init__(self, workers: int, env: dict[str, str]) -> None:
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}/mcp"
+        self._workers = workers
+        self._env = env
+        self.process: subprocess.Popen | None = None
+
+    def start(self) -> None:
+        command = [
+            sys.executable, "-m", "uvicorn", "benchmarks.standin_app:http_app",
+            "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(self._workers),
+            # As in the systemd unit written by create_service.sh.
+            "--timeout-graceful-shutdown", "30", "--timeout-worker-healthcheck", "60",
+            "--log-level", "warning",
+        ]
+        self.process = subprocess.Popen(command, cwd=REPOSITORY, env=self._env)
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            self.process.wait(timeout=60)
+
+    def reload(self) -> None:
+        self.process.send_signal(signal.SIGHUP)
+
+    async def wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                async with McpClient.remote(self.url, timeout=5):
+                    return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+class _Client:
+    """One caller with its own connection and MCP session, recording every call."""
+
+    def __init__(self, url: str, workload: list[tuple[str, Any]], seed: int) -> None:
+        self._url = url
+        self._workload = workload
+        self._random = random.Random(seed)
+        self.calls: list[tuple[float, float, str | None, str]] = []
+        self.sessions_reinitialized = 0
+
+    async def run(self, started: float, until: float) -> None:
+        client = None
+        stack = None
+        while time.monotonic() < until:
+            if client is None:
+                try:
+                    stack = McpClient.remote(self._url, timeout=60)
+                    client = await stack.__aenter__()
+                except httpx.HTTPError as exc:
+                    stack = client = None
+                    self.calls.append((time.monotonic() - started, 0.0, f"connect: {exc.__class__.__name__}", "-"))
+                    await asyncio.sleep(0.05)
+                    continue
+            tool, arguments = self._random.choice(self._workload)
+            call_started = time.monotonic()
+            result = await client.call_tool(tool, arguments(self._random.randrange(1 << 30)))
+            if result.status_code in (400, 404):
+                # The worker that held our session is gone: start a new session and retry. The MCP
+                # SDK answers unknown sessions with 400 rather than the 404 the specification asks for.
+                self.sessions_reinitialized += 1
+                try:
+                    await client.initialize()
+                    result = await client.call_tool(tool, arguments(self._random.randrange(1 << 30)))
+                except httpx.HTTPError as exc:
+                    result.error = f"initialize: {exc.__class__.__name__}"
+            elapsed_ms = (time.monotonic() - call_started) * 1000
+            error = None if result.ok else (result.error or f"HTTP {result.status_code}")
+            self.calls.append((call_started - started, elapsed_ms, error, tool))
+            if result.status_code == 0:
+                # Connection refused or reset: reconnect before the next call.
+                await stack.__aexit__(None, None, None)
+                stack = client = None
+                await asyncio.sleep(0.05)
+        if stack is not None:
+            await stack.__aexit__(None, None, None)
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+
+def _summarize(calls: list[tuple[float, float, str | None, str]], start: float, end: float) -> dict[str, Any]:
+    selected = [call for call in calls if start <= call[0] < end]
+    latencies = [elapsed for _, elapsed, error, _ in selected if error is None]
+    return {
+        "calls": len(selected),
+        "errors": sum(1 for call in selected if call[2] is not None),
+        "throughput_rps": round(len(latencies) / (end - start), 1),
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+        "max_ms": round(max(latencies), 3) if latencies else None,
+    }
+
+
+def _longest_gap(calls: list[tuple[float, float, str | None, str]], start: float, end: float) -> float:
+    # Longest time between start, consecutive successful completions and end.
+    completions = sorted(at + elapsed / 1000 for at, elapsed, error, _ in calls if error is None)
+    bounds = [start, *(at for at in completions if start < at < end), end]
+    return round(max(later - earlier for earlier, later in zip(bounds, bounds[1:])), 3)
+
+
+async def run_mode(mode: str, args: argparse.Namespace, standins: StandInServer, root: Path) -> dict[str, Any]:
+    workdir = root / mode
+    workdir.mkdir()
+    FakeMySQL(workdir, customers=5000)
+    env = {
+        **os.environ,
+        "MCP_BENCHMARK_WORKDIR": str(workdir),
+        "MCP_BENCHMARK_STANDIN_URL": standins.base_url,
+        "MCP_BENCHMARK_DB_LATENCY_MS": str(args.db_latency_ms),
+        "MCP_TRACE_SAMPLE_RATE": "0",
+        # Snapshot often so that a reload shortly after startup has something to restore.
+        "MCP_WARM_STATE_INTERVAL": str(args.snapshot_interval),
+    }
+    server = UvicornProcess(args.workers, env)
+    server.start()
+    try:
+        await server.wait_ready()
+        clients = [_Client(server.url, _workload(standins, args.key_space), seed) for seed in range(args.clients)]
+        started = time.monotonic()
+        until = started + args.duration
+        load = asyncio.gather(*(client.run(started, until) for client in clients))
+
+        await asyncio.sleep(args.reload_at)
+        cycle_started = time.monotonic() - started
+        if mode == "reload":
+            server.reload()
+        else:
+            await asyncio.to_thread(server.stop)
+            if mode == "cold-restart":
+                (workdir / "mcp_warm_state.pickle").unlink(missing_ok=True)
+            server.start()
+        await load
+    finally:
+        await asyncio.to_thread(server.stop)
+
+    calls = [call for client in clients for call in client.calls]
+    window_end = cycle_started + args.window
+    errors: dict[str, int] = {}
+    for _, _, error, _ in calls:
+        if error is not None:
+            kind = error.split(":")[0][:60]
+            errors[kind] = errors.get(kind, 0) + 1
+    return {
+        "mode": mode,
+        "cycle_at_s": round(cycle_started, 3),
+        "before": _summarize(calls, 1.0, cycle_started),
+        "after": _summarize(calls, cycle_started, window_end),
+        "longest_gap_s": _longest_gap(calls, cycle_started, args.duration),
+        "errors": errors,
+        "sessions_reinitialized": sum(client.sessions_reinitialized for client in clients),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace, standins: StandInServer, root: Path) -> list[dict[str, Any]]:
+    return [await run_mode(mode, args, standins, root) for mode in args.modes]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=list(MODES),
+                        help=f"Comma-separated modes ({', '.join(MODES)}).")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes.")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent callers.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per mode.")
+    parser.add_argument("--reload-at", type=float, default=8.0, help="Seconds of load before the cycle.")
+    parser.add_argument("--window", type=float, default=5.0, help="Seconds after the cycle reported as 'after'.")
+    parser.add_argument("--key-space", type=int, default=200, help="Distinct arguments per tool.")
+    parser.add_argument("--snapshot-interval", type=float, default=2.0, help="MCP_WARM_STATE_INTERVAL of the server.")
+    parser.add_argument("--db-latency-ms", type=float, default=0.5, help="Simulated MySQL round trip.")
+    parser.add_argument("--web-latency-ms", type=float, default=20.0, help="Simulated web latency.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(latency_ms=args.web_latency_ms) as standins:
+        rows = asyncio.run(run_benchmark(args, standins, Path(tmp)))
+
+    print(f"{'mode':<13} {'':<7} {'calls':>6} {'errors':>6} {'req/s':>7} {'p50':>9} {'p95':>9} {'max':>10}")
+    for row in rows:
+        for phase in ("before", "after"):
+            stats = row[phase]
+            print(
+                f"{row['mode'] if phase == 'before' else '':<13} {phase:<7} {stats['calls']:>6} {stats['errors']:>6} "
+                f"{stats['throughput_rps']:>7.1f} {stats['p50_ms'] or 0:>7.1f}ms {stats['p95_ms'] or 0:>7.1f}ms "
+                f"{stats['max_ms'] or 0:>8.1f}ms"
+            )
+        print(
+            f"{'':<13} longest gap {row['longest_gap_s']:.3f}s, {row['sessions_reinitialized']} sessions "
+            f"re-initialized, errors: {json.dumps(row['errors']) if row['errors'] else 'none'}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"parameters": vars(args) | {"json": None}, "results": rows}, indent=2),
+                             encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Replay production traffic recorded by ``log_interaction``.
+
+Usage::
+
+    python -m benchmarks.replay mcp.log [more.log ...] [--speed original|max|<factor>] [--url http://host:8000/mcp]
+    journalctl -u flask_app9 -o cat | python -m benchmarks.replay - --speed max --concurrency 16
+
+Log lines may carry a prefix (e.g. ``INFO:``); the JSON object starting at the
+first ``{`` is parsed. Entries that describe a tool call — the tool's own
+entries such as ``iban_check``, ``math_operations``, ``fetch_plain_text`` or
+``mysql_select``, their ``*_error`` variants and ``cache_hit`` entries — are
+turned back into ``tools/call`` requests. Statements that modify the database
+(``mysql_schema``, ``mysql_write``, ``mysql_execute``) are only replayed with
+``--include-writes``.
+
+Calls go to an in-process ``app_mcp`` (using the backends it is configured
+for) or, with ``--url``, to a running server. ``--speed original`` keeps the
+recorded inter-arrival times, a number replays that many times faster and
+``max`` sends calls back to back from ``--concurrency`` callers.
+
+The report lists latency percentiles per tool and compares every result with
+the logged output: values of the keys both have in common must match, and a
+call that failed in the log must fail again.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, TextIO
+
+from .harness import McpClient, ToolCallResult, latency_summary
+
+WRITE_TOOLS = {"mysql_schema", "mysql_write", "mysql_execute"}
+
+
+@dataclass
+class RecordedCall:
+    """A tool call reconstructed from a log entry."""
+
+    timestamp: float
+    tool: str
+    arguments: dict[str, Any]
+    expected: Any = None
+    expected_error: bool = False
+
+
+def _sql_arguments(entry_input: dict[str, Any]) -> dict[str, Any]:
+    return {"sql": entry_input["sql"], "params": entry_input.get("params")}
+
+
+def _schema_arguments(entry_input: dict[str, Any]) -> dict[str, Any]:
+    return {"table_name": entry_input.get("table_name")}
+
+
+def _same(entry_input: dict[str, Any]) -> dict[str, Any]:
+    return dict(entry_input)
+
+
+def _without_page(entry_input: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in entry_input.items() if key != "page"}
+
+
+# action -> (tool, argument builder, whether the entry records a failed call)
+ACTIONS: dict[str, tuple[str, Callable[[dict[str, Any]], dict[str, Any]], bool]] = {
+    "echo": ("echo", _same, False),
+    "iban_check": ("iban_check", _same, False),
+    "iban_check_error": ("iban_check", _same, True),
+    "math_operations": ("math_operations", _same, False),
+    "math_operations_error": ("math_operations", _same, True),
+    "fetch_plain_text": ("fetch_plain_text", _same, False),
+    "fetch_plain_text_archive_fallback": ("fetch_plain_text", _same, False),
+    "fetch_plain_text_archive_redirect": ("fetch_plain_text", _same, False),
+    "fetch_plain_text_error": ("fetch_plain_text", _same, True),
+    "search_news": ("search_news", _same, False),
+    "search_news_error": ("search_news", _without_page, True),
+    "search_local": ("search_local", _same, False),
+    "search_local_error": ("search_local", _same, True),
+    "mysql_ping": ("mysql_ping", lambda entry_input: {}, False),
+    "get_db_schema": ("get_db_schema", _schema_arguments, False),
+    "mysql_select": ("mysql_select", _sql_arguments, False),
+    "mysql_schema": ("mysql_schema", _sql_arguments, False),
+    "mysql_write": ("mysql_write", _sql_arguments, False),
+    "mysql_execute": ("mysql_execute", _sql_arguments, False),
+}
+
+
+def _parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.rstrip("Z")).timestamp()
+
+
+def _to_call(entry: dict[str, Any]) -> RecordedCall | None:
+    action = entry.get("action")
+    entry_input = entry.get("input")
+    if not isinstance(entry_input, dict):
+        return None
+
+    if action == "cache_hit":
+        if "arguments" not in entry_input:
+            return None  # written before cache hits recorded their arguments
+        return RecordedCall(_parse_timestamp(entry["timestamp"]), entry_input["tool"], entry_input["arguments"])
+
+    mapping = ACTIONS.get(action)
+    if mapping is None:
+        return None
+    # Only a failed first page fails the search; later pages just truncate it.
+    if action == "search_news_error" and entry_input.get("page", 1) != 1:
+        return None
+    tool, build_arguments, failed = mapping
+    try:
+        arguments = build_arguments(entry_input)
+    except KeyError:
+        return None
+    return RecordedCall(
+        _parse_timestamp(entry["timestamp"]),
+        tool,
+        arguments,
+        expected=None if failed else entry.get("output"),
+        expected_error=failed,
+    )
+
+
+def parse_log(lines: Iterable[str]) -> Iterable[RecordedCall]:
+    """Yield the tool calls recorded in JSON Lines log output."""
+
+    for line in lines:
+        start = line.find("{")
+        if start < 0:
+            continue
+        try:
+            entry = json.loads(line[start:])
+        except ValueError:
+            continue
+        if not isinstance(entry, dict) or "timestamp" not in entry:
+            continue
+        call = _to_call(entry)
+        if call is not None:
+            yield call
+
+
+def load_calls(paths: list[str], tools: set[str] | None, include_writes: bool) -> list[RecordedCall]:
+    calls: list[RecordedCall] = []
+    for path in paths:
+        handle: TextIO = sys.stdin if path == "-" else open(path, encoding="utf-8", errors="replace")
+        try:
+            calls.extend(parse_log(handle))
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+    calls = [
+        call
+        for call in calls
+        if (tools is None or call.tool in tools) and (include_writes or call.tool not in WRITE_TOOLS)
+    ]
+    calls.sort(key=lambda call: call.timestamp)
+    return calls
+
+
+def _normalized(value: Any) -> Any:
+    # Logged values went through json.dumps(default=str); do the same to results.
+    return json.loads(json.dumps(value, default=str))
+
+
+def diff_result(call: RecordedCall, result: ToolCallResult) -> list[str] | None:
+    """Return the keys whose values differ from the log, or ``None`` if nothing is comparable."""
+
+    if call.expected_error:
+        return None if not result.ok else ["<expected an error>"]
+    if not result.ok:
+        return ["<error>"]
+    if not isinstance(call.expected, dict):
+        return None
+    structured = (result.result or {}).get("structuredContent")
+    if not isinstance(structured, dict):
+        return None
+    expected, actual = _normalized(call.expected), _normalized(structured)
+    common = expected.keys() & actual.keys()
+    if not common:
+        return None
+    return sorted(key for key in common if expected[key] != actual[key])
+
+
+async def replay(
+    client: McpClient, calls: list[RecordedCall], *, speed: float | None, concurrency: int, headers: dict[str, str]
+) -> tuple[list[tuple[RecordedCall, ToolCallResult]], list[float]]:
+    """Issue ``calls`` and return each with its result, plus how late each call started (ms)."""
+
+    outcomes: list[tuple[RecordedCall, ToolCallResult]] = []
+    lags: list[float] = []
+
+    async def issue(call: RecordedCall) -> None:
+        outcomes.append((call, await client.call_tool(call.tool, call.arguments, headers=headers)))
+
+    if speed is None:
+        pending = iter(calls)
+
+        async def caller() -> None:
+            for call in pending:
+                await issue(call)
+
+        await asyncio.gather(*(caller() for _ in range(concurrency)))
+        return outcomes, lags
+
+    # Open loop: calls start on the recorded schedule whether or not earlier ones finished.
+    in_flight = asyncio.Semaphore(concurrency)
+    origin = calls[0].timestamp if calls else 0.0
+    started = time.perf_counter()
+
+    async def scheduled(call: RecordedCall) -> None:
+        async with in_flight:
+            await issue(call)
+
+    tasks = []
+    for call in calls:
+        due = (call.timestamp - origin) / speed
+        delay = due - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lags.append(max(0.0, -delay) * 1000)
+        tasks.append(asyncio.create_task(scheduled(call)))
+    await asyncio.gather(*tasks)
+    return outcomes, lags
+
+
+def summarize(outcomes: list[tuple[RecordedCall, ToolCallResult]], max_examples: int) -> list[dict[str, Any]]:
+    by_tool: dict[str, list[tuple[RecordedCall, ToolCallResult]]] = defaultdict(list)
+    for call, result in outcomes:
+        by_tool[call.tool].append((call, result))
+
+    rows = []
+    for tool, tool_outcomes in sorted(by_tool.items()):
+        differing_keys: Counter[str] = Counter()
+        examples = []
+        compared = mismatched = 0
+        for call, result in tool_outcomes:
+            keys = diff_result(call, result)
+            if keys is None:
+                continue
+            compared += 1
+            if keys:
+                mismatched += 1
+                differing_keys.update(keys)
+                if len(examples) < max_examples:
+                    examples.append({"arguments": call.arguments, "keys": keys, "error": result.error})
+        results = [result for _, result in tool_outcomes]
+        rows.append(
+            {
+                "tool": tool,
+                "calls": len(results),
+                "ok": sum(result.ok for result in results),
+                "errors": sum(not result.ok and not result.rejected for result in results),
+                "rejected": sum(result.rejected for result in results),
+                "latency_ms": latency_summary([result.elapsed_ms for result in results if not result.rejected]),
+                "compared": compared,
+                "mismatched": mismatched,
+                "differing_keys": dict(differing_keys.most_common()),
+                "examples": examples,
+            }
+        )
+    return rows
+
+
+async def run(args: argparse.Namespace, calls: list[RecordedCall]) -> tuple[list, list[float], float]:
+    speed = None if args.speed == "max" else 1.0 if args.speed == "original" else float(args.speed)
+    headers = {"x-trace-sampled": "1"} if args.trace else {}
+    if args.url:
+        context = McpClient.remote(args.url)
+    else:
+        import app_mcp
+
+        context = McpClient.in_process(app_mcp.http_app)
+
+    async with context as client:
+        started = time.perf_counter()
+        outcomes, lags = await replay(client, calls, speed=speed, concurrency=args.concurrency, headers=headers)
+        return outcomes, lags, time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="JSON Lines log files ('-' reads standard input).")
+    parser.add_argument("--url", help="MCP endpoint of a running server (default: in-process app_mcp).")
+    parser.add_argument("--speed", default="original", help="'original', 'max' or a speed-up factor.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Callers for 'max', in-flight limit otherwise.")
+    parser.add_argument("--tools", help="Comma-separated tools to replay (default: all).")
+    parser.add_argument("--limit", type=int, help="Replay at most this many calls.")
+    parser.add_argument("--include-writes", action="store_true", help="Also replay statements that modify data.")
+    parser.add_argument("--trace", action="store_true", help="Ask the server to sample every replayed request.")
+    parser.add_argument("--examples", type=int, default=3, help="Output diffs shown per tool.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+    if args.speed not in {"original", "max"}:
+        try:
+            if float(args.speed) <= 0:
+                raise ValueError
+        except ValueError:
+            parser.error("--speed must be 'original', 'max' or a positive number")
+
+    calls = load_calls(args.logs, set(args.tools.split(",")) if args.tools else None, args.include_writes)
+    if args.limit is not None:
+        calls = calls[: args.limit]
+    if not calls:
+        print("no replayable tool calls found")
+        return 1
+
+    recorded_span = calls[-1].timestamp - calls[0].timestamp
+    outcomes, lags, duration = asyncio.run(run(args, calls))
+    rows = summarize(outcomes, args.examples)
+    report = {
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "calls": len(calls),
+        "recorded_span_s": round(recorded_span, 3),
+        "replay_duration_s": round(duration, 3),
+        "throughput_rps": round(len(calls) / duration, 1) if duration else 0.0,
+        "schedule_lag_ms": latency_summary(lags) if lags else None,
+        "tools": rows,
+    }
+
+    print(
+        f"{report['calls']} calls recorded over {report['recorded_span_s']:.1f} s, "
+        f"replayed in {report['replay_duration_s']:.1f} s ({report['throughput_rps']:.1f} req/s)"
+    )
+    if report["schedule_lag_ms"]:
+        print(f"start lag behind schedule: p95 {report['schedule_lag_ms']['p95']:.1f} ms")
+    print(f"\n{'tool':<20} {'calls':>6} {'err':>5} {'shed':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'diffs':>11}")
+    for row in rows:
+        latency = row["latency_ms"]
+        print(
+            f"{row['tool']:<20} {row['calls']:>6} {row['errors']:>5} {row['rejected']:>5} "
+            f"{latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms {latency['p99']:>7.1f}ms "
+            f"{row['mismatched']:>5}/{row['compared']:<5}"
+        )
+        for example in row["examples"]:
+            detail = f" ({example['error'][:120]})" if example["error"] else ""
+            print(f"  differs in {', '.join(example['keys'])}: {json.dumps(example['arguments'])[:120]}{detail}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
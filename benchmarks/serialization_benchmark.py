@@ -0,0 +1,177 @@
+"""Measure JSON encoding time and bytes on the wire for large tool results.
+
+Usage::
+
+    python -m benchmarks.serialization_benchmark [--repeat 20] [--json serialization.json]
+
+Three representative payloads are built with the benchmark stand-ins: a
+``fetch_plain_text`` result for a 256 KiB page with hundreds of links, 1000
+``mysql_select`` rows with ``Decimal``, ``datetime`` and ``bytes`` values, and
+500 ``search_news`` articles.
+
+For each payload the report shows the median encoding time of every encoder:
+FastMCP's default tool serializer (pydantic-core), the encoders from
+``mcp_framework.serialization``, and the standard-library path
+``log_interaction`` used before, which re-encoded entries with ``default=str``
+after a ``TypeError``. It then shows the size of the JSON-RPC response (which
+carries the result both as structured content and as text) uncompressed and
+with gzip and brotli, and the time compression takes.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+import pydantic_core
+
+from mcp_framework import JSON_ENCODERS
+from mcp_framework.compression import BROTLI_QUALITY, GZIP_LEVEL
+from services.newsapi_service import _summarize_article
+from services.web_fetch_service import _extract_text_and_links
+
+from .standins import fixture_page, newsapi_page
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional accelerator
+    brotli = None
+
+
+def build_payloads() -> dict[str, Any]:
+    url = "https://example.org/articles/benchmark.html"
+    text, links = _extract_text_and_links(fixture_page(256, "benchmark").decode("utf-8"), "text/html", url)
+
+    rng = random.Random(7)
+    started = datetime(2024, 1, 1, 8, 30)
+    rows = [
+        {
+            "id": n,
+            "name": f"Customer {n}",
+            "email": f"customer{n}@example.org",
+            "balance": Decimal(f"{rng.uniform(0, 10_000):.2f}"),
+            "created_at": started + timedelta(minutes=n),
+            # VARBINARY holding text; pydantic-core cannot encode arbitrary bytes.
+            "token": rng.randbytes(8).hex().encode("ascii"),
+        }
+        for n in range(1, 1001)
+    ]
+
+    articles = [
+        _summarize_article(article)
+        for page in range(1, 6)
+        for article in newsapi_page("energy storage", page, 100)["articles"]
+    ]
+    return {
+        "fetch_plain_text": {"url": url, "text": text, "links": links},
+        "mysql_select": {"rowcount": len(rows), "rows": rows},
+        "search_news": {"query": "energy storage", "total_results": 1000, "articles": articles},
+    }
+
+
+def _legacy_log_dumps(value: Any) -> bytes:
+    # ``log_interaction`` before the pluggable encoders.
+    try:
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+    except TypeError:
+        sanitized = json.loads(json.dumps(value, default=str))
+        return json.dumps(sanitized, ensure_ascii=False).encode("utf-8")
+
+
+ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    "pydantic-core (FastMCP default)": lambda value: pydantic_core.to_json(value, fallback=str),
+    "json (log_interaction before)": _legacy_log_dumps,
+    **{
+        f"{name} (mcp_framework)": encoder
+        for name, encoder in sorted(JSON_ENCODERS.items())
+        if name != "pydantic"  # the same as FastMCP's default above
+    },
+}
+
+
+def _median_ms(function: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def _response_body(payload: Any, encoder: Callable[[Any], bytes]) -> bytes:
+    structured = pydantic_core.to_jsonable_python(payload, fallback=str)
+    message = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "result": {
+            "content": [{"type": "text", "text": encoder(payload).decode("utf-8")}],
+            "structuredContent": structured,
+            "isError": False,
+        },
+    }
+    return pydantic_core.to_json(message)
+
+
+def measure(payloads: dict[str, Any], repeat: int) -> dict[str, Any]:
+    report: dict[str, Any] = {}
+    default = JSON_ENCODERS["pydantic"]  # create_mcp_server's tool result encoder
+    for name, payload in payloads.items():
+        encoding: dict[str, Any] = {}
+        for encoder_name, encoder in ENCODERS.items():
+            try:
+                size = len(encoder(payload))
+            except Exception as exc:
+                encoding[encoder_name] = {"error": f"{exc.__class__.__name__}: {exc}"}
+                continue
+            encoding[encoder_name] = {"ms": _median_ms(lambda: encoder(payload), repeat), "bytes": size}
+
+        body = _response_body(payload, default)
+        wire = {"identity": {"bytes": len(body), "ms": 0.0}}
+        wire["gzip"] = {
+            "bytes": len(gzip.compress(body, compresslevel=GZIP_LEVEL)),
+            "ms": _median_ms(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), repeat),
+        }
+        if brotli is not None:
+            wire["br"] = {
+                "bytes": len(brotli.compress(body, quality=BROTLI_QUALITY)),
+                "ms": _median_ms(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat),
+            }
+        report[name] = {"encoding": encoding, "wire": wire}
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (median reported).")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+
+    report = measure(build_payloads(), max(1, args.repeat))
+
+    for payload, results in report.items():
+        print(f"\n{payload}")
+        print(f"  {'encoder':<34} {'time':>10} {'size':>12}")
+        for encoder_name, row in results["encoding"].items():
+            if "error" in row:
+                print(f"  {encoder_name:<34} {row['error'][:60]}")
+                continue
+            print(f"  {encoder_name:<34} {row['ms']:>7.2f} ms {row['bytes'] / 1024:>9.1f} KiB")
+        print(f"  {'response body':<34} {'compress':>10} {'on the wire':>12}")
+        for encoding, row in results["wire"].items():
+            print(f"  {encoding:<34} {row['ms']:>7.2f} ms {row['bytes'] / 1024:>9.1f} KiB")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
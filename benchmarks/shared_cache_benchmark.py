@@ -0,0 +1,159 @@
+"""Compare per-worker memory caches with the shared SQLite cache.
+
+Usage::
+
+    python -m benchmarks.shared_cache_benchmark [--workers 4] [--requests 2000] [--json cache.json]
+
+Every worker process replays its own Zipf-distributed key stream over the same
+key space against one of two setups:
+
+* ``memory``: each worker owns a ``MemoryCacheBackend`` like a uvicorn worker
+  with the default backend does;
+* ``shared``: all workers use one ``SQLiteCacheBackend`` database.
+
+The report shows the aggregate hit rate, throughput, the bytes held by the
+caches across all workers and the peak RSS per worker.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from mcp_framework import CachePolicy, MemoryCacheBackend, SQLiteCacheBackend
+
+NAMESPACE = "benchmark"
+
+
+def _key_stream(requests: int, keys: int, skew: float, seed: int) -> list[str]:
+    weights = [1 / (rank**skew) for rank in range(1, keys + 1)]
+    rng = random.Random(seed)
+    return [f"key-{index}" for index in rng.choices(range(keys), weights=weights, k=requests)]
+
+
+def _run_worker(
+    mode: str,
+    worker_id: int,
+    db_path: str,
+    policy: CachePolicy,
+    requests: int,
+    keys: int,
+    skew: float,
+    payload_bytes: int,
+    miss_cost_ms: float,
+) -> dict[str, Any]:
+    if mode == "shared":
+        backend = SQLiteCacheBackend(NAMESPACE, policy, path=Path(db_path))
+    else:
+        backend = MemoryCacheBackend(policy)
+
+    payload = {"text": "x" * payload_bytes, "links": [f"https://example.org/{n}" for n in range(20)]}
+    stream = _key_stream(requests, keys, skew, seed=1234 + worker_id)
+
+    hits = 0
+    started = time.perf_counter()
+    for key in stream:
+        hit, _ = backend.get(key)
+        if hit:
+            hits += 1
+            continue
+        if miss_cost_ms:
+            time.sleep(miss_cost_ms / 1000)
+        backend.set(key, {**payload, "key": key})
+    elapsed = time.perf_counter() - started
+
+    return {
+        "hits": hits,
+        "requests": requests,
+        "elapsed_s": elapsed,
+        "cache_bytes": backend.stats()["bytes"],
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace, db_path: Path) -> dict[str, Any]:
+    policy = CachePolicy(ttl=None, max_entries=args.max_entries, max_bytes=args.max_bytes)
+    context = multiprocessing.get_context("spawn")
+    worker_args = [
+        (
+            mode,
+            worker_id,
+            str(db_path),
+            policy,
+            args.requests,
+            args.keys,
+            args.skew,
+            args.payload_bytes,
+            args.miss_cost_ms,
+        )
+        for worker_id in range(args.workers)
+    ]
+    started = time.perf_counter()
+    with context.Pool(args.workers) as pool:
+        results = pool.starmap(_run_worker, worker_args)
+    wall_s = time.perf_counter() - started
+
+    total_requests = sum(result["requests"] for result in results)
+    total_hits = sum(result["hits"] for result in results)
+    if mode == "shared":
+        cache_bytes = results[0]["cache_bytes"]
+        on_disk = sum(path.stat().st_size for path in db_path.parent.glob(db_path.name + "*"))
+    else:
+        cache_bytes = sum(result["cache_bytes"] for result in results)
+        on_disk = 0
+
+    return {
+        "mode": mode,
+        "hit_rate": round(total_hits / total_requests, 4),
+        "throughput_rps": round(total_requests / max(result["elapsed_s"] for result in results), 1),
+        "wall_s": round(wall_s, 3),
+        "cache_bytes_total": cache_bytes,
+        "db_bytes_on_disk": on_disk,
+        "max_rss_kb_per_worker": max(result["max_rss_kb"] for result in results),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000, help="Lookups per worker.")
+    parser.add_argument("--keys", type=int, default=500, help="Distinct keys in the workload.")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of key popularity.")
+    parser.add_argument("--payload-bytes", type=int, default=20_000)
+    parser.add_argument("--max-entries", type=int, default=1024)
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--miss-cost-ms", type=float, default=0.0, help="Simulated cost of a cache miss.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "shared_cache.sqlite3"
+        report = {
+            "parameters": {key: value for key, value in vars(args).items() if key != "json"},
+            "cpu_count": os.cpu_count(),
+            "results": [run_mode(mode, args, db_path) for mode in ("memory", "shared")],
+        }
+
+    print(f"{'mode':<8} {'hit rate':>9} {'req/s':>10} {'cache MB':>10} {'disk MB':>9} {'RSS MB':>8}")
+    for row in report["results"]:
+        print(
+            f"{row['mode']:<8} {row['hit_rate']:>9.1%} {row['throughput_rps']:>10.0f} "
+            f"{row['cache_bytes_total'] / 2**20:>10.1f} {row['db_bytes_on_disk'] / 2**20:>9.1f} "
+            f"{row['max_rss_kb_per_worker'] / 1024:>8.1f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""``app_mcp`` pointed at stand-ins run by another process, for ``uvicorn --workers``.
+
+Every uvicorn worker imports this module instead of ``app_mcp``. The process
+that started uvicorn (see ``reload_benchmark``) seeds the database and runs the
+stand-in server, and passes their location in ``MCP_BENCHMARK_WORKDIR`` and
+``MCP_BENCHMARK_STANDIN_URL``.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from .standins import FakeMySQL, install_standins
+
+_workdir = Path(os.environ["MCP_BENCHMARK_WORKDIR"])
+install_standins(
+    _workdir,
+    os.environ["MCP_BENCHMARK_STANDIN_URL"],
+    FakeMySQL(_workdir, latency_ms=float(os.getenv("MCP_BENCHMARK_DB_LATENCY_MS", "0.5")), seed=False),
+)
+
+from app_mcp import http_app  # noqa: E402  (after install_standins, which patches the services)
+
+__all__ = ["http_app"]
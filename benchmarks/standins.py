@@ -0,0 +1,345 @@
+"""Local stand-ins for the external systems the services talk to.
+
+* :class:`FakeMySQL` hands out connections to a SQLite database seeded with
+  ``customers`` and ``orders`` tables. They implement the subset of the
+  ``mysql.connector`` API used by ``mysql_service``: ``%(name)s`` placeholders,
+  dictionary cursors, ``information_schema.columns`` and the ``DATABASE()`` /
+  ``CURRENT_USER()`` functions. An optional per-statement latency models the
+  network round trip to the server.
+* :class:`StandInServer` is a local HTTP server with fixture pages of a
+  requested size under ``/pages/<size>k/<name>.html`` and a NewsAPI
+  ``/v2/everything`` endpoint with deterministic articles.
+
+:func:`install_standins` points a not yet imported ``app_mcp`` at them.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+_PAGE_PATH = re.compile(r"^/pages/(\d+)k/([\w.-]+)\.html$")
+
+TOPICS = ["solar", "storage", "battery", "grid", "wind", "hydrogen", "policy", "market"]
+_FILLER = (
+    "the of and to in a is that for it as was with be by on not he this are or his from at which but have "
+    "an had they you were their one all we can her has there been if more when will would who so no about "
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et "
+    "dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea"
+).split()
+
+
+class FakeMySQL:
+    """SQLite-backed stand-in for connections to the ``llm_playground`` database.
+
+    With ``seed=False`` it connects to a database seeded earlier in ``directory``
+    (by another process, for instance).
+    """
+
+    def __init__(self, directory: Path, *, customers: int = 5000, latency_ms: float = 0.0,
+                 database: str = "llm_playground", user: str = "llm_playground@localhost",
+                 seed: bool = True) -> None:
+        self.path = directory / "llm_playground.sqlite3"
+        self.schema_path = directory / "information_schema.sqlite3"
+        self.latency = latency_ms / 1000
+        self.database = database
+        self.user = user
+        if seed:
+            self._seed(customers)
+
+    def _seed(self, customers: int) -> None:
+        rng = random.Random(42)
+        started = datetime(2024, 1, 1)
+        with sqlite3.connect(self.path) as conn:
+            conn.executescript(
+                """
+                DROP TABLE IF EXISTS customers;
+                DROP TABLE IF EXISTS orders;
+                CREATE TABLE customers (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    balance DECIMAL(12, 2) NOT NULL,
+                    created_at DATETIME NOT NULL
+                );
+                CREATE TABLE orders (
+                    id INTEGER PRIMARY KEY,
+                    customer_id INTEGER NOT NULL REFERENCES customers(id),
+                    amount DECIMAL(12, 2) NOT NULL,
+                    status TEXT NOT NULL,
+                    ordered_at DATETIME NOT NULL
+                );
+                CREATE INDEX orders_customer ON orders(customer_id);
+                """
+            )
+            conn.executemany(
+                "INSERT INTO customers VALUES (?, ?, ?, ?, ?)",
+                (
+                    (n, f"Customer {n}", f"customer{n}@example.org", round(rng.uniform(0, 10_000), 2),
+                     (started + timedelta(minutes=n)).isoformat(sep=" "))
+                    for n in range(1, customers + 1)
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO orders VALUES (?, ?, ?, ?, ?)",
+                (
+                    (n, rng.randint(1, customers), round(rng.uniform(5, 500), 2),
+                     rng.choice(["open", "shipped", "cancelled"]),
+                     (started + timedelta(minutes=3 * n)).isoformat(sep=" "))
+                    for n in range(1, customers * 4 + 1)
+                ),
+            )
+
+        with sqlite3.connect(self.path) as conn:
+            columns = [
+                (self.database, table, column, position + 1, column_type.split("(")[0].lower(),
+                 column_type.lower(), "NO" if not_null or primary_key else "YES", "PRI" if primary_key else "")
+                for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+                for position, column, column_type, not_null, _, primary_key in conn.execute(
+                    f"PRAGMA table_info({table})"
+                )
+            ]
+        with sqlite3.connect(self.schema_path) as conn:
+            conn.executescript(
+                """
+                DROP TABLE IF EXISTS columns;
+                CREATE TABLE columns (
+                    table_schema TEXT, table_name TEXT, column_name TEXT, ordinal_position INTEGER,
+                    data_type TEXT, column_type TEXT, is_nullable TEXT, column_key TEXT
+                );
+                """
+            )
+            conn.executemany("INSERT INTO columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)", columns)
+
+    def connect(self) -> "_FakeConnection":
+        """Open a new connection, like ``mysql_service._get_connection`` does."""
+
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("ATTACH DATABASE ? AS information_schema", (str(self.schema_path),))
+        conn.create_function("DATABASE", 0, lambda: self.database, deterministic=True)
+        conn.create_function("CURRENT_USER", 0, lambda: self.user, deterministic=True)
+        return _FakeConnection(conn, self.latency)
+
+
+class _FakeConnection:
+    def __init__(self, conn: sqlite3.Connection, latency: float) -> None:
+        self._conn = conn
+        self._latency = latency
+        self.autocommit = False
+
+    def cursor(self, dictionary: bool = False) -> "_FakeCursor":
+        return _FakeCursor(self._conn.cursor(), self._latency, dictionary)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "_FakeConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+class _FakeCursor:
+    def __init__(self, cursor: sqlite3.Cursor, latency: float, dictionary: bool) -> None:
+        self._cursor = cursor
+        self._latency = latency
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def execute(self, operation: str, params: dict[str, Any] | None = None) -> None:
+        if self._latency:
+            time.sleep(self._latency)
+        self._cursor.execute(_PLACEHOLDER.sub(r":\1", operation), params or {})
+
+    def _row(self, row: sqlite3.Row | None) -> Any:
+        if row is None or not self._dictionary:
+            return tuple(row) if row is not None else None
+        return dict(row)
+
+    def fetchone(self) -> Any:
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self) -> list[Any]:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size: int = 1) -> list[Any]:
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+
+@functools.lru_cache(maxsize=None)
+def fixture_page(size_kb: int, name: str) -> bytes:
+    """Return an HTML page of roughly ``size_kb`` KiB with text, scripts and links."""
+
+    rng = random.Random(f"{size_kb}:{name}")
+    parts = [f"<html><head><title>Fixture {name}</title><script>var x = 1;</script></head><body>"]
+    size = len(parts[0])
+    paragraph = 0
+    while size < size_kb * 1024:
+        # Topic words are sparse, as in real articles, so searches match a few terms per page.
+        words = " ".join(rng.choice(TOPICS) if rng.random() < 0.02 else rng.choice(_FILLER) for _ in range(60))
+        block = (
+            f"<h2>Section {paragraph}</h2><p>{words}</p>"
+            f'<p><a href="/articles/{name}/{paragraph}">Read more about {rng.choice(TOPICS)}</a></p>'
+        )
+        parts.append(block)
+        size += len(block)
+        paragraph += 1
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def newsapi_page(query: str, page: int, page_size: int) -> dict[str, Any]:
+    """Return a deterministic ``/v2/everything`` payload for ``query``."""
+
+    total = 1000
+    first = (page - 1) * page_size
+    articles = [
+        {
+            "source": {"id": None, "name": f"Source {index % 7}"},
+            "author": f"Author {index % 13}",
+            "title": f"{query.title()} report {index}: {TOPICS[index % len(TOPICS)]} outlook",
+            "description": f"Article {index} about {query} and {TOPICS[(index + 3) % len(TOPICS)]}.",
+            "url": f"https://news.example.org/{query.replace(' ', '-')}/{index}",
+            "publishedAt": (datetime(2025, 1, 1) + timedelta(hours=index)).isoformat() + "Z",
+            "content": f"{query} " * 40,
+        }
+        for index in range(first, min(first + page_size, total))
+    ]
+    return {"status": "ok", "totalResults": total, "articles": articles}
+
+
+NewsApiResponder = Callable[[str, int, int], tuple[int, Any]]
+
+
+class StandInServer:
+    """Threaded local HTTP server for fixture pages and the NewsAPI stand-in.
+
+    ``newsapi`` replaces the ``/v2/everything`` handler: it receives the query,
+    page and page size and returns the HTTP status and the payload (sent as
+    JSON, or as-is if it is ``bytes``), so tests can inject errors and
+    duplicates.
+    """
+
+    def __init__(self, *, latency_ms: float = 0.0, newsapi: NewsApiResponder | None = None) -> None:
+        latency = latency_ms / 1000
+        respond = newsapi or (lambda query, page, page_size: (200, newsapi_page(query, page, page_size)))
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if latency:
+                    time.sleep(latency)
+                parsed = urlparse(self.path)
+                page_match = _PAGE_PATH.match(parsed.path)
+                if page_match:
+                    self._send(200, "text/html; charset=utf-8",
+                               fixture_page(int(page_match.group(1)), page_match.group(2)))
+                elif parsed.path == "/v2/everything":
+                    query = parse_qs(parsed.query)
+                    status, payload = respond(
+                        query.get("q", [""])[0],
+                        int(query.get("page", ["1"])[0]),
+                        int(query.get("pageSize", ["20"])[0]),
+                    )
+                    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                    self._send(status, "application/json", body)
+                else:
+                    self._send(404, "text/plain", b"not found")
+
+            def _send(self, status: int, content_type: str, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin-http", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_url(self, size_kb: int, name: str) -> str:
+        return f"{self.base_url}/pages/{size_kb}k/{name}.html"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.stop()
+
+
+def install_standins(workdir: Path, server: StandInServer | str, database: FakeMySQL) -> None:
+    """Redirect every external dependency of ``app_mcp`` to the stand-ins.
+
+    Must run before ``app_mcp`` is imported: the services read their settings
+    from the environment at import time and the MySQL warm-up starts as soon
+    as the app is created. All files the app writes go to ``workdir``.
+    ``server`` may also be the base URL of a stand-in server run by another process.
+    """
+
+    base_url = server if isinstance(server, str) else server.base_url
+    os.environ.update(
+        {
+            "NEWSAPI_BASE_URL": base_url,
+            "NEWSAPI_API_KEY": "benchmark",
+            "MCP_SHARED_CACHE_PATH": str(workdir / "mcp_shared_cache.sqlite3"),
+            "LOCAL_INDEX_PATH": str(workdir / "local_index.sqlite3"),
+            "MCP_TRACE_EXPORT_PATH": str(workdir / "traces.jsonl"),
+            "MCP_WARM_STATE_PATH": str(workdir / "mcp_warm_state.pickle"),
+            "NEWS_ARCHIVE_DIR": str(workdir / "news_crawler"),
+        }
+    )
+    os.environ.setdefault("MCP_TRACE_SAMPLE_RATE", "0")
+
+    from services import local_index_service, mysql_service, web_fetch_service
+
+    mysql_service._get_connection = database.connect
+    web_fetch_service.ARCHIVE_DIR = workdir / "news_crawler"
+    local_index_service.ARCHIVE_DIR = workdir / "news_crawler"
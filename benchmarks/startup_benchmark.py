@@ -0,0 +1,133 @@
+"""Measure import time and startup cost per service.
+
+Usage::
+
+    python -m benchmarks.startup_benchmark [--runs 5] [--json startup.json]
+
+Import times come from ``python -X importtime`` in fresh interpreters, so every
+run starts cold. Registration and warm-up are then timed in-process for each
+``ServiceDefinition`` of ``app_mcp``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from fastmcp import FastMCP
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TRACKED_PREFIXES = ("app_mcp", "mcp_framework", "services", "fastmcp", "mysql.connector", "httpx", "pydantic")
+_IMPORTTIME_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+_IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app_mcp; "
+    "print(round((time.perf_counter() - started) * 1000, 3))"
+)
+
+
+def _is_tracked(module: str) -> bool:
+    # Submodules are skipped (except for individual services) so numbers are not double counted.
+    return module in TRACKED_PREFIXES or module.startswith("services.")
+
+
+def measure_cold_import() -> tuple[float, dict[str, float]]:
+    """Import ``app_mcp`` in a fresh interpreter; return wall time and cumulative ms per module."""
+
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SNIPPET],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules: dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        module = match.group(2)
+        if _is_tracked(module):
+            modules[module] = int(match.group(1)) / 1000
+    wall_ms = float(completed.stdout.strip().splitlines()[-1])
+    return wall_ms, modules
+
+
+def measure_services() -> list[dict[str, Any]]:
+    """Time registration and warm-up of every service defined in ``app_mcp``."""
+
+    import app_mcp
+
+    rows = []
+    for service in app_mcp.services:
+        started = time.perf_counter()
+        service.register(FastMCP(f"bench-{service.name}"))
+        register_ms = (time.perf_counter() - started) * 1000
+
+        warmup_ms = None
+        if service.warmup is not None:
+            started = time.perf_counter()
+            service.warmup()
+            warmup_ms = (time.perf_counter() - started) * 1000
+
+        rows.append(
+            {
+                "service": service.name,
+                "register_ms": round(register_ms, 3),
+                "warmup_ms": round(warmup_ms, 3) if warmup_ms is not None else None,
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold-import runs.")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+
+    wall_times: list[float] = []
+    module_times: dict[str, list[float]] = {}
+    for _ in range(max(1, args.runs)):
+        wall_ms, modules = measure_cold_import()
+        wall_times.append(wall_ms)
+        for module, cumulative_ms in modules.items():
+            module_times.setdefault(module, []).append(cumulative_ms)
+
+    report = {
+        "runs": len(wall_times),
+        "import_app_mcp_ms": round(statistics.median(wall_times), 3),
+        "modules_ms": {
+            module: round(statistics.median(samples), 3)
+            for module, samples in sorted(module_times.items(), key=lambda item: -statistics.median(item[1]))
+        },
+        "services": measure_services(),
+    }
+
+    print(f"import app_mcp (median of {report['runs']}): {report['import_app_mcp_ms']:.1f} ms")
+    print("\ncumulative import time per module:")
+    for module, cumulative_ms in report["modules_ms"].items():
+        print(f"  {module:<40} {cumulative_ms:>9.1f} ms")
+    print("\nper service:")
+    print(f"  {'service':<20} {'register':>12} {'warmup':>12}")
+    for row in report["services"]:
+        warmup = f"{row['warmup_ms']:.1f} ms" if row["warmup_ms"] is not None else "-"
+        print(f"  {row['service']:<20} {row['register_ms']:>9.1f} ms {warmup:>12}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Time to first byte, total latency and memory of streamed tool results.
+
+Usage::
+
+    python -m benchmarks.streaming_benchmark [--rows 50000] [--repeat 5] [--memory] [--json streaming.json]
+
+``app_mcp`` is served by uvicorn on a local port (with the stand-ins from
+``benchmarks.standins``) so that responses really arrive incrementally; the
+in-process transport of the load benchmark only returns complete responses.
+
+Each mode calls the same tool in three ways: ``plain`` (no ``_meta``),
+``progress`` (a ``progressToken``) and ``stream`` (a ``progressToken`` and
+``"stream": true``, so results arrive as partial chunks). The report shows the
+median time until the first message and until the first data (a partial result
+chunk or the final result) arrived, the total time, and the bytes received.
+With ``--memory`` the peak of Python memory allocated during each call (above
+what was allocated before it) is traced as well (tracemalloc makes every call much slower).
+
+The cancellation check starts a streamed ``mysql_select``, sends
+``notifications/cancelled`` after the first chunk and reports how many more
+chunks arrived and how long the stream took to end.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import uvicorn
+
+from .harness import McpClient
+from .standins import FakeMySQL, StandInServer, install_standins
+
+MODES = {
+    "plain": None,
+    "progress": {"progressToken": "benchmark"},
+    "stream": {"progressToken": "benchmark", "stream": True},
+}
+
+SELECT_SQL = (
+    "SELECT o.id, o.amount, o.status, o.ordered_at, c.name, c.email, c.balance FROM orders AS o "
+    "JOIN customers AS c ON c.id = o.customer_id ORDER BY o.id LIMIT %(rows)s"
+)
+
+
+class _BackgroundServer(uvicorn.Server):
+    """uvicorn server running in a daemon thread on a free local port."""
+
+    def install_signal_handlers(self) -> None:
+        pass
+
+    def __enter__(self) -> str:
+        self._thread = threading.Thread(target=self.run, name="benchmark-uvicorn", daemon=True)
+        self._thread.start()
+        while not self.started:
+            time.sleep(0.01)
+        host, port = self.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/mcp"
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def _is_data(message: dict[str, Any]) -> bool:
+    return "result" in message or "error" in message or message.get("method") == "notifications/message"
+
+
+async def measure_call(
+    client: McpClient, tool: str, arguments: dict[str, Any], meta: dict[str, Any] | None, trace_memory: bool
+) -> dict[str, Any]:
+    first_message = first_data = None
+    counts = {"progress": 0, "chunks": 0}
+    baseline = 0
+    if trace_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    before = client.bytes_received
+    elapsed_ms = 0.0
+    async for elapsed_ms, message in client.stream_tool(tool, arguments, meta=meta):
+        if first_message is None:
+            first_message = elapsed_ms
+        if first_data is None and _is_data(message):
+            first_data = elapsed_ms
+        if message.get("method") == "notifications/progress":
+            counts["progress"] += 1
+        elif message.get("method") == "notifications/message":
+            counts["chunks"] += 1
+        elif "error" in message or message.get("result", {}).get("isError"):
+            raise RuntimeError(f"{tool} failed: {json.dumps(message)[:300]}")
+    row = {
+        "first_message_ms": first_message,
+        "first_data_ms": first_data,
+        "total_ms": elapsed_ms,
+        "bytes": client.bytes_received - before,
+        **counts,
+    }
+    if trace_memory:
+        row["peak_memory_mb"] = (tracemalloc.get_traced_memory()[1] - baseline) / 2**20
+    return row
+
+
+async def measure_cancellation(client: McpClient, rows: int) -> dict[str, Any]:
+    request_id = client.next_request_id()
+    cancelled_at = None
+    chunks_after_cancel = 0
+    outcome = "completed"
+    elapsed_ms = 0.0
+    async for elapsed_ms, message in client.stream_tool(
+        "mysql_select", {"sql": SELECT_SQL, "params": {"rows": rows}}, request_id=request_id, meta=MODES["stream"]
+    ):
+        if message.get("method") == "notifications/message":
+            if cancelled_at is None:
+                cancelled_at = elapsed_ms
+                await client.cancel(request_id)
+            else:
+                chunks_after_cancel += 1
+        elif "error" in message:
+            outcome = message["error"].get("message", "error")
+    return {
+        "cancelled_at_ms": cancelled_at,
+        "stream_end_after_cancel_ms": None if cancelled_at is None else round(elapsed_ms - cancelled_at, 3),
+        "chunks_after_cancel": chunks_after_cancel,
+        "outcome": outcome,
+    }
+
+
+def _median(rows: list[dict[str, Any]], key: str) -> float | None:
+    values = [row[key] for row in rows if row.get(key) is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+async def run_benchmark(args: argparse.Namespace, server: StandInServer, url: str) -> dict[str, Any]:
+    # Distinct arguments per call so that cached tools are measured on the miss path.
+    tools = {
+        "mysql_select": lambda n: {"sql": SELECT_SQL, "params": {"rows": args.rows}},
+        "fetch_plain_text": lambda n: {"url": server.page_url(1024, f"streaming-{n}")},
+        "search_news": lambda n: {"query": f"energy storage {n}", "max_articles": 500},
+    }
+    calls_made = itertools.count()
+    report: dict[str, Any] = {"modes": []}
+    async with McpClient.remote(url, timeout=120) as client:
+        for tool, arguments in tools.items():
+            if args.tools and tool not in args.tools:
+                continue
+            for mode, meta in MODES.items():
+                calls = [
+                    await measure_call(client, tool, arguments(next(calls_made)), meta, args.memory)
+                    for _ in range(args.repeat)
+                ]
+                summary = {"tool": tool, "mode": mode}
+                for key in ("first_message_ms", "first_data_ms", "total_ms", "bytes", "progress", "chunks"):
+                    summary[key] = _median(calls, key)
+                if args.memory:
+                    summary["peak_memory_mb"] = _median(calls, "peak_memory_mb")
+                report["modes"].append(summary)
+        if not args.tools or "mysql_select" in args.tools:
+            report["cancellation"] = await measure_cancellation(client, args.rows)
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows returned by mysql_select.")
+    parser.add_argument("--repeat", type=int, default=5, help="Calls per tool and mode (median reported).")
+    parser.add_argument("--tools", type=lambda value: set(value.split(",")), help="Comma-separated tools.")
+    parser.add_argument("--web-latency-ms", type=float, default=50.0, help="Simulated web/NewsAPI latency.")
+    parser.add_argument("--memory", action="store_true", help="Trace peak memory per call (slow).")
+    parser.add_argument("--json", type=Path, help="Write the report to this file.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(latency_ms=args.web_latency_ms) as server:
+        workdir = Path(tmp)
+        install_standins(workdir, server, FakeMySQL(workdir, customers=max(5000, args.rows // 4 + 1)))
+        from app_mcp import http_app  # after install_standins, which patches the services
+
+        config = uvicorn.Config(http_app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+        if args.memory:
+            tracemalloc.start()
+        with _BackgroundServer(config) as url:
+            report = asyncio.run(run_benchmark(args, server, url))
+
+    print(f"{'tool':<18} {'mode':<9} {'first msg':>10} {'first data':>11} {'total':>10} {'received':>10}", end="")
+    print(f" {'peak mem':>9}" if args.memory else "")
+    for row in report["modes"]:
+        print(
+            f"{row['tool']:<18} {row['mode']:<9} {row['first_message_ms']:>8.1f}ms {row['first_data_ms']:>9.1f}ms "
+            f"{row['total_ms']:>8.1f}ms {row['bytes'] / 1024:>7.0f}KiB",
+            end="",
+        )
+        print(f" {row['peak_memory_mb']:>6.1f}MiB" if args.memory else "")
+    if "cancellation" in report:
+        cancellation = report["cancellation"]
+        print(
+            f"\ncancel after first chunk: {cancellation['chunks_after_cancel']} more chunks, stream ended "
+            f"{cancellation['stream_end_after_cancel_ms']} ms later ({cancellation['outcome']})"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
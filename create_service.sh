@@ -37,7 +37,12 @@ After=network.target
 #Group=www-data
 WorkingDirectory=/home/${current_dir}/
 Environment="PATH=/home/${current_dir}/tenv/bin"
-ExecStart=/home/${current_dir}/.venv/bin/uvicorn app:app --host 127.0.0.1 --port ${port} --workers 4
+ExecStart=/home/${current_dir}/.venv/bin/uvicorn app:app --host 127.0.0.1 --port ${port} --workers 4 --timeout-graceful-shutdown 30 --timeout-worker-healthcheck 60
+# SIGHUP makes uvicorn replace its workers one by one without dropping requests.
+ExecReload=/bin/kill -HUP \$MAINPID
+# Stop only signals uvicorn, which drains and stops its workers itself.
+KillMode=mixed
+TimeoutStopSec=45
 
 [Install]
 WantedBy=multi-user.target
@@ -82,8 +87,10 @@ if [ -f "pull.txt" ] || [ "\$FORCE" = true ]; then
     # Pull latest changes
     /usr/bin/git pull
 
-    # Restart Flask service
-    /usr/bin/systemctl restart flask_app${new_number}
+    # Reload the service: uvicorn starts a new worker, waits until it is warm,
+    # then lets an old one finish its requests and exit, one worker at a time.
+    # Units created before ExecReload existed are restarted instead.
+    /usr/bin/systemctl reload-or-restart flask_app${new_number}
 
     # Optional: uncomment to check status
     # /usr/bin/systemctl status flask_app${new_number}
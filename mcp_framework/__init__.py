@@ -0,0 +1,47 @@
+"""Utilities for composing FastMCP servers from reusable services."""
+
+from .admission import AdmissionPolicy, ServiceOverloaded
+from .cache import (
+    CacheBackend,
+    CachePolicy,
+    MemoryCacheBackend,
+    cache_stats,
+    invalidate_cache,
+    register_cache_backend,
+)
+from .interaction_log import log_interaction, logger
+from .process_pool import ProcessPolicy
+from .serialization import JSON_ENCODERS, json_default
+from .server import ServiceDefinition, attach_request_logger, create_mcp_server, warm_up_services
+from .shared_cache import SQLiteCacheBackend
+from .streaming import ToolStream, current_stream
+from .tracing import Trace, current_trace, span
+from .warm_state import restore_warm_state, save_warm_state
+
+__all__ = [
+    "AdmissionPolicy",
+    "CacheBackend",
+    "CachePolicy",
+    "JSON_ENCODERS",
+    "MemoryCacheBackend",
+    "ProcessPolicy",
+    "SQLiteCacheBackend",
+    "ServiceDefinition",
+    "ServiceOverloaded",
+    "ToolStream",
+    "Trace",
+    "attach_request_logger",
+    "cache_stats",
+    "create_mcp_server",
+    "current_stream",
+    "current_trace",
+    "invalidate_cache",
+    "json_default",
+    "log_interaction",
+    "logger",
+    "register_cache_backend",
+    "restore_warm_state",
+    "save_warm_state",
+    "span",
+    "warm_up_services",
+]
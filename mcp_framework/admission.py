@@ -0,0 +1,359 @@
+"""Per-service admission control and load shedding for tool calls.
+
+Each service can declare an :class:`AdmissionPolicy` that limits how many of
+its tool calls run at once and how many may wait for a slot. Controlled
+services also draw from a worker-wide pool of slots; ``reserved`` slots are
+carved out of that pool for the exclusive use of one service, so cheap tools
+keep capacity while slow backends are saturated.
+
+Admission happens in an ASGI middleware, before the request reaches the MCP
+server: a rejected ``tools/call`` is answered immediately with HTTP 503, a
+``Retry-After`` header and a JSON-RPC error whose ``data.retryable`` is true.
+Requests are rejected when the service's queue is full, when the expected wait
+(queue length times the observed call duration, divided by the concurrency)
+exceeds ``max_wait``, or when a queued request does not get a slot within
+``max_wait`` seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .interaction_log import log_interaction
+from .tracing import span
+
+OVERLOADED_ERROR_CODE = -32003
+
+# Weight of the latest call when updating the moving average of call durations.
+_DURATION_SMOOTHING = 0.2
+
+
+@dataclass
+class AdmissionPolicy:
+    """Concurrency limit and bounded wait queue for the tools of one service.
+
+    ``max_wait`` is the deadline in seconds for getting a slot (``None`` waits
+    as long as needed); ``retry_after`` is the minimum delay suggested to
+    rejected clients. With ``offload`` the service's synchronous tools run in
+    worker threads so that blocking calls do not stall the event loop; cheap
+    tools are faster without it.
+    """
+
+    max_concurrency: int
+    max_queue: int = 0
+    max_wait: float | None = None
+    reserved: int = 0
+    retry_after: float = 1.0
+    offload: bool = True
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if not 0 <= self.reserved <= self.max_concurrency:
+            raise ValueError("reserved must be between 0 and max_concurrency.")
+
+
+class ServiceOverloaded(Exception):
+    """Raised when a tool call is shed instead of admitted."""
+
+    def __init__(self, service: str, reason: str, retry_after: float) -> None:
+        super().__init__(f"Service '{service}' is overloaded ({reason}); retry later.")
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    enqueued_at: float
+
+
+@dataclass
+class _ServiceState:
+    policy: AdmissionPolicy
+    active: int = 0
+    reserved_in_use: int = 0
+    avg_duration: float | None = None
+    waiters: deque[_Waiter] = field(default_factory=deque)
+    admitted: int = 0
+    rejected: int = 0
+
+
+@dataclass
+class _Slot:
+    service: str
+    reserved: bool
+    started_at: float
+
+
+class AdmissionController:
+    """Track slots per service and in the shared pool of one worker."""
+
+    def __init__(self, policies: dict[str, AdmissionPolicy], capacity: int | None = None) -> None:
+        reserved_total = sum(policy.reserved for policy in policies.values())
+        if capacity is not None and capacity < reserved_total:
+            raise ValueError(f"Capacity {capacity} is smaller than the {reserved_total} reserved slots.")
+
+        self._services = {name: _ServiceState(policy) for name, policy in policies.items()}
+        self._shared_capacity = capacity - reserved_total if capacity is not None else None
+        self._shared_in_use = 0
+
+    def controls(self, service: str) -> bool:
+        return service in self._services
+
+    def _free_slot_kind(self, state: _ServiceState) -> bool | None:
+        """Return which kind of slot the service can take now, or ``None`` if none is free."""
+
+        if state.active >= state.policy.max_concurrency:
+            return None
+        if state.reserved_in_use < state.policy.reserved:
+            return True
+        if self._shared_capacity is None or self._shared_in_use < self._shared_capacity:
+            return False
+        return None
+
+    def _occupy(self, service: str, state: _ServiceState, reserved: bool) -> _Slot:
+        state.active += 1
+        state.admitted += 1
+        if reserved:
+            state.reserved_in_use += 1
+        else:
+            self._shared_in_use += 1
+        return _Slot(service, reserved, time.monotonic())
+
+    def _expected_wait(self, state: _ServiceState) -> float:
+        if state.avg_duration is None:
+            return 0.0
+        return (len(state.waiters) + 1) * state.avg_duration / state.policy.max_concurrency
+
+    def _reject(self, service: str, state: _ServiceState, reason: str, expected_wait: float) -> ServiceOverloaded:
+        state.rejected += 1
+        retry_after = max(state.policy.retry_after, expected_wait)
+        log_interaction(
+            "admission_rejected",
+            {"service": service, "reason": reason},
+            {"active": state.active, "queued": len(state.waiters), "retry_after": round(retry_after, 3)},
+        )
+        return ServiceOverloaded(service, reason, retry_after)
+
+    async def acquire(self, service: str) -> _Slot:
+        """Wait for a slot of ``service`` or raise :class:`ServiceOverloaded`."""
+
+        state = self._services[service]
+        policy = state.policy
+
+        if not state.waiters:
+            reserved = self._free_slot_kind(state)
+            if reserved is not None:
+                return self._occupy(service, state, reserved)
+
+        expected_wait = self._expected_wait(state)
+        if len(state.waiters) >= policy.max_queue:
+            raise self._reject(service, state, "queue_full", expected_wait)
+        if policy.max_wait is not None and expected_wait > policy.max_wait:
+            raise self._reject(service, state, "deadline", expected_wait)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), time.monotonic())
+        state.waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=policy.max_wait)
+        except BaseException as exc:
+            if waiter in state.waiters:
+                state.waiters.remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as the wait ended; hand it back.
+                self.release(waiter.future.result(), record_duration=False)
+            else:
+                waiter.future.cancel()
+            if isinstance(exc, asyncio.TimeoutError):
+                raise self._reject(service, state, "timeout", expected_wait) from None
+            raise
+
+    def release(self, slot: _Slot, *, record_duration: bool = True) -> None:
+        state = self._services[slot.service]
+        state.active -= 1
+        if slot.reserved:
+            state.reserved_in_use -= 1
+        else:
+            self._shared_in_use -= 1
+
+        if record_duration:
+            duration = time.monotonic() - slot.started_at
+            if state.avg_duration is None:
+                state.avg_duration = duration
+            else:
+                state.avg_duration += _DURATION_SMOOTHING * (duration - state.avg_duration)
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # Hand free slots to the longest-waiting requests first, across services.
+        while True:
+            candidates = [
+                (state.waiters[0].enqueued_at, name, state)
+                for name, state in self._services.items()
+                if state.waiters and self._free_slot_kind(state) is not None
+            ]
+            if not candidates:
+                return
+            _, name, state = min(candidates, key=lambda candidate: candidate[0])
+            waiter = state.waiters.popleft()
+            if waiter.future.done():
+                continue
+            waiter.future.set_result(self._occupy(name, state, self._free_slot_kind(state)))
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {
+                "active": state.active,
+                "queued": len(state.waiters),
+                "admitted": state.admitted,
+                "rejected": state.rejected,
+                "avg_duration_ms": round(state.avg_duration * 1000, 3) if state.avg_duration else None,
+            }
+            for name, state in self._services.items()
+        }
+
+
+def _overloaded_response(request_id: Any, exc: ServiceOverloaded) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+    body = json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": OVERLOADED_ERROR_CODE,
+                "message": str(exc),
+                "data": {
+                    "retryable": True,
+                    "retry_after": round(exc.retry_after, 3),
+                    "service": exc.service,
+                    "reason": exc.reason,
+                },
+            },
+        }
+    ).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("ascii")),
+        (b"retry-after", str(max(1, math.ceil(exc.retry_after))).encode("ascii")),
+    ]
+    return 503, headers, body
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits or sheds MCP ``tools/call`` requests per service.
+
+    The slot of an admitted call is held until the response has been sent
+    completely, which covers both JSON and streamed (SSE) responses. Services
+    hosted in a process pool (``pools``) also need a place in their pool; it is
+    reserved here and handed to the tool on ``request.state.mcp_pool_admission``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController | None,
+        tool_services: dict[str, str],
+        pools: dict[str, Any] | None = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.tool_services = tool_services
+        self.pools = pools or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        body, receive = await _buffer_body(receive)
+        request_id, service = self._classify(body)
+        if service is None:
+            await self.app(scope, receive, send)
+            return
+
+        slot = pool_admission = None
+        try:
+            if self.controller is not None and self.controller.controls(service):
+                with span("admission_wait", service=service):
+                    slot = await self.controller.acquire(service)
+            if service in self.pools:
+                pool_admission = self.pools[service].admit()
+        except ServiceOverloaded as exc:
+            if slot is not None:
+                self.controller.release(slot, record_duration=False)
+            status, headers, payload = _overloaded_response(request_id, exc)
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": payload})
+            return
+        if pool_admission is not None:
+            scope.setdefault("state", {})["mcp_pool_admission"] = pool_admission
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                if slot is not None:
+                    self.controller.release(slot)
+                if pool_admission is not None:
+                    # Only still open when the call never reached the pool (e.g. a cache hit).
+                    pool_admission.release()
+
+        async def send_and_release(message: Message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
+
+    def _classify(self, body: bytes) -> tuple[Any, str | None]:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None, None
+        if not isinstance(payload, dict) or payload.get("method") != "tools/call":
+            return None, None
+        params = payload.get("params")
+        tool_name = params.get("name") if isinstance(params, dict) else None
+        service = self.tool_services.get(tool_name) if isinstance(tool_name, str) else None
+        if service is None:
+            return None, None
+        if not (self.controller is not None and self.controller.controls(service)) and service not in self.pools:
+            return None, None
+        return payload.get("id"), service
+
+
+async def _buffer_body(receive: Receive) -> tuple[bytes, Receive]:
+    """Read the whole request body and return it with a ``receive`` that replays it."""
+
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay() -> Message:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
@@ -0,0 +1,506 @@
+"""Per-tool result caching with pluggable storage backends.
+
+A :class:`CachePolicy` describes how the results of one tool are cached: how
+arguments are normalized into a key, how long entries live and how the cache
+is bounded. Policies are attached to a ``ServiceDefinition`` and applied by
+``create_mcp_server``; the services themselves stay unaware of caching.
+
+Storage is delegated to a :class:`CacheBackend` looked up by name, so the same
+policy can run against process-local memory (``"memory"``) or any backend
+registered through :func:`register_cache_backend`. Memory caches can be
+carried across restarts with snapshots (see ``warm_state``).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import sysconfig
+import threading
+import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import anyio
+
+from .interaction_log import log_interaction
+from .streaming import current_stream
+
+EVICTION_POLICIES = {"lru", "lfu"}
+# Optional version of everything else a deploy can change (e.g. installed
+# packages); setting a new value invalidates every cache snapshot.
+DEPLOY_VERSION = os.getenv("MCP_DEPLOY_VERSION")
+
+
+@dataclass
+class CachePolicy:
+    """Describe how the results of a single tool are cached.
+
+    ``key`` receives the tool arguments (defaults applied) as a dict and returns
+    the JSON-serializable value that identifies equivalent calls; by default all
+    arguments are used as-is. ``ttl`` is in seconds (``None`` never expires) and
+    ``max_bytes`` bounds the pickled size of all entries. ``cacheable`` receives
+    each result and returns ``False`` for results that must not be stored, such
+    as fallbacks served while the real source is unavailable.
+    """
+
+    ttl: float | None = 300.0
+    max_entries: int | None = 1024
+    max_bytes: int | None = None
+    eviction: str = "lru"
+    key: Callable[[dict[str, Any]], Any] | None = None
+    cacheable: Callable[[Any], bool] | None = None
+    backend: str | Callable[[str, "CachePolicy"], "CacheBackend"] = "memory"
+
+    def __post_init__(self) -> None:
+        if self.eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Eviction must be one of: {', '.join(sorted(EVICTION_POLICIES))}")
+
+
+class CacheBackend:
+    """Storage interface used by tool caches.
+
+    ``get`` returns ``(True, value)`` on a hit and ``(False, None)`` otherwise so
+    that ``None`` results can be cached. Backends enforce the bounds of the
+    policy they were created for and report their own eviction counters.
+
+    Backends that may block (on disk, locks or the network) keep ``blocking``
+    set; async tools then reach them from worker threads so that a slow store
+    does not stall the event loop.
+    """
+
+    blocking = True
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict[str, int]:
+        raise NotImplementedError
+
+    def dump(self) -> list[tuple[str, Any, float | None, int]] | None:
+        """Return the entries to keep across restarts as ``(key, value, seconds left, hits)``.
+
+        ``None`` (the default) means the backend persists its entries itself and
+        does not take part in warm-state snapshots.
+        """
+
+        return None
+
+    def load(self, entries: list[tuple[str, Any, float | None, int]]) -> int:
+        """Add entries from :meth:`dump` that are not cached yet and return how many were added."""
+
+        return 0
+
+
+@dataclass
+class _MemoryEntry:
+    value: Any
+    expires_at: float | None
+    size: int
+    hits: int = 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local cache with TTL, entry/byte bounds and LRU or LFU eviction."""
+
+    blocking = False
+
+    def __init__(self, policy: CachePolicy) -> None:
+        self._policy = policy
+        self._entries: OrderedDict[str, _MemoryEntry] = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                return False, None
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            return True, entry.value
+
+    def set(self, key: str, value: Any) -> None:
+        size = _pickled_size(value) if self._policy.max_bytes is not None else 0
+        if self._policy.max_bytes is not None and size > self._policy.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self._policy.ttl if self._policy.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _MemoryEntry(value, expires_at, size)
+            self._bytes += size
+            self._enforce_bounds(protected=key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def dump(self) -> list[tuple[str, Any, float | None, int]]:
+        now = time.monotonic()
+        with self._lock:
+            # Least recently used first, so loading the entries in order keeps their recency.
+            return [
+                (key, entry.value, None if entry.expires_at is None else entry.expires_at - now, entry.hits)
+                for key, entry in self._entries.items()
+                if entry.expires_at is None or entry.expires_at > now
+            ]
+
+    def load(self, entries: list[tuple[str, Any, float | None, int]]) -> int:
+        loaded = 0
+        now = time.monotonic()
+        for key, value, ttl, hits in entries:
+            # The policy may have been shortened since the entries were dumped.
+            if self._policy.ttl is not None:
+                ttl = self._policy.ttl if ttl is None else min(ttl, self._policy.ttl)
+            if ttl is not None and ttl <= 0:
+                continue
+            size = _pickled_size(value) if self._policy.max_bytes is not None else 0
+            if self._policy.max_bytes is not None and size > self._policy.max_bytes:
+                continue
+            with self._lock:
+                if key in self._entries:
+                    continue
+                self._entries[key] = _MemoryEntry(value, None if ttl is None else now + ttl, size, hits)
+                self._bytes += size
+                self._enforce_bounds(protected=key)
+            loaded += 1
+        return loaded
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _over_bounds(self) -> bool:
+        max_entries, max_bytes = self._policy.max_entries, self._policy.max_bytes
+        return (max_entries is not None and len(self._entries) > max_entries) or (
+            max_bytes is not None and self._bytes > max_bytes
+        )
+
+    def _enforce_bounds(self, protected: str) -> None:
+        while self._over_bounds() and len(self._entries) > 1:
+            self._remove(self._victim(protected))
+            self._evictions += 1
+
+    def _victim(self, protected: str) -> str:
+        # Entries are kept in recency order, so the first key is the LRU victim and
+        # ties between equally frequent entries are broken by recency for LFU.
+        if self._policy.eviction == "lru":
+            return next(key for key in self._entries if key != protected)
+        return min(
+            (key for key in self._entries if key != protected),
+            key=lambda key: self._entries[key].hits,
+        )
+
+
+def _pickled_size(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return len(repr(value).encode("utf-8"))
+
+
+_BACKENDS: dict[str, Callable[[str, CachePolicy], CacheBackend]] = {
+    "memory": lambda namespace, policy: MemoryCacheBackend(policy),
+}
+
+
+def register_cache_backend(name: str, factory: Callable[[str, CachePolicy], CacheBackend]) -> None:
+    """Make a backend available to policies under ``name``.
+
+    ``factory`` is called once per cached tool with the tool name (to be used as
+    a namespace by shared stores) and its policy.
+    """
+
+    _BACKENDS[name] = factory
+
+
+def _create_backend(namespace: str, policy: CachePolicy) -> CacheBackend:
+    if callable(policy.backend):
+        return policy.backend(namespace, policy)
+    try:
+        factory = _BACKENDS[policy.backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache backend '{policy.backend}'. Registered: {', '.join(sorted(_BACKENDS))}"
+        ) from None
+    return factory(namespace, policy)
+
+
+def _library_paths() -> tuple[str, ...]:
+    paths = sysconfig.get_paths()
+    return tuple(
+        os.path.join(os.path.abspath(paths[name]), "")
+        for name in ("stdlib", "platstdlib", "purelib", "platlib")
+        if name in paths
+    )
+
+
+def _is_application_module(module: types.ModuleType, library_paths: tuple[str, ...]) -> bool:
+    """Whether ``module`` is application code that can change a tool's results.
+
+    The standard library and installed packages change with the environment
+    rather than with deploys, and the framework does not compute results.
+    """
+
+    path = getattr(module, "__file__", None)
+    if not path or not path.endswith(".py") or module.__name__.partition(".")[0] == __package__:
+        return False
+    path = os.path.abspath(path)
+    return not path.startswith(library_paths) and "site-packages" not in path
+
+
+def _source_dependencies(fn: Callable[..., Any]) -> list[str] | None:
+    """Return the application source files ``fn`` can reach through module globals and closures.
+
+    Starting from the module defining ``fn``, every module a global or closure
+    value comes from is followed, so helpers imported from other files (such
+    as ``iban_utils`` for ``iban_check``) are included.
+    """
+
+    fn = inspect.unwrap(fn)
+    module = inspect.getmodule(fn)
+    if module is None or not getattr(module, "__file__", None):
+        return None
+    library_paths = _library_paths()
+    pending = [module]
+    for cell in getattr(fn, "__closure__", None) or ():
+        try:
+            pending.append(inspect.getmodule(cell.cell_contents))
+        except ValueError:  # empty cell
+            continue
+    seen: dict[str, types.ModuleType] = {}
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in seen or not _is_application_module(module, library_paths):
+            continue
+        seen[module.__name__] = module
+        for value in list(vars(module).values()):
+            if isinstance(value, types.ModuleType):
+                pending.append(value)
+            else:
+                name = getattr(value, "__module__", None)
+                if isinstance(name, str):
+                    pending.append(sys.modules.get(name))
+    return sorted(os.path.abspath(module.__file__) for module in seen.values())
+
+
+def _source_fingerprint(fn: Callable[..., Any]) -> str | None:
+    """Hash the sources ``fn`` depends on and ``MCP_DEPLOY_VERSION``, or ``None`` if they cannot be read.
+
+    Only changes to the tool's own module and the application modules it uses
+    invalidate its entries, so snapshots carry the other tools across deploys.
+    """
+
+    try:
+        sources = _source_dependencies(fn)
+        if not sources:
+            return None
+        digest = hashlib.sha256((DEPLOY_VERSION or "").encode("utf-8"))
+        for source in sources:
+            with open(source, "rb") as handle:
+                digest.update(source.encode("utf-8") + b"\x00" + hashlib.sha256(handle.read()).digest())
+    except (OSError, TypeError):
+        return None
+    return digest.hexdigest()[:16]
+
+
+class ToolCache:
+    """Cache the results of one tool according to its policy and count hits and misses."""
+
+    def __init__(self, tool_name: str, policy: CachePolicy, fn: Callable[..., Any]) -> None:
+        self.tool_name = tool_name
+        self.policy = policy
+        self.backend = _create_backend(tool_name, policy)
+        self.fingerprint = _source_fingerprint(fn)
+        if self.fingerprint is None and policy.backend == "memory":
+            log_interaction("cache_fingerprint_unknown", {"tool": tool_name}, {"warm_state": "disabled"})
+        self._signature = inspect.signature(fn)
+        self._counters = {"hits": 0, "misses": 0, "bypassed": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def arguments(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Return the call's arguments by parameter name, with defaults applied."""
+
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def key_for(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> str | None:
+        """Return the cache key for a call, or ``None`` if the call cannot be cached."""
+
+        try:
+            arguments = self.arguments(args, kwargs)
+            normalized = self.policy.key(arguments) if self.policy.key else arguments
+            serialized = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+        except Exception:
+            # Invalid arguments or a normalizer failure: let the tool report the problem.
+            self._count("bypassed")
+            return None
+        if len(serialized) > 200:
+            serialized = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        return f"{self.tool_name}:{serialized}"
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        try:
+            hit, value = self.backend.get(key)
+        except Exception as exc:
+            self._backend_error("get", exc)
+            return False, None
+        self._count("hits" if hit else "misses")
+        return hit, value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.backend.set(key, value)
+        except Exception as exc:
+            self._backend_error("set", exc)
+
+    def clear(self) -> None:
+        try:
+            self.backend.clear()
+        except Exception as exc:
+            self._backend_error("clear", exc)
+
+    def _backend_error(self, operation: str, exc: Exception) -> None:
+        self._count("errors")
+        log_interaction(
+            "cache_backend_error",
+            {"tool": self.tool_name, "operation": operation},
+            {"error": str(exc), "type": exc.__class__.__name__},
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counters: dict[str, Any] = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        try:
+            counters.update(self.backend.stats())
+        except Exception as exc:  # pragma: no cover - stats must not fail
+            counters["backend_error"] = str(exc)
+        return counters
+
+
+_TOOL_CACHES: dict[str, ToolCache] = {}
+
+
+def wrap_with_cache(tool_name: str, policy: CachePolicy, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Return ``fn`` wrapped so results are served from and stored in the tool's cache.
+
+    Exceptions, results rejected by ``policy.cacheable`` and results whose parts
+    were streamed to the client are never cached, and any backend failure falls
+    back to calling the tool directly. Blocking backends are reached from
+    worker threads, which makes the wrapper async even for synchronous tools.
+    """
+
+    cache = ToolCache(tool_name, policy, fn)
+    _TOOL_CACHES[tool_name] = cache
+
+    def _log_hit(key: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        # The tool does not run on a hit, so this entry is the only record of the call.
+        log_interaction(
+            "cache_hit", {"tool": tool_name, "key": key, "arguments": cache.arguments(args, kwargs)}, {}
+        )
+
+    def _should_store(result: Any) -> bool:
+        # Parts already streamed to the client are missing from the result.
+        if current_stream().chunks_sent:
+            return False
+        return policy.cacheable is None or policy.cacheable(result)
+
+    if inspect.iscoroutinefunction(fn) or cache.backend.blocking:
+
+        async def _offloaded(operation: Callable[..., Any], *args: Any) -> Any:
+            if cache.backend.blocking:
+                return await anyio.to_thread.run_sync(operation, *args)
+            return operation(*args)
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = cache.key_for(args, kwargs)
+            if key is not None:
+                hit, value = await _offloaded(cache.get, key)
+                if hit:
+                    _log_hit(key, args, kwargs)
+                    return value
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            if key is not None and _should_store(result):
+                await _offloaded(cache.set, key, result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        key = cache.key_for(args, kwargs)
+        if key is not None:
+            hit, value = cache.get(key)
+            if hit:
+                _log_hit(key, args, kwargs)
+                return value
+        result = fn(*args, **kwargs)
+        if key is not None and _should_store(result):
+            cache.set(key, result)
+        return result
+
+    return wrapper
+
+
+def invalidate_cache(tool_name: str) -> None:
+    """Drop all cached results of ``tool_name``; does nothing if the tool is not cached.
+
+    With a blocking backend this waits for the store, so call it from a worker
+    thread (as offloaded tools do) or through :func:`anyio.to_thread.run_sync`.
+    """
+
+    cache = _TOOL_CACHES.get(tool_name)
+    if cache is not None:
+        cache.clear()
+
+
+def tool_caches() -> dict[str, ToolCache]:
+    """Return the caches of all cached tools by tool name."""
+
+    return dict(_TOOL_CACHES)
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Return hit/miss/eviction counters for every cached tool."""
+
+    return {name: cache.stats() for name, cache in _TOOL_CACHES.items()}
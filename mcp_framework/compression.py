@@ -0,0 +1,193 @@
+"""Negotiated gzip/brotli compression of large HTTP responses.
+
+Tool results such as fetched pages, database rows or article lists are sent
+twice per response (as structured content and as its JSON text) and compress
+very well. :class:`CompressionMiddleware` compresses complete response bodies
+of at least ``minimum_size`` bytes with the best encoding the client accepts:
+brotli when the ``brotli`` package is installed, otherwise gzip.
+
+Event streams (the SSE responses of ``json_response=False``) are held back
+until they reach ``minimum_size`` or end, so the short streams of cheap tools
+are sent as-is; from then on they are compressed as they are written, with a
+flush after every message. A stream that carries notifications (progress or
+partial results) is compressed from its first notification instead, so those
+still reach the client immediately. Other streamed responses are passed
+through untouched.
+"""
+from __future__ import annotations
+
+import functools
+import gzip
+import zlib
+from typing import Callable
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .tracing import span
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional accelerator
+    brotli = None
+
+# Fast settings: responses are compressed on the request path.
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+# Bodies of this size and above are compressed in a worker thread (zlib and
+# brotli release the GIL) so they do not stall the event loop.
+THREAD_OFFLOAD_SIZE = 128 * 1024
+
+
+async def _run(compress: Callable[[bytes], bytes], body: bytes) -> bytes:
+    if len(body) >= THREAD_OFFLOAD_SIZE:
+        return await anyio.to_thread.run_sync(compress, body)
+    return compress(body)
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor whose output can be decoded up to every flush."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: gzip container.
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        self._brotli = encoding == "br"
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli:
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish() if self._brotli else self._compressor.flush()
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick ``"br"`` or ``"gzip"`` from an ``Accept-Encoding`` header, or ``None``.
+
+    The encoding with the highest q-value wins; brotli is preferred on ties.
+    """
+
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        parameters = parameters.strip().lower()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+    # max() keeps the first of equally good encodings.
+    best = max(encodings, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)))
+    return best if accepted.get(best, accepted.get("*", 0.0)) > 0 else None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing event streams and complete response bodies above a size threshold."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+        stream: _StreamCompressor | None = None
+        # Start of an event stream and its first events while below minimum_size.
+        pending_events: list[bytes] | None = None
+
+        async def start_stream(body: bytes) -> None:
+            nonlocal stream
+            stream = _StreamCompressor(encoding)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["content-encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": await _run(stream.compress, body), "more_body": True})
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough, pending_events
+            if passthrough:
+                await send(message)
+                return
+            if pending_events is not None and message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                pending_events.append(body)
+                buffered = b"".join(pending_events)
+                if not message.get("more_body", False):
+                    pending_events = None
+                    if len(buffered) < self.minimum_size:
+                        passthrough = True
+                        await send(start_message)
+                        await send({"type": "http.response.body", "body": buffered})
+                        return
+                    await start_stream(buffered)
+                    await send({"type": "http.response.body", "body": stream.finish(), "more_body": False})
+                # Progress and partial results must not wait for the threshold.
+                elif len(buffered) >= self.minimum_size or b'"method":"notifications/' in body:
+                    pending_events = None
+                    await start_stream(buffered)
+                return
+            if stream is not None:
+                if message["type"] == "http.response.body":
+                    more_body = message.get("more_body", False)
+                    body = await _run(stream.compress, message.get("body", b""))
+                    if not more_body:
+                        body += stream.finish()
+                    message = {"type": "http.response.body", "body": body, "more_body": more_body}
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                    if headers.get("content-type", "").startswith("text/event-stream"):
+                        if "content-length" in headers:
+                            del MutableHeaders(raw=message["headers"])["content-length"]
+                        pending_events = []
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: send as-is.
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            with span("compress", encoding=encoding, bytes_in=len(body)) as attributes:
+                compressed = await _run(functools.partial(_compress, encoding), body)
+                attributes["bytes_out"] = len(compressed)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,99 @@
+"""Let tool calls in progress finish when uvicorn stops a worker.
+
+On SIGTERM (``systemctl stop``, or an old worker being retired after a SIGHUP
+reload) uvicorn stops accepting connections and waits up to
+``--timeout-graceful-shutdown`` seconds for open responses to complete. The
+MCP transport sends its responses with sse-starlette, which by default ends
+all of its streams as soon as the signal arrives, cutting off the results of
+tool calls that are still running.
+
+:class:`GracefulDrain` turns that off. :class:`DrainMiddleware` counts the
+requests in progress, except the long-lived ``GET`` streams that only carry
+server notifications; once shutdown has started and no other request is left,
+it ends those streams as well, so that their clients reconnect to another
+worker and uvicorn can exit.
+"""
+from __future__ import annotations
+
+import signal
+
+import anyio
+from sse_starlette.sse import AppStatus
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DRAIN_POLL_INTERVAL = 0.1
+
+
+def _uvicorn_exiting() -> bool:
+    # While serving in the main thread, uvicorn's bound ``handle_exit`` is the SIGTERM handler.
+    server = getattr(signal.getsignal(signal.SIGTERM), "__self__", None)
+    return bool(getattr(server, "should_exit", False))
+
+
+class GracefulDrain:
+    """Requests in progress, and whether shutdown started with none left."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.drained = anyio.Event()
+
+    async def run(self) -> None:
+        """Watch for shutdown for the lifetime of the app (run in its lifespan)."""
+
+        AppStatus.disable_automatic_graceful_drain()
+        # A previous app in this process (benchmarks start several) may have set these.
+        AppStatus.should_exit = False
+        self.drained = anyio.Event()
+        try:
+            while not (_uvicorn_exiting() and self.in_flight == 0):
+                await anyio.sleep(DRAIN_POLL_INTERVAL)
+            self.drained.set()
+            await anyio.sleep_forever()
+        finally:
+            # The lifespan is ending: no stream may outlive the app.
+            AppStatus.should_exit = True
+
+
+class DrainMiddleware:
+    """ASGI middleware counting requests for a :class:`GracefulDrain` and ending ``GET`` streams once drained."""
+
+    def __init__(self, app: ASGIApp, drain: GracefulDrain) -> None:
+        self.app = app
+        self.drain = drain
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+        elif scope["method"] == "GET":
+            await self._until_drained(scope, receive, send)
+        else:
+            self.drain.in_flight += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.drain.in_flight -= 1
+
+    async def _until_drained(self, scope: Scope, receive: Receive, send: Send) -> None:
+        started = completed = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal started, completed
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                completed = True
+            await send(message)
+
+        drained = self.drain.drained
+        async with anyio.create_task_group() as task_group:
+
+            async def end_when_drained() -> None:
+                await drained.wait()
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(end_when_drained)
+            await self.app(scope, receive, tracking_send)
+            task_group.cancel_scope.cancel()
+
+        if started and not completed:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
@@ -0,0 +1,34 @@
+"""Structured JSON Lines logging of service interactions."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from .serialization import dumps
+from .tracing import current_trace_id
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def log_interaction(action: str, input_data: Any, output_data: Any) -> None:
+    """Emit a structured log entry via the standard uvicorn logger (JSON Lines).
+
+    Entries written while a request is being traced carry its ``trace_id``.
+    Values JSON cannot represent are converted by ``serialization.json_default``.
+    """
+
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    entry = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "action": action,
+        "input": input_data,
+        "output": output_data,
+    }
+    trace_id = current_trace_id()
+    if trace_id is not None:
+        entry["trace_id"] = trace_id
+
+    logger.info(dumps(entry).decode("utf-8"))
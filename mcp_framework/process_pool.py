@@ -0,0 +1,596 @@
+"""Run the tools of a service in a pool of dedicated worker processes.
+
+All services of a uvicorn worker share one interpreter, so CPU-heavy tools
+(big-integer math, HTML parsing) hold the GIL while cheap calls wait for it.
+A service with a :class:`ProcessPolicy` keeps its tool schemas in the app, but
+every call is forwarded to one of ``processes`` child processes that only host
+that service. Each child imports the module of the service's ``register``
+function, registers its tools into a plain collector, runs the service's
+warm-up hook and then runs up to ``threads`` calls at once. Importing that
+module also imports its package (all of ``services``, through its
+``__init__``), ``mcp_framework`` and FastMCP: a child loads about as much code
+as a worker (roughly 75 MiB resident) even though it only runs one service.
+Calls and results are pickled over a ``multiprocessing`` pipe per child,
+tagged with a call id.
+
+* Calls go to the child with the fewest calls in progress. Once all slots are
+  busy and ``max_pending`` calls are already waiting, further calls are
+  rejected: over HTTP the admission middleware reserves a place in the pool
+  before dispatching a call and answers like any other overload (HTTP 503,
+  see ``admission``); direct calls raise :class:`ServiceOverloaded`.
+* When a child dies, the calls it was running fail and it is restarted in
+  the background; calls waiting for it wait for the restart.
+* The trace id and sampling decision of the request are handed to the
+  child, so its ``log_interaction`` entries belong to the same trace; the
+  spans it records come back with the result and appear under the call's
+  ``process_call`` span.
+* Progress and partial results of streaming tools are relayed to the caller's
+  ``current_stream()``.
+* A cancelled call keeps running in its child (threads cannot be
+  interrupted, as before) and keeps its slot until it finished there; its
+  result is dropped.
+
+Children are started with the ``spawn`` method and inherit nothing but the
+environment. Every uvicorn worker runs its own pools, so the number of child
+processes on a host is workers × processes per pooled service.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import anyio
+
+from .admission import ServiceOverloaded
+from .interaction_log import log_interaction, logger
+from .streaming import ToolStream, current_stream, use_stream
+from .tracing import Trace, adopt_spans, current_trace, span, use_trace
+
+# Seconds to wait for a child to register its tools and warm up.
+PROCESS_START_TIMEOUT = 60.0
+# Seconds a child gets to exit on shutdown before it is killed.
+PROCESS_STOP_TIMEOUT = 5.0
+
+_spawn = multiprocessing.get_context("spawn")
+
+
+@dataclass
+class ProcessPolicy:
+    """Host a service in ``processes`` child processes running up to ``threads`` calls each.
+
+    At most ``max_pending`` calls wait for a free slot; more are rejected.
+    """
+
+    processes: int = 2
+    threads: int = 1
+    max_pending: int = 32
+
+    def __post_init__(self) -> None:
+        if self.processes < 1 or self.threads < 1:
+            raise ValueError("A process pool needs at least one process with one thread.")
+        if self.max_pending < 0:
+            raise ValueError("max_pending must not be negative.")
+
+
+class _ToolCollector:
+    """Stand-in for the FastMCP instance in a child: collects the tool functions by name."""
+
+    def __init__(self) -> None:
+        self.tools: dict[str, Callable[..., Any]] = {}
+
+    def tool(self, name_or_fn: Any = None, **kwargs: Any) -> Any:
+        if callable(name_or_fn):
+            return self.tool(**kwargs)(name_or_fn)
+
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.tools[name_or_fn or kwargs.get("name") or fn.__name__] = fn
+            return fn
+
+        return decorator
+
+
+class _PipeStream(ToolStream):
+    """Stream of a call in a child; chunks and progress go to the app, which relays them."""
+
+    def __init__(self, send: Callable[[tuple], None], call_id: int, active: bool, reports_progress: bool) -> None:
+        super().__init__()
+        self._send = send
+        self._call_id = call_id
+        self.active = active
+        self.reports_progress = reports_progress
+
+    def send(self, chunk: Any) -> None:
+        if not self.active:
+            raise RuntimeError("The client did not ask for partial results of this call.")
+        self._send((self._call_id, "chunk", chunk))
+        self.chunks_sent += 1
+
+    def progress(self, progress: float, total: float | None = None, message: str | None = None) -> None:
+        if self._due(progress, total):
+            self._send((self._call_id, "progress", progress, total, message))
+
+    async def asend(self, chunk: Any) -> None:
+        self.send(chunk)
+
+    async def aprogress(self, progress: float, total: float | None = None, message: str | None = None) -> None:
+        self.progress(progress, total, message)
+
+
+def _picklable(exc: BaseException) -> BaseException:
+    try:
+        pickle.loads(pickle.dumps(exc))
+    except Exception:
+        return RuntimeError(f"{exc.__class__.__name__}: {exc}")
+    return exc
+
+
+def _run_call(send: Callable[[tuple], None], tools: dict[str, Callable[..., Any]], call_id: int,
+              tool_name: str, kwargs: dict[str, Any], trace_id: str | None, sampled: bool, active: bool,
+              reports_progress: bool) -> None:
+    stream = _PipeStream(send, call_id, active, reports_progress)
+    # Spans recorded here go back with the reply (see tracing.adopt_spans).
+    trace = Trace(trace_id, sampled=sampled)
+    try:
+        with use_trace(trace), use_stream(stream):
+            result = tools[tool_name](**kwargs)
+            if inspect.isawaitable(result):
+                result = asyncio.run(result)
+        # Also fails here when the result cannot be pickled.
+        send((call_id, "result", result, trace.spans))
+    except Exception as exc:
+        send((call_id, "error", _picklable(exc), trace.spans))
+
+
+def _serve(connection: Any, service_name: str, register: Callable[[Any], None],
+           warmup: Callable[[], None] | None, threads: int, log_level: int) -> None:
+    """Main loop of a child process."""
+
+    # Shutdown is driven by the app; Ctrl+C on the terminal must not kill children mid-call.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=log_level, format="%(levelname)s:     %(message)s")
+    logger.setLevel(log_level)
+
+    collector = _ToolCollector()
+    register(collector)
+    if warmup is not None:
+        try:
+            warmup()
+        except Exception as exc:  # pragma: no cover - warm-up failures must not stop the process
+            log_interaction(
+                "service_warmup_failed",
+                {"service": service_name},
+                {"error": str(exc), "type": exc.__class__.__name__},
+            )
+
+    send_lock = threading.Lock()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            connection.send(message)
+
+    try:
+        send((None, "ready"))
+    except OSError:
+        # The app stopped (or gave up on this process) while it was starting.
+        return
+    executor = ThreadPoolExecutor(threads, thread_name_prefix=f"mcp-{service_name}")
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            request = None
+        if request is None:
+            # Shutdown, or the app is gone: nobody waits for the calls still running.
+            os._exit(0)
+        executor.submit(_run_call, send, collector.tools, *request)
+
+
+class _PendingCall:
+    """A call sent to a child: where its messages go, and what to do once it is done there."""
+
+    def __init__(self, on_done: Callable[[], None]) -> None:
+        # None once the caller stopped listening; the child may still be running the call.
+        self.replies: queue.SimpleQueue | None = queue.SimpleQueue()
+        self.on_done = on_done
+
+
+class _ChildConnection:
+    """Pipe to one child process; routes its messages to the calls waiting for them."""
+
+    def __init__(self, connection: Any, on_close: Callable[[], None]) -> None:
+        self._connection = connection
+        self._on_close = on_close
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._calls: dict[int, _PendingCall] = {}
+        self._ids = itertools.count()
+        self.closed = False
+        threading.Thread(target=self._read, name="mcp-process-reader", daemon=True).start()
+
+    def submit(self, request: tuple, on_done: Callable[[], None]) -> tuple[int, queue.SimpleQueue]:
+        """Send a call; ``on_done`` runs (in any thread) once the child finished it or exited."""
+
+        call = _PendingCall(on_done)
+        with self._lock:
+            if self.closed:
+                raise EOFError("The worker process exited.")
+            call_id = next(self._ids)
+            self._calls[call_id] = call
+        try:
+            with self._send_lock:
+                self._connection.send((call_id, *request))
+        except BaseException:
+            with self._lock:
+                # Unless the reader thread already saw the child exit and finished the call.
+                registered = self._calls.pop(call_id, None) is not None
+            if registered:
+                on_done()
+            raise
+        return call_id, call.replies
+
+    def abandon(self, call_id: int) -> None:
+        """Stop relaying messages of a call; its ``on_done`` still runs when the child is done with it."""
+
+        with self._lock:
+            call = self._calls.get(call_id)
+            if call is not None:
+                call.replies = None
+
+    def _read(self) -> None:
+        try:
+            while True:
+                call_id, kind, *payload = self._connection.recv()
+                with self._lock:
+                    call = self._calls.get(call_id)
+                    if call is not None and kind in ("result", "error"):
+                        del self._calls[call_id]
+                if call is None:
+                    continue
+                if kind in ("result", "error"):
+                    call.on_done()
+                # Messages of abandoned (cancelled) calls are dropped.
+                replies = call.replies
+                if replies is not None:
+                    replies.put([kind, *payload])
+        except (EOFError, OSError):
+            pass
+        with self._lock:
+            self.closed = True
+            pending, self._calls = list(self._calls.values()), {}
+        for call in pending:
+            call.on_done()
+            if call.replies is not None:
+                call.replies.put(["exited"])
+        self._on_close()
+
+    def stop(self) -> None:
+        """Ask the child to exit; the reader thread ends when it did."""
+
+        try:
+            with self._send_lock:
+                self._connection.send(None)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class _WorkerProcess:
+    """One child process of a pool; restarted when it dies."""
+
+    def __init__(self, pool: ServiceProcessPool, index: int) -> None:
+        self._pool = pool
+        self._index = index
+        self._lock = threading.Lock()
+        self._process: Any = None
+        self._channel: _ChildConnection | None = None
+        self._stopping = False
+        # Calls sent to this process and not finished; only changed on the event loop.
+        self.in_flight = 0
+        self.restarts = 0
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid if self._process is not None else None
+
+    def ensure_running(self) -> _ChildConnection:
+        with self._lock:
+            if self._channel is not None and not self._channel.closed:
+                return self._channel
+            if self._process is not None:
+                self._process.join(PROCESS_STOP_TIMEOUT)
+                self.restarts += 1
+                log_interaction(
+                    "service_process_restarted",
+                    {"service": self._pool.service_name, "index": self._index},
+                    {"exit_code": self._process.exitcode},
+                )
+            self._stopping = False
+            self._start()
+            return self._channel
+
+    def _start(self) -> None:
+        started = time.perf_counter()
+        connection, child_connection = _spawn.Pipe()
+        process = _spawn.Process(
+            target=_serve,
+            args=(child_connection, self._pool.service_name, self._pool.register, self._pool.warmup,
+                  self._pool.policy.threads, logger.getEffectiveLevel()),
+            name=f"mcp-{self._pool.service_name}-{self._index}",
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        try:
+            if not connection.poll(PROCESS_START_TIMEOUT):
+                raise TimeoutError(f"did not start within {PROCESS_START_TIMEOUT:g}s")
+            connection.recv()
+        except BaseException:
+            process.kill()
+            connection.close()
+            raise
+        self._process = process
+        self._channel = _ChildConnection(connection, on_close=self._restart_soon)
+        log_interaction(
+            "service_process_started",
+            {"service": self._pool.service_name, "index": self._index},
+            {"pid": process.pid, "duration_ms": round((time.perf_counter() - started) * 1000, 3)},
+        )
+
+    def _restart_soon(self) -> None:
+        if not self._stopping:
+            threading.Thread(target=self.ensure_running, name="mcp-process-restart", daemon=True).start()
+
+    def call(self, tool_name: str, kwargs: dict[str, Any], trace: Trace | None, stream: ToolStream,
+             spans: list[dict[str, Any]], on_done: Callable[[], None]) -> Any:
+        """Run the call in the child and relay its stream messages; blocks until it is done.
+
+        The spans the child recorded for a sampled ``trace`` are added to ``spans``.
+        ``on_done`` runs exactly once, when the child no longer runs the call
+        (also if the caller stopped waiting for it before).
+        """
+
+        try:
+            channel = self.ensure_running()
+        except BaseException:
+            on_done()
+            raise
+        request = (
+            tool_name,
+            kwargs,
+            trace.trace_id if trace is not None else None,
+            trace is not None and trace.sampled,
+            stream.active,
+            stream.reports_progress,
+        )
+        try:
+            call_id, replies = channel.submit(request, on_done)
+        except EOFError as exc:
+            on_done()
+            raise RuntimeError(f"Worker process of service '{self._pool.service_name}' is not running.") from exc
+        except OSError as exc:
+            raise RuntimeError(f"Worker process of service '{self._pool.service_name}' is not running.") from exc
+        try:
+            while True:
+                kind, *payload = replies.get()
+                if kind == "result":
+                    spans.extend(payload[1])
+                    return payload[0]
+                if kind == "error":
+                    spans.extend(payload[1])
+                    raise payload[0]
+                if kind == "exited":
+                    raise RuntimeError(f"Worker process of service '{self._pool.service_name}' exited during the call.")
+                if kind == "chunk":
+                    stream.send(payload[0])
+                else:
+                    stream.progress(*payload)
+        finally:
+            channel.abandon(call_id)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopping = True
+            if self._process is None:
+                return
+            self._channel.stop()
+            self._process.join(PROCESS_STOP_TIMEOUT)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+            self._channel.close()
+            self._process = self._channel = None
+
+
+class PoolAdmission:
+    """Place in a pool reserved by :meth:`ServiceProcessPool.admit`; released once."""
+
+    def __init__(self, pool: ServiceProcessPool) -> None:
+        self._pool = pool
+        self.open = True
+
+    def release(self) -> None:
+        if self.open:
+            self.open = False
+            self._pool._admitted -= 1
+
+
+class ServiceProcessPool:
+    """Child processes hosting one service, and the forwarders that call into them."""
+
+    def __init__(self, service_name: str, register: Callable[[Any], None],
+                 warmup: Callable[[], None] | None, policy: ProcessPolicy) -> None:
+        self.service_name = service_name
+        self.register = register
+        self.warmup = warmup
+        self.policy = policy
+        self._workers = [_WorkerProcess(self, index) for index in range(policy.processes)]
+        # Slots of calls the children are running, including abandoned ones; only changed on the event loop.
+        self._busy = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # Places reserved by admit() for calls that did not reach call() yet.
+        self._admitted = 0
+        self._counters = {"calls": 0, "rejected": 0, "errors": 0}
+
+    def start(self) -> None:
+        """Start all processes in parallel (blocking)."""
+
+        threads = [threading.Thread(target=worker.ensure_running) for worker in self._workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+
+    def forwarder(
+        self,
+        tool_name: str,
+        fn: Callable[..., Any],
+        admission: Callable[[], PoolAdmission | None] | None = None,
+    ) -> Callable[..., Any]:
+        """Return an async stand-in for the tool ``fn`` (same signature) that runs it in the pool.
+
+        ``admission`` returns the place reserved for the current call by :meth:`admit`, if any.
+        """
+
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def forward(*args: Any, **kwargs: Any) -> Any:
+            return await self.call(
+                tool_name,
+                dict(signature.bind(*args, **kwargs).arguments),
+                admission=admission() if admission is not None else None,
+            )
+
+        return forward
+
+    def _capacity(self) -> int:
+        return self.policy.processes * self.policy.threads
+
+    def _reject(self) -> ServiceOverloaded:
+        self._counters["rejected"] += 1
+        log_interaction(
+            "process_pool_rejected",
+            {"service": self.service_name},
+            {"busy": self._busy, "pending": len(self._waiters), "admitted": self._admitted},
+        )
+        return ServiceOverloaded(self.service_name, "process pool queue full", retry_after=1.0)
+
+    def admit(self) -> PoolAdmission:
+        """Reserve a place for a call that is about to be dispatched, or raise :class:`ServiceOverloaded`.
+
+        Used by the admission middleware, so that a full pool is reported like
+        any other overload (HTTP 503) instead of as a failed tool call.
+        """
+
+        if self._busy + len(self._waiters) + self._admitted >= self._capacity() + self.policy.max_pending:
+            raise self._reject()
+        self._admitted += 1
+        return PoolAdmission(self)
+
+    async def _acquire_slot(self, admitted: bool) -> None:
+        if self._busy < self._capacity() and not self._waiters:
+            self._busy += 1
+            return
+        if not admitted and len(self._waiters) + self._admitted >= self.policy.max_pending:
+            raise self._reject()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the wait ended; hand it back.
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise
+
+    def _release_slot(self) -> None:
+        self._busy -= 1
+        while self._waiters and self._busy < self._capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._busy += 1
+                waiter.set_result(None)
+
+    async def call(self, tool_name: str, kwargs: dict[str, Any], admission: PoolAdmission | None = None) -> Any:
+        admitted = admission is not None and admission.open
+        if admitted:
+            # The reserved place turns into a slot or a place in the queue right here.
+            admission.release()
+        await self._acquire_slot(admitted)
+        worker = min(self._workers, key=lambda candidate: candidate.in_flight)
+        worker.in_flight += 1
+        self._counters["calls"] += 1
+        loop = asyncio.get_running_loop()
+
+        def release() -> None:
+            worker.in_flight -= 1
+            self._release_slot()
+
+        def release_from_thread() -> None:
+            # Runs once the child is done with the call, even if the call was cancelled (abandoned) before.
+            loop.call_soon_threadsafe(release)
+
+        spans: list[dict[str, Any]] = []
+        trace, stream = current_trace(), current_stream()
+        # A call cancelled before its thread started never reaches the child; see below.
+        start_lock = threading.Lock()
+        state = "queued"
+
+        def run() -> Any:
+            nonlocal state
+            with start_lock:
+                if state == "dropped":
+                    return None
+                state = "running"
+            return worker.call(tool_name, kwargs, trace, stream, spans, release_from_thread)
+
+        try:
+            with span("process_call", service=self.service_name, pid=worker.pid):
+                started = time.perf_counter()
+                try:
+                    return await anyio.to_thread.run_sync(run, abandon_on_cancel=True)
+                finally:
+                    adopt_spans(spans, started)
+        except anyio.get_cancelled_exc_class():
+            with start_lock:
+                if state == "queued":
+                    state = "dropped"
+                    release()
+            raise
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._counters,
+            "processes": self.policy.processes,
+            "threads": self.policy.threads,
+            "busy": self._busy,
+            "pending": len(self._waiters),
+            "restarts": sum(worker.restarts for worker in self._workers),
+        }
@@ -0,0 +1,104 @@
+"""Fast JSON encoding of tool results and log entries.
+
+Encoders are callables that turn a value into UTF-8 JSON bytes. ``"orjson"``
+is used when the package is installed, ``"json"`` (the standard library) is
+always available; ``MCP_JSON_ENCODER`` selects the process-wide default used by
+``log_interaction``, and ``create_mcp_server(json_encoder=...)`` the encoder
+for tool results. Tool results default to ``"pydantic"``, FastMCP's own
+pydantic-core serializer: ``serialization_benchmark`` finds it faster than
+orjson for row-shaped results such as ``mysql_select`` and about as fast for
+pages, so orjson is opt-in there.
+
+The ``"json"`` and ``"orjson"`` encoders handle the types tools commonly
+return in the same way:
+
+* ``Decimal`` becomes a string, as in pydantic's structured output, so no
+  precision is lost;
+* ``datetime``, ``date`` and ``time`` become ISO 8601 strings;
+* ``bytes`` become base64 strings;
+* pydantic models are dumped in JSON mode and sets become lists;
+* anything else falls back to ``str(value)``.
+
+orjson cannot represent integers beyond 64 bits (e.g. large factorials), so
+such values are encoded by the standard library instead.
+"""
+from __future__ import annotations
+
+import base64
+import datetime
+import json
+import os
+from decimal import Decimal
+from pathlib import PurePath
+from typing import Any, Callable
+
+import pydantic_core
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+JsonEncoder = Callable[[Any], bytes]
+
+
+def json_default(value: Any) -> Any:
+    """Convert values the JSON encoders do not support natively."""
+
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, PurePath):
+        return str(value)
+    return str(value)
+
+
+def stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def orjson_dumps(value: Any) -> bytes:
+        try:
+            return orjson.dumps(value, default=json_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and similar edge cases.
+            return stdlib_dumps(value)
+
+
+def pydantic_dumps(value: Any) -> bytes:
+    # FastMCP's default tool serializer.
+    return pydantic_core.to_json(value, fallback=str)
+
+
+JSON_ENCODERS: dict[str, JsonEncoder] = {"json": stdlib_dumps, "pydantic": pydantic_dumps}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = orjson_dumps
+
+
+def resolve_json_encoder(encoder: str | JsonEncoder | None = None) -> JsonEncoder:
+    """Return the encoder for a name, a callable as-is, or the fastest available one for ``None``/``"auto"``."""
+
+    if callable(encoder):
+        return encoder
+    if encoder in (None, "auto"):
+        return JSON_ENCODERS.get("orjson", stdlib_dumps)
+    try:
+        return JSON_ENCODERS[encoder]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JSON encoder '{encoder}'. Available: {', '.join(sorted(JSON_ENCODERS))}"
+        ) from None
+
+
+dumps = resolve_json_encoder(os.getenv("MCP_JSON_ENCODER") or None)
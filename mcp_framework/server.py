@@ -0,0 +1,489 @@
+"""Compose FastMCP servers and HTTP apps from service definitions."""
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+import anyio
+from fastmcp import FastMCP
+from fastmcp.server.dependencies import get_context, get_http_request
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import AdmissionController, AdmissionMiddleware, AdmissionPolicy, _buffer_body
+from .cache import CachePolicy, cache_stats, wrap_with_cache
+from .compression import CompressionMiddleware
+from .draining import DrainMiddleware, GracefulDrain
+from .interaction_log import log_interaction
+from .process_pool import PoolAdmission, ProcessPolicy, ServiceProcessPool
+from .serialization import JsonEncoder, resolve_json_encoder
+from .streaming import ToolStream, use_stream
+from .tracing import (
+    TRACE_ID_HEADER,
+    TRACE_SAMPLED_HEADER,
+    Trace,
+    current_trace,
+    export_trace,
+    span,
+    use_trace,
+)
+from .warm_state import WARM_STATE_INTERVAL, restore_warm_state, save_periodically, save_warm_state
+
+WARMUP_MODES = {"background", "eager", "lazy", "startup"}
+
+
+@dataclass
+class ServiceDefinition:
+    """Describe a service that can register tools on a FastMCP instance.
+
+    ``register`` should only declare tools; heavy imports, clients and
+    connectivity checks belong in the tool bodies or in the optional
+    ``warmup`` callable, which ``create_mcp_server`` runs off the startup path.
+    ``cache`` maps tool names of this service to their result cache policy,
+    ``admission`` bounds how many calls of the service run and wait at once, and
+    ``streaming`` names the tools that report progress or send partial results
+    through ``current_stream()`` (these always run in a worker thread), and
+    ``processes`` runs the service's tools in a pool of dedicated child
+    processes (see ``process_pool``). ``warmup_mode`` overrides the server-wide
+    ``warmup`` mode of ``create_mcp_server`` for this service.
+    """
+
+    name: str
+    description: str
+    register: Callable[[FastMCP], None]
+    warmup: Callable[[], None] | None = None
+    cache: dict[str, CachePolicy] = field(default_factory=dict)
+    admission: AdmissionPolicy | None = None
+    streaming: set[str] = field(default_factory=set)
+    processes: ProcessPolicy | None = None
+    warmup_mode: str | None = None
+
+
+class _ServiceRegistrar:
+    """Stand-in for the FastMCP instance handed to ``ServiceDefinition.register``.
+
+    Tools are registered on the real server, after wrapping them with the
+    per-tool behavior configured on the service definition.
+    """
+
+    def __init__(
+        self,
+        mcp: FastMCP,
+        service: ServiceDefinition,
+        *,
+        transport_streams: bool = False,
+        pool: ServiceProcessPool | None = None,
+    ) -> None:
+        self._mcp = mcp
+        self._service = service
+        self._transport_streams = transport_streams
+        self._pool = pool
+        self.registered_tools: list[str] = []
+
+    def tool(self, name_or_fn: Any = None, **kwargs: Any) -> Any:
+        if callable(name_or_fn):
+            return self.tool(**kwargs)(name_or_fn)
+
+        def decorator(fn: Callable[..., Any]) -> Any:
+            tool_name = name_or_fn or kwargs.get("name") or fn.__name__
+            self.registered_tools.append(tool_name)
+            return self._mcp.tool(name_or_fn, **kwargs)(self._wrap(tool_name, fn))
+
+        return decorator
+
+    def _wrap(self, tool_name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        admission = self._service.admission
+        streaming = tool_name in self._service.streaming
+        offload = streaming or (admission is not None and admission.offload)
+        if self._pool is not None:
+            # Runs in a child process; waiting for it does not block the event loop.
+            fn = self._pool.forwarder(tool_name, fn, admission=_request_pool_admission)
+        elif offload and not inspect.iscoroutinefunction(fn):
+            # Blocking tools would otherwise run on the event loop, which makes
+            # concurrency limits meaningless and stalls every other request;
+            # streaming tools need a worker thread to wait for the client.
+            fn = _run_in_thread(fn)
+        policy = self._service.cache.get(tool_name)
+        if policy is not None:
+            fn = wrap_with_cache(tool_name, policy, fn)
+        if streaming:
+            fn = _streamed(fn, self._transport_streams)
+        return _traced(tool_name, self._service.name, fn)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._mcp, name)
+
+
+def _run_in_thread(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+    return wrapper
+
+
+def _streamed(fn: Callable[..., Any], transport_streams: bool) -> Callable[..., Any]:
+    """Run each call of the (async) tool ``fn`` with its own ``ToolStream`` as the current stream."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            context = get_context()
+        except RuntimeError:
+            context = None
+        with use_stream(ToolStream(context, transport_streams=transport_streams)):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _request_trace() -> Trace | None:
+    """Return the trace of the HTTP request a tool call belongs to.
+
+    FastMCP runs tools in the session's task rather than the request's, so the
+    context variable there holds whatever the session was started with; the
+    request logger middleware hands the right trace over on ``request.state``.
+    """
+
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return current_trace()
+    return getattr(request.state, "mcp_trace", None) or current_trace()
+
+
+def _request_pool_admission() -> PoolAdmission | None:
+    """Return the process pool place that ``AdmissionMiddleware`` reserved for the current call."""
+
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return None
+    return getattr(request.state, "mcp_pool_admission", None)
+
+
+def _traced(tool_name: str, service_name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with use_trace(_request_trace()), span("tool", tool=tool_name, service=service_name):
+                return await fn(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with use_trace(_request_trace()), span("tool", tool=tool_name, service=service_name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _tool_serializer(encoder: JsonEncoder) -> Callable[[Any], str]:
+    """Return a FastMCP tool serializer that encodes results with ``encoder``."""
+
+    def serialize(data: Any) -> str:
+        with use_trace(_request_trace()), span("serialize") as attributes:
+            serialized = encoder(data)
+            attributes["bytes"] = len(serialized)
+        return serialized.decode("utf-8")
+
+    return serialize
+
+
+def create_mcp_server(
+    services: Iterable[ServiceDefinition],
+    *,
+    app_name: str = "multi-service",
+    instructions: str | None = None,
+    json_response: bool = True,
+    warmup: str = "background",
+    warm_state: bool = False,
+    max_concurrency: int | None = None,
+    json_encoder: str | JsonEncoder | None = "pydantic",
+    compression_min_size: int | None = 1024,
+):
+    """Create an MCP server instance and register all provided services.
+
+    ``warmup`` controls when service warm-up hooks run: ``"background"`` starts
+    them in a daemon thread so startup never blocks on them, ``"eager"`` runs
+    them before returning, and ``"lazy"`` skips them so that all work happens
+    on the first tool call. ``"startup"`` runs them in the ASGI lifespan startup,
+    so the server only accepts requests once they finished; behind
+    ``uvicorn --workers`` this makes a reload (SIGHUP) wait for each new worker
+    to be warm before the old one is shut down. A service's ``warmup_mode``
+    takes precedence, e.g. to keep a slow connectivity check in the background
+    while cache warm-ups gate readiness.
+
+    ``warm_state`` restores the in-memory tool caches from the snapshot file at
+    startup and keeps saving them to it while running and at shutdown (see
+    ``warm_state``), so restarted workers do not start cold.
+    When uvicorn stops a worker, calls in progress are allowed to finish
+    before its SSE streams are closed (see ``draining``).
+
+    ``max_concurrency`` is the worker-wide pool of slots shared by services with
+    an admission policy (``None`` leaves only the per-service limits).
+
+    ``json_encoder`` encodes the text content of tool results: ``"pydantic"``
+    (FastMCP's pydantic-core serializer), ``"auto"`` (orjson when installed),
+    ``"orjson"``, ``"json"`` or a callable returning UTF-8 bytes. Responses of
+    at least ``compression_min_size`` bytes are sent gzip/brotli compressed to
+    clients that accept it (``None`` disables this).
+
+    Tools only stream progress and partial results (see ``streaming``) with
+    ``json_response=False``, which answers every call with an SSE stream.
+    """
+
+    services = list(services)
+    for mode in {warmup, *(service.warmup_mode for service in services if service.warmup_mode is not None)}:
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Warmup mode must be one of: {', '.join(sorted(WARMUP_MODES))}")
+
+    pools = {
+        service.name: ServiceProcessPool(service.name, service.register, service.warmup, service.processes)
+        for service in services
+        if service.processes is not None
+    }
+    # Pooled services warm up in their own processes, as those start.
+    warmups: dict[str, list[ServiceDefinition]] = {mode: [] for mode in WARMUP_MODES}
+    for service in services:
+        if service.name not in pools:
+            warmups[service.warmup_mode or warmup].append(service)
+    mcp = FastMCP(
+        app_name,
+        instructions=instructions,
+        tool_serializer=_tool_serializer(resolve_json_encoder(json_encoder)),
+    )
+    mcp.settings.json_response = json_response
+    tool_services: dict[str, str] = {}
+
+    for service in services:
+        started = time.perf_counter()
+        registrar = _ServiceRegistrar(
+            mcp, service, transport_streams=not json_response, pool=pools.get(service.name)
+        )
+        service.register(registrar)  # type: ignore[arg-type]
+        tool_services.update((tool_name, service.name) for tool_name in registrar.registered_tools)
+        unknown_tools = set(service.cache) - set(registrar.registered_tools)
+        if unknown_tools:
+            raise ValueError(
+                f"Service '{service.name}' defines cache policies for unknown tools: "
+                f"{', '.join(sorted(unknown_tools))}"
+            )
+        unknown_tools = service.streaming - set(registrar.registered_tools)
+        if unknown_tools:
+            raise ValueError(
+                f"Service '{service.name}' declares unknown streaming tools: {', '.join(sorted(unknown_tools))}"
+            )
+        log_interaction(
+            "service_registered",
+            {"service": service.name},
+            {"duration_ms": round((time.perf_counter() - started) * 1000, 3)},
+        )
+
+    if warmups["eager"]:
+        warm_up_services(warmups["eager"])
+    if warmups["background"]:
+        threading.Thread(
+            target=warm_up_services, args=(warmups["background"],), name="mcp-service-warmup", daemon=True
+        ).start()
+
+    if any(service.cache for service in services):
+
+        @mcp.custom_route("/cache/stats", methods=["GET"], include_in_schema=False)
+        async def cache_stats_route(request: Request) -> Response:
+            return JSONResponse(cache_stats())
+
+    admission_policies = {service.name: service.admission for service in services if service.admission}
+    controller = AdmissionController(admission_policies, capacity=max_concurrency) if admission_policies else None
+    if controller is not None:
+
+        @mcp.custom_route("/admission/stats", methods=["GET"], include_in_schema=False)
+        async def admission_stats_route(request: Request) -> Response:
+            return JSONResponse(controller.stats())
+
+    if pools:
+
+        @mcp.custom_route("/processes/stats", methods=["GET"], include_in_schema=False)
+        async def process_stats_route(request: Request) -> Response:
+            return JSONResponse({name: pool.stats() for name, pool in pools.items()})
+
+    app = mcp.http_app()
+    drain = GracefulDrain()
+    _extend_lifespan(
+        app,
+        warmups["startup"],
+        pools=list(pools.values()),
+        warm_state=warm_state,
+        drain=drain,
+    )
+    if compression_min_size is not None:
+        app.add_middleware(CompressionMiddleware, minimum_size=compression_min_size)
+    if controller is not None or pools:
+        app.add_middleware(AdmissionMiddleware, controller=controller, tool_services=tool_services, pools=pools)
+    app.add_middleware(DrainMiddleware, drain=drain)
+    return mcp, app
+
+
+def _extend_lifespan(
+    app,
+    services: list[ServiceDefinition],
+    *,
+    pools: list[ServiceProcessPool],
+    warm_state: bool,
+    drain: GracefulDrain,
+) -> None:
+    """Add warm-up, process pools, warm-state restore and save, and graceful draining to ``app``'s lifespan.
+
+    Everything before the ``yield`` finishes before uvicorn reports the worker
+    as started, so a reload only retires an old worker once its replacement is warm.
+    """
+
+    lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def extended_lifespan(app):
+        async with lifespan(app) as state:
+            if services:
+                await anyio.to_thread.run_sync(warm_up_services, services)
+            async with anyio.create_task_group() as task_group:
+                for pool in pools:
+                    task_group.start_soon(anyio.to_thread.run_sync, pool.start)
+            if warm_state:
+                await anyio.to_thread.run_sync(restore_warm_state)
+            try:
+                async with anyio.create_task_group() as task_group:
+                    task_group.start_soon(drain.run)
+                    if warm_state and WARM_STATE_INTERVAL > 0:
+                        task_group.start_soon(save_periodically, WARM_STATE_INTERVAL)
+                    yield state
+                    task_group.cancel_scope.cancel()
+            finally:
+                with anyio.CancelScope(shield=True):
+                    if warm_state:
+                        await _save_warm_state()
+                    for pool in pools:
+                        await anyio.to_thread.run_sync(pool.stop)
+
+    app.router.lifespan_context = extended_lifespan
+
+
+async def _save_warm_state() -> None:
+    try:
+        await anyio.to_thread.run_sync(save_warm_state)
+    except Exception as exc:  # pragma: no cover - a failed save must not break shutdown
+        log_interaction("warm_state_save_failed", {}, {"error": str(exc), "type": exc.__class__.__name__})
+
+
+def warm_up_services(services: Iterable[ServiceDefinition]) -> dict[str, float]:
+    """Run each service's warm-up hook and return the time spent per service in ms."""
+
+    timings: dict[str, float] = {}
+    for service in services:
+        if service.warmup is None:
+            continue
+
+        started = time.perf_counter()
+        try:
+            service.warmup()
+        except Exception as exc:  # pragma: no cover - warm-up failures must not stop the server
+            log_interaction(
+                "service_warmup_failed",
+                {"service": service.name},
+                {"error": str(exc), "type": exc.__class__.__name__},
+            )
+        timings[service.name] = round((time.perf_counter() - started) * 1000, 3)
+        log_interaction("service_warmup", {"service": service.name}, {"duration_ms": timings[service.name]})
+    return timings
+
+
+def attach_request_logger(app, *, action: str = "http_request") -> None:
+    """Attach middleware that logs incoming HTTP requests and responses.
+
+    The middleware also starts the request's trace (see ``tracing``): an
+    incoming ``X-Trace-Id`` header is reused, the id is echoed in the response
+    and sampled traces are exported. Both happen once the last part of the
+    response body was sent, so streamed (SSE) responses are timed to the end
+    of the tool call rather than to their first bytes.
+    """
+
+    class RequestLoggerMiddleware:
+        def __init__(self, app: ASGIApp) -> None:
+            self.app = app
+            self.action = action
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != "http":
+                await self.app(scope, receive, send)
+                return
+
+            request = Request(scope)
+            trace = Trace(
+                trace_id=request.headers.get(TRACE_ID_HEADER),
+                sampled=True if request.headers.get(TRACE_SAMPLED_HEADER) == "1" else None,
+            )
+            request.state.mcp_trace = trace
+            request_body, receive = await _buffer_body(receive)
+            request_info: dict[str, Any] = {
+                "method": request.method,
+                "path": request.url.path,
+                "query": request.url.query,
+                "client": request.client.host if request.client else None,
+            }
+
+            if request_body:
+                try:
+                    payload = json.loads(request_body.decode("utf-8"))
+                    if isinstance(payload, dict):
+                        request_info["jsonrpc_method"] = payload.get("method")
+                        if "params" in payload and isinstance(payload["params"], dict):
+                            request_info["param_keys"] = sorted(payload["params"].keys())
+                            if payload.get("method") == "tools/call":
+                                request_info["tool"] = payload["params"].get("name")
+                except Exception as exc:  # pragma: no cover - logging should not block requests
+                    request_info["body_parse_error"] = str(exc)
+
+            status_code: int | None = None
+            error_detail: dict[str, Any] | None = None
+            finished = False
+
+            def finish() -> None:
+                nonlocal finished
+                if finished:
+                    return
+                finished = True
+                output_data: dict[str, Any] = {"status_code": status_code, "duration_ms": trace.elapsed_ms()}
+                if error_detail:
+                    output_data.update(error_detail)
+                log_interaction(self.action, request_info, output_data)
+                export_trace(trace, request_info, output_data)
+
+            async def logging_send(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    MutableHeaders(scope=message)[TRACE_ID_HEADER] = trace.trace_id
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    finish()
+
+            with use_trace(trace):
+                try:
+                    await self.app(scope, receive, logging_send)
+                except Exception as exc:  # pragma: no cover - logging should not block requests
+                    error_detail = {"error": str(exc), "type": exc.__class__.__name__}
+                    raise
+                finally:
+                    # Also covers responses that never completed (client gone, errors).
+                    finish()
+
+    app.add_middleware(RequestLoggerMiddleware)
@@ -0,0 +1,219 @@
+"""Cache backend shared by all worker processes on a host.
+
+``uvicorn --workers N`` runs N independent interpreters, so process-local
+caches are duplicated N times and every worker warms up from cold. The
+``"shared"`` backend keeps entries in a single SQLite database in WAL mode:
+readers never block each other, writes are serialized by SQLite's file lock,
+and every get/set runs in its own transaction so workers always observe
+complete entries. Values are stored pickled.
+
+Each cached tool uses its own namespace with the bounds of its policy. Entry
+and byte totals are maintained in ``cache_usage`` inside the same transaction
+as every write, so enforcing bounds never needs a table scan.
+
+The database location can be overridden via ``MCP_SHARED_CACHE_PATH``
+(defaults to ``"archive/mcp_shared_cache.sqlite3"``).
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .cache import CacheBackend, CachePolicy, register_cache_backend
+
+SHARED_CACHE_PATH = Path(os.getenv("MCP_SHARED_CACHE_PATH", "archive/mcp_shared_cache.sqlite3"))
+
+# LRU recency is only refreshed when an entry was last touched longer ago than
+# this, so hot keys do not turn every read into a write.
+TOUCH_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entries_last_access ON cache_entries(namespace, last_access);
+CREATE TABLE IF NOT EXISTS cache_usage (
+    namespace TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    evictions INTEGER NOT NULL DEFAULT 0,
+    expirations INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_local = threading.local()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Return this thread's connection to ``path``, reopening it after a fork."""
+
+    connections: dict[tuple[int, Path], sqlite3.Connection] = getattr(_local, "connections", None) or {}
+    _local.connections = connections
+    key = (os.getpid(), path)
+    conn = connections.get(key)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[key] = conn
+    return conn
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Process-safe cache backend storing one namespace of a shared SQLite database."""
+
+    def __init__(self, namespace: str, policy: CachePolicy, path: Path | None = None) -> None:
+        self.namespace = namespace
+        self._policy = policy
+        self._path = path or SHARED_CACHE_PATH
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        conn = _connect(self._path)
+        row = conn.execute(
+            "SELECT value, expires_at, last_access FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            return False, None
+
+        value, expires_at, last_access = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            with _ImmediateTransaction(conn):
+                removed = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ? RETURNING size",
+                    (self.namespace, key, now),
+                ).fetchall()
+                self._account(conn, entries=-len(removed), size=-sum(size for (size,) in removed),
+                              expirations=len(removed))
+            return False, None
+
+        if self._policy.eviction == "lfu" or now - last_access > TOUCH_INTERVAL:
+            with _ImmediateTransaction(conn):
+                conn.execute(
+                    "UPDATE cache_entries SET last_access = ?, hits = hits + 1 WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+        return True, pickle.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        size = len(blob)
+        if self._policy.max_bytes is not None and size > self._policy.max_bytes:
+            return
+
+        now = time.time()
+        expires_at = now + self._policy.ttl if self._policy.ttl is not None else None
+        conn = _connect(self._path)
+        with _ImmediateTransaction(conn):
+            previous = conn.execute(
+                "SELECT size FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(namespace, key, value, size, expires_at, last_access, hits) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (self.namespace, key, blob, size, expires_at, now),
+            )
+            if previous is None:
+                self._account(conn, entries=1, size=size)
+            else:
+                self._account(conn, size=size - previous[0])
+            self._enforce_bounds(conn, protected=key, now=now)
+
+    def clear(self) -> None:
+        conn = _connect(self._path)
+        with _ImmediateTransaction(conn):
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.execute(
+                "UPDATE cache_usage SET entries = 0, bytes = 0 WHERE namespace = ?", (self.namespace,)
+            )
+
+    def stats(self) -> dict[str, int]:
+        row = _connect(self._path).execute(
+            "SELECT entries, bytes, evictions, expirations FROM cache_usage WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        entries, size, evictions, expirations = row or (0, 0, 0, 0)
+        return {"entries": entries, "bytes": size, "evictions": evictions, "expirations": expirations}
+
+    def _account(
+        self, conn: sqlite3.Connection, *, entries: int = 0, size: int = 0, evictions: int = 0, expirations: int = 0
+    ) -> None:
+        conn.execute(
+            "INSERT INTO cache_usage (namespace, entries, bytes, evictions, expirations) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(namespace) DO UPDATE SET "
+            "entries = entries + excluded.entries, bytes = bytes + excluded.bytes, "
+            "evictions = evictions + excluded.evictions, expirations = expirations + excluded.expirations",
+            (self.namespace, entries, size, evictions, expirations),
+        )
+
+    def _enforce_bounds(self, conn: sqlite3.Connection, protected: str, now: float) -> None:
+        max_entries, max_bytes = self._policy.max_entries, self._policy.max_bytes
+        entries, size = conn.execute(
+            "SELECT entries, bytes FROM cache_usage WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        excess_entries = entries - max_entries if max_entries is not None else 0
+        excess_bytes = size - max_bytes if max_bytes is not None else 0
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return
+
+        # Expired entries go first, then the least recently (LRU) or least
+        # frequently (LFU) used ones.
+        order = "last_access" if self._policy.eviction == "lru" else "hits, last_access"
+        candidates = conn.execute(
+            "SELECT key, size, expires_at IS NOT NULL AND expires_at <= ? AS expired FROM cache_entries "
+            f"WHERE namespace = ? AND key != ? ORDER BY expired DESC, {order}",
+            (now, self.namespace, protected),
+        )
+        victims: list[str] = []
+        freed_bytes = evictions = expirations = 0
+        for victim_key, victim_size, expired in candidates:
+            if len(victims) >= excess_entries and freed_bytes >= excess_bytes:
+                break
+            victims.append(victim_key)
+            freed_bytes += victim_size
+            if expired:
+                expirations += 1
+            else:
+                evictions += 1
+        candidates.close()
+
+        conn.executemany(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            [(self.namespace, victim_key) for victim_key in victims],
+        )
+        self._account(
+            conn, entries=-len(victims), size=-freed_bytes, evictions=evictions, expirations=expirations
+        )
+
+
+class _ImmediateTransaction:
+    """Run a block inside ``BEGIN IMMEDIATE`` so read-modify-write cycles are atomic across processes."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+register_cache_backend("shared", lambda namespace, policy: SQLiteCacheBackend(namespace, policy))
@@ -0,0 +1,129 @@
+"""Progress notifications and partial results of long-running tool calls.
+
+Tools listed in ``ServiceDefinition.streaming`` can report progress and send
+parts of their result while they run::
+
+    stream = current_stream()
+    for batch in batches:
+        if stream.active:
+            stream.send({"rows": batch})
+        stream.progress(done, total, "rows fetched")
+
+Progress is sent as MCP ``notifications/progress`` when the client passed a
+``progressToken`` in the call's ``_meta``. Partial results are only sent when
+the client also asked for them with ``"stream": true`` in ``_meta``; they
+arrive as ``notifications/message`` entries of the ``"mcp_framework.stream"``
+logger whose data is ``{"sequence": n, "chunk": ...}``, and whatever a tool
+sent that way is left out of its final result. Both need the SSE transport
+(``create_mcp_server(json_response=False)``): with JSON responses there is no
+way to deliver anything before the result, so streams stay inactive.
+
+Notifications are handed to the transport without buffering, so ``send`` and
+``progress`` wait until the previous message was written to the client. A slow
+client therefore slows the tool down instead of growing server memory. If the
+client cancels the call (``notifications/cancelled``), the next ``send`` or
+``progress`` raises the cancellation, which unwinds the tool.
+
+The synchronous methods are for tools running in a worker thread (streaming
+tools are always offloaded); async tools use ``asend`` and ``aprogress``.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+import anyio.from_thread
+import pydantic_core
+from fastmcp import Context
+
+from .serialization import json_default
+
+STREAM_META_KEY = "stream"
+STREAM_LOGGER = "mcp_framework.stream"
+# Minimum time between two progress notifications; the final one is always sent.
+PROGRESS_INTERVAL = 0.1
+
+
+class ToolStream:
+    """Progress notifications and partial results of one tool call."""
+
+    def __init__(self, context: Context | None = None, *, transport_streams: bool = False) -> None:
+        meta = context.request_context.meta if context is not None else None
+        self._context = context
+        self.progress_token = meta.progressToken if meta is not None else None
+        self.reports_progress = transport_streams and self.progress_token is not None
+        self.active = transport_streams and bool(meta is not None and (meta.model_extra or {}).get(STREAM_META_KEY))
+        self.chunks_sent = 0
+        self._last_progress = 0.0
+
+    async def asend(self, chunk: Any) -> None:
+        """Send ``chunk`` to the client as the next part of the result."""
+
+        if not self.active:
+            raise RuntimeError("The client did not ask for partial results of this call.")
+        data = {
+            "sequence": self.chunks_sent,
+            "chunk": pydantic_core.to_jsonable_python(chunk, fallback=json_default),
+        }
+        await self._context.session.send_log_message(
+            level="info", data=data, logger=STREAM_LOGGER, related_request_id=self._context.request_id
+        )
+        self.chunks_sent += 1
+
+    async def aprogress(self, progress: float, total: float | None = None, message: str | None = None) -> None:
+        """Report progress; notifications closer than ``PROGRESS_INTERVAL`` apart are dropped."""
+
+        if not self._due(progress, total):
+            return
+        await self._context.report_progress(progress, total, message)
+
+    def _due(self, progress: float, total: float | None) -> bool:
+        if not self.reports_progress:
+            return False
+        now = time.monotonic()
+        if now - self._last_progress < PROGRESS_INTERVAL and progress != total:
+            return False
+        self._last_progress = now
+        return True
+
+    def send(self, chunk: Any) -> None:
+        """Blocking :meth:`asend` for tools running in a worker thread."""
+
+        anyio.from_thread.check_cancelled()
+        anyio.from_thread.run(self.asend, chunk)
+
+    def progress(self, progress: float, total: float | None = None, message: str | None = None) -> None:
+        """Blocking :meth:`aprogress` for tools running in a worker thread."""
+
+        if self._context is None:
+            return
+        anyio.from_thread.check_cancelled()
+        if self._due(progress, total):
+            anyio.from_thread.run(self._context.report_progress, progress, total, message)
+
+
+_INACTIVE = ToolStream()
+_current_stream: ContextVar[ToolStream] = ContextVar("mcp_tool_stream", default=_INACTIVE)
+
+
+def current_stream() -> ToolStream:
+    """Return the stream of the tool call being handled.
+
+    Outside of streaming tools this is an inactive stream whose ``progress``
+    does nothing, so helpers can report progress unconditionally.
+    """
+
+    return _current_stream.get()
+
+
+@contextlib.contextmanager
+def use_stream(stream: ToolStream) -> Iterator[ToolStream]:
+    """Make ``stream`` the current stream for the duration of the block."""
+
+    token = _current_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _current_stream.reset(token)
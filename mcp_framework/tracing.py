@@ -0,0 +1,183 @@
+"""Request tracing with span timings across middleware, tools and backends.
+
+Every HTTP request gets a :class:`Trace` when it enters the request logger
+middleware. The trace is kept in a context variable, so code running for the
+request — middleware, tools, worker threads started with
+``anyio.to_thread`` — can time its phases with :func:`span` without passing
+the trace around::
+
+    with span("query_execute", statement="SELECT") as attributes:
+        cursor.execute(sql)
+        attributes["rows"] = cursor.rowcount
+
+``log_interaction`` stamps the current trace id on every entry, which ties all
+log lines of one request together.
+
+Span timings are only recorded for sampled traces. The sampling decision is
+made once per request (head sampling) with probability
+``MCP_TRACE_SAMPLE_RATE`` (default ``0.01``), or forced by an incoming
+``X-Trace-Sampled: 1`` header; unsampled requests pay for little more than a
+context variable lookup per span. Sampled traces are appended as one JSON line
+each to ``MCP_TRACE_EXPORT_PATH`` (default ``"archive/traces.jsonl"``).
+"""
+from __future__ import annotations
+
+import contextlib
+import itertools
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from .serialization import dumps
+
+TRACE_SAMPLE_RATE = float(os.getenv("MCP_TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORT_PATH = Path(os.getenv("MCP_TRACE_EXPORT_PATH", "archive/traces.jsonl"))
+
+TRACE_ID_HEADER = "x-trace-id"
+TRACE_SAMPLED_HEADER = "x-trace-sampled"
+
+
+class Trace:
+    """Identifier, sampling decision and recorded spans of one request."""
+
+    def __init__(self, trace_id: str | None = None, sampled: bool | None = None) -> None:
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.sampled = random.random() < TRACE_SAMPLE_RATE if sampled is None else sampled
+        self.started = time.perf_counter()
+        self.spans: list[dict[str, Any]] = []
+        self._span_ids = itertools.count(1)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+    def next_span_id(self) -> int:
+        return next(self._span_ids)
+
+    def breakdown(self) -> dict[str, float]:
+        """Return the total time per span name, in ms."""
+
+        totals: dict[str, float] = {}
+        for recorded in self.spans:
+            totals[recorded["name"]] = round(totals.get(recorded["name"], 0.0) + recorded["duration_ms"], 3)
+        return totals
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("mcp_trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("mcp_span", default=None)
+
+
+def current_trace() -> Trace | None:
+    """Return the trace of the request being handled, if any."""
+
+    return _current_trace.get()
+
+
+def current_trace_id() -> str | None:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextlib.contextmanager
+def use_trace(trace: Trace | None) -> Iterator[Trace | None]:
+    """Make ``trace`` the current trace for the duration of the block."""
+
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Time the enclosed block as a span of the current trace.
+
+    The yielded dict can be filled with attributes that are only known once the
+    block has run; it is discarded when the trace is not sampled. Spans nest:
+    spans opened inside the block record this span as their parent.
+    """
+
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield attributes
+        return
+
+    started = time.perf_counter()
+    parent = _current_span.get()
+    # Take the id up front so nested spans can refer to it.
+    span_id = trace.next_span_id()
+    token = _current_span.set(span_id)
+    try:
+        yield attributes
+    except BaseException as exc:
+        attributes["error"] = exc.__class__.__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.spans.append(
+            {
+                "id": span_id,
+                "parent": parent,
+                "name": name,
+                "start_ms": round((started - trace.started) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                **attributes,
+            }
+        )
+
+
+def adopt_spans(spans: list[dict[str, Any]], started: float) -> None:
+    """Add spans recorded by another trace of the same request under the current span.
+
+    Used for spans recorded in another process: their ``start_ms`` is relative
+    to the start of that trace, which began at ``started`` (``perf_counter``)
+    in this process. Span ids are renumbered to fit this trace.
+    """
+
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled or not spans:
+        return
+    offset_ms = (started - trace.started) * 1000
+    ids = {recorded["id"]: trace.next_span_id() for recorded in spans}
+    parent = _current_span.get()
+    for recorded in spans:
+        trace.spans.append(
+            {
+                **recorded,
+                "id": ids[recorded["id"]],
+                "parent": ids.get(recorded["parent"], parent),
+                "start_ms": round(recorded["start_ms"] + offset_ms, 3),
+            }
+        )
+
+
+_export_lock = threading.Lock()
+
+
+def export_trace(trace: Trace, request: dict[str, Any], response: dict[str, Any]) -> None:
+    """Append the timing breakdown of a sampled trace to the export file."""
+
+    if not trace.sampled:
+        return
+
+    record = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "trace_id": trace.trace_id,
+        "duration_ms": trace.elapsed_ms(),
+        "request": request,
+        "response": response,
+        "breakdown": trace.breakdown(),
+        "spans": sorted(trace.spans, key=lambda recorded: recorded["start_ms"]),
+    }
+    line = dumps(record) + b"\n"
+    with _export_lock:
+        TRACE_EXPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # One write per record so concurrent workers never interleave lines.
+        with TRACE_EXPORT_PATH.open("ab") as handle:
+            handle.write(line)
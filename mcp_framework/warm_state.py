@@ -0,0 +1,196 @@
+"""Snapshots of in-memory tool caches that survive restarts and reloads.
+
+Every worker process starts with empty ``"memory"`` caches, so after a deploy
+the first calls of every cached tool take the slow path again. With
+``create_mcp_server(warm_state=True)`` each worker restores the entries of a
+snapshot file when it starts, saves its own entries to it every
+``MCP_WARM_STATE_INTERVAL`` seconds (default ``60``, ``0`` disables this) when
+they changed, and once more when it shuts down. Workers of one host share the
+file: saving merges into what is already there under a file lock and replaces
+the file atomically. During a reload each new worker starts, and restores,
+before the worker it replaces saves at exit, so the periodic saves are what
+carries recent entries over to it.
+
+Restoring skips anything that may be stale:
+
+* the whole snapshot when it is older than ``MCP_WARM_STATE_MAX_AGE`` seconds
+  (default ``3600``) or was written in another format version,
+* the entries of a tool whose sources changed since they were saved: the
+  module defining it and the application modules it uses (for ``iban_check``
+  also ``iban_utils.py``), but not the standard library, installed packages or
+  the framework; a new ``MCP_DEPLOY_VERSION`` counts as a change of every
+  tool, and
+* entries whose TTL ran out (remaining TTLs are also capped by the current policy).
+
+A deploy therefore only drops the entries of the tools whose code it changes.
+
+Backends that persist their entries themselves, such as ``"shared"``, are not
+part of snapshots. The file location can be overridden via
+``MCP_WARM_STATE_PATH`` (defaults to ``"archive/mcp_warm_state.pickle"``).
+"""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+import anyio
+
+from .cache import tool_caches
+from .interaction_log import log_interaction
+
+WARM_STATE_PATH = Path(os.getenv("MCP_WARM_STATE_PATH", "archive/mcp_warm_state.pickle"))
+WARM_STATE_MAX_AGE = float(os.getenv("MCP_WARM_STATE_MAX_AGE", "3600"))
+WARM_STATE_INTERVAL = float(os.getenv("MCP_WARM_STATE_INTERVAL", "60"))
+
+_FORMAT_VERSION = 1
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read(path: Path) -> dict[str, Any] | None:
+    try:
+        with path.open("rb") as handle:
+            snapshot = pickle.load(handle)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:  # a damaged snapshot only costs a cold start
+        log_interaction("warm_state_unreadable", {"path": str(path)}, {"error": str(exc)})
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != _FORMAT_VERSION:
+        return None
+    if time.time() - snapshot.get("saved_at", 0) > WARM_STATE_MAX_AGE:
+        return None
+    return snapshot
+
+
+def save_warm_state(path: Path | None = None) -> dict[str, int]:
+    """Merge the entries of this process's memory caches into the snapshot file.
+
+    Returns the number of entries stored per tool.
+    """
+
+    path = path or WARM_STATE_PATH
+    started = time.perf_counter()
+    now = time.time()
+    dumped: dict[str, tuple[str, list[tuple[str, Any, float | None, int]], int | None]] = {}
+    for tool_name, cache in tool_caches().items():
+        entries = cache.backend.dump()
+        if entries is None or cache.fingerprint is None:
+            continue
+        dumped[tool_name] = (cache.fingerprint, entries, cache.policy.max_entries)
+
+    counts: dict[str, int] = {}
+    with _locked(path):
+        previous = _read(path) or {"tools": {}}
+        tools: dict[str, dict[str, Any]] = {}
+        for tool_name, (fingerprint, entries, max_entries) in dumped.items():
+            merged: dict[str, tuple[Any, float | None, int]] = {}
+            saved = previous["tools"].get(tool_name)
+            if saved is not None and saved["fingerprint"] == fingerprint:
+                merged.update(
+                    (key, (value, expires_at, hits))
+                    for key, value, expires_at, hits in saved["entries"]
+                    if expires_at is None or expires_at > now
+                )
+            # This process's entries are at least as fresh as the saved ones.
+            merged.update(
+                (key, (value, None if ttl is None else now + ttl, hits)) for key, value, ttl, hits in entries
+            )
+            ordered = sorted(merged.items(), key=lambda item: item[1][2], reverse=True)
+            if max_entries is not None:
+                ordered = ordered[:max_entries]
+            tools[tool_name] = {
+                "fingerprint": fingerprint,
+                # Least used first, so the most used entries end up most recently used when loaded.
+                "entries": [(key, value, expires_at, hits) for key, (value, expires_at, hits) in reversed(ordered)],
+            }
+            counts[tool_name] = len(ordered)
+        # Keep tools this process does not cache (e.g. another version of the app) until they expire.
+        for tool_name, saved in previous["tools"].items():
+            tools.setdefault(tool_name, saved)
+
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with temporary.open("wb") as handle:
+            pickle.dump({"version": _FORMAT_VERSION, "saved_at": now, "tools": tools}, handle, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    log_interaction(
+        "warm_state_saved",
+        {"path": str(path)},
+        {"entries": counts, "duration_ms": round((time.perf_counter() - started) * 1000, 3)},
+    )
+    return counts
+
+
+def restore_warm_state(path: Path | None = None) -> dict[str, int]:
+    """Load the still valid snapshot entries into the memory caches of this process.
+
+    Returns the number of entries restored per tool.
+    """
+
+    path = path or WARM_STATE_PATH
+    started = time.perf_counter()
+    snapshot = _read(path)
+    if snapshot is None:
+        return {}
+
+    now = time.time()
+    counts: dict[str, int] = {}
+    skipped: list[str] = []
+    caches = tool_caches()
+    for tool_name, saved in snapshot["tools"].items():
+        cache = caches.get(tool_name)
+        if cache is None:
+            continue
+        if cache.fingerprint is None or saved["fingerprint"] != cache.fingerprint:
+            skipped.append(tool_name)
+            continue
+        counts[tool_name] = cache.backend.load(
+            [
+                (key, value, None if expires_at is None else expires_at - now, hits)
+                for key, value, expires_at, hits in saved["entries"]
+            ]
+        )
+
+    log_interaction(
+        "warm_state_restored",
+        {"path": str(path), "age_s": round(now - snapshot["saved_at"], 3)},
+        {
+            "entries": counts,
+            "changed_tools": skipped,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        },
+    )
+    return counts
+
+
+def _cache_version() -> tuple[int, ...]:
+    # Entries are only added after a miss, so unchanged miss counts mean nothing new to save.
+    return tuple(cache.stats()["misses"] for cache in tool_caches().values())
+
+
+async def save_periodically(interval: float, path: Path | None = None) -> None:
+    """Save the snapshot every ``interval`` seconds while the caches keep changing."""
+
+    saved = _cache_version()
+    while True:
+        await anyio.sleep(interval)
+        version = _cache_version()
+        if version == saved:
+            continue
+        await anyio.to_thread.run_sync(save_warm_state, path)
+        saved = version
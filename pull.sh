@@ -27,8 +27,10 @@ if [ -f "pull.txt" ] || [ "$FORCE" = true ]; then
     # Pull latest changes
     /usr/bin/git pull
 
-    # Restart Flask service
-    /usr/bin/systemctl restart flask_app9
+    # Reload the service: uvicorn starts a new worker, waits until it is warm,
+    # then lets an old one finish its requests and exit, one worker at a time.
+    # Units created before ExecReload existed are restarted instead.
+    /usr/bin/systemctl reload-or-restart flask_app9
 
     # Optional: uncomment to check status
     # /usr/bin/systemctl status flask_app9
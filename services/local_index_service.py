@@ -0,0 +1,367 @@
+"""Local full-text index over retrieved news articles and fetched pages.
+
+Results of ``search_news`` and ``fetch_plain_text`` are ingested into an
+embedded SQLite FTS5 index so repeated research can be answered locally and
+offline through the ``search_local`` tool. Documents are keyed by URL and only
+re-indexed when their content changes. Pages that were archived to
+``archive/news_crawler`` before the index existed are picked up incrementally
+during warm-up or on the first search of each process.
+
+The index location can be overridden via ``LOCAL_INDEX_PATH`` (defaults to
+``"archive/local_index.sqlite3"``).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlparse
+
+from fastmcp import FastMCP
+
+from mcp_framework import log_interaction, span
+
+
+INDEX_PATH = Path(os.getenv("LOCAL_INDEX_PATH", "archive/local_index.sqlite3"))
+ARCHIVE_DIR = Path(os.getenv("NEWS_ARCHIVE_DIR", "archive/news_crawler"))
+
+MAX_RESULTS = 50
+SNIPPET_TOKENS = 24
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+DOCUMENT_KINDS = {"article", "page"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    title TEXT,
+    body TEXT NOT NULL,
+    source TEXT,
+    published_at TEXT,
+    indexed_at TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_published_at ON documents(published_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, content='documents', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, body)
+    VALUES ('delete', old.id, old.title, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, body)
+    VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO documents (url, kind, title, body, source, published_at, indexed_at, content_hash)
+VALUES (:url, :kind, :title, :body, :source, :published_at, :indexed_at, :content_hash)
+ON CONFLICT(url) DO UPDATE SET
+    kind = excluded.kind,
+    title = excluded.title,
+    body = excluded.body,
+    source = excluded.source,
+    published_at = COALESCE(excluded.published_at, documents.published_at),
+    indexed_at = excluded.indexed_at,
+    content_hash = excluded.content_hash
+WHERE documents.content_hash != excluded.content_hash
+"""
+
+_local = threading.local()
+_archive_lock = threading.Lock()
+_archive_scanned = False
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Return this thread's connection to the index, creating the schema on first use."""
+
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+
+def _document_row(
+    url: str,
+    kind: str,
+    title: str | None,
+    body: str,
+    source: str | None,
+    published_at: str | None,
+) -> dict[str, Any]:
+    digest = hashlib.sha256(f"{title}\x00{body}\x00{source}".encode("utf-8")).hexdigest()
+    return {
+        "url": url,
+        "kind": kind,
+        "title": title,
+        "body": body,
+        "source": source,
+        "published_at": published_at,
+        "indexed_at": _now(),
+        "content_hash": digest,
+    }
+
+
+def _article_row(article: dict[str, Any]) -> dict[str, Any] | None:
+    url = article.get("url")
+    if not url:
+        return None
+    return _document_row(
+        url=url,
+        kind="article",
+        title=article.get("title"),
+        body=article.get("description") or "",
+        source=article.get("source"),
+        published_at=article.get("published_at"),
+    )
+
+
+def _page_row(payload: dict[str, Any]) -> dict[str, Any] | None:
+    url = payload.get("url")
+    text = str(payload.get("text") or "")
+    if not url or not text.strip():
+        return None
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    return _document_row(
+        url=str(url),
+        kind="page",
+        title=first_line[:200] or None,
+        body=text,
+        source=urlparse(str(url)).netloc or None,
+        published_at=None,
+    )
+
+
+def _upsert(rows: Iterable[dict[str, Any] | None]) -> int:
+    documents = [row for row in rows if row is not None]
+    if not documents:
+        return 0
+    conn = _get_connection()
+    with conn:
+        # total_changes would also count the rows the triggers write to the FTS table.
+        return conn.executemany(_UPSERT, documents).rowcount
+
+
+def index_articles(articles: Iterable[dict[str, Any]]) -> int:
+    """Index ``search_news`` article summaries and return the number of changed documents."""
+
+    return _upsert(_article_row(article) for article in articles)
+
+
+def index_page(payload: dict[str, Any]) -> int:
+    """Index a ``fetch_plain_text`` payload and return the number of changed documents."""
+
+    return _upsert([_page_row(payload)])
+
+
+def index_archive_dir(archive_dir: Path = ARCHIVE_DIR) -> int:
+    """Index archived pages that are new or changed since the last scan."""
+
+    if not archive_dir.exists():
+        return 0
+
+    conn = _get_connection()
+    known = {row["path"]: row["mtime"] for row in conn.execute("SELECT path, mtime FROM ingested_files")}
+    changed = 0
+    for path in archive_dir.rglob("*.txt"):
+        mtime = path.stat().st_mtime
+        if known.get(str(path)) == mtime:
+            continue
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            data = None
+        if isinstance(data, dict):
+            changed += index_page(data)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested_files (path, mtime) VALUES (?, ?)",
+                (str(path), mtime),
+            )
+    return changed
+
+
+def _ensure_archive_indexed() -> None:
+    global _archive_scanned
+    if _archive_scanned:
+        return
+    with _archive_lock:
+        if _archive_scanned:
+            return
+        try:
+            changed = index_archive_dir()
+            log_interaction("local_index_archive_scan", {"archive_dir": str(ARCHIVE_DIR)}, {"changed": changed})
+        except Exception as exc:  # pragma: no cover - indexing must not block searches
+            log_interaction(
+                "local_index_error",
+                {"archive_dir": str(ARCHIVE_DIR)},
+                {"error": str(exc), "type": exc.__class__.__name__},
+            )
+        _archive_scanned = True
+
+
+def _quote_terms(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all words literally."""
+
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _search(
+    match: str,
+    kind: str | None,
+    source: str | None,
+    since: str | None,
+    until: str | None,
+    limit: int,
+) -> list[dict[str, Any]]:
+    filters = ["documents_fts MATCH :match"]
+    params: dict[str, Any] = {
+        "match": match,
+        "limit": limit,
+        "title_weight": TITLE_WEIGHT,
+        "body_weight": BODY_WEIGHT,
+        "snippet_tokens": SNIPPET_TOKENS,
+    }
+    if kind:
+        filters.append("d.kind = :kind")
+        params["kind"] = kind
+    if source:
+        filters.append("d.source = :source COLLATE NOCASE")
+        params["source"] = source
+    if since:
+        filters.append("COALESCE(d.published_at, d.indexed_at) >= :since")
+        params["since"] = since
+    if until:
+        # Compare only as much of the timestamp as given, so a bare date includes that whole day.
+        filters.append("substr(COALESCE(d.published_at, d.indexed_at), 1, length(:until)) <= :until")
+        params["until"] = until
+
+    # Rank first and build highlights only for the returned rows: SQLite
+    # evaluates result columns before sorting, and snippets of every matching
+    # (possibly very large) page would dominate the query time.
+    query = f"""
+        WITH ranked AS (
+            SELECT documents_fts.rowid AS id, bm25(documents_fts, :title_weight, :body_weight) AS score
+            FROM documents_fts
+            JOIN documents AS d ON d.id = documents_fts.rowid
+            WHERE {' AND '.join(filters)}
+            ORDER BY score
+            LIMIT :limit
+        )
+        SELECT
+            d.url,
+            d.kind,
+            d.source,
+            d.published_at,
+            d.indexed_at,
+            highlight(documents_fts, 0, '**', '**') AS title,
+            snippet(documents_fts, 1, '**', '**', '…', :snippet_tokens) AS snippet,
+            ranked.score
+        FROM ranked
+        JOIN documents_fts ON documents_fts.rowid = ranked.id AND documents_fts MATCH :match
+        JOIN documents AS d ON d.id = ranked.id
+        ORDER BY ranked.score
+    """
+    with span("index_query") as attributes:
+        rows = _get_connection().execute(query, params).fetchall()
+        attributes["rows"] = len(rows)
+    return [{**dict(row), "score": round(-row["score"], 4)} for row in rows]
+
+
+def warm_up_local_index_service() -> None:
+    """Open the index and pick up pages archived since the last scan."""
+
+    _ensure_archive_indexed()
+
+
+def register_local_index_service(mcp: FastMCP) -> None:
+    """Register the ``search_local`` tool backed by the local full-text index."""
+
+    @mcp.tool()
+    def search_local(
+        query: str,
+        kind: str | None = None,
+        source: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 10,
+    ) -> dict[str, Any]:
+        """
+        Search previously retrieved articles and fetched pages without network access.
+
+        Results are ranked with BM25 (title matches weigh more than body matches)
+        and include a snippet with matching terms wrapped in ``**``.
+
+        - query: FTS5 query (e.g. ``solar AND storage``, ``"exact phrase"``, ``bat*``);
+          plain text is matched word by word if it is not valid FTS5 syntax
+        - kind: restrict to ``article`` (search_news) or ``page`` (fetch_plain_text)
+        - source: article source name or page host name
+        - since / until: ISO dates bounding the publication date (or index date for pages), both inclusive
+        """
+
+        trimmed_query = query.strip()
+        if not trimmed_query:
+            raise ValueError("Query must not be empty.")
+        if kind is not None and kind not in DOCUMENT_KINDS:
+            raise ValueError(f"Kind must be one of: {', '.join(sorted(DOCUMENT_KINDS))}")
+
+        bounded_limit = max(1, min(limit, MAX_RESULTS))
+        input_payload = {
+            "query": trimmed_query,
+            "kind": kind,
+            "source": source,
+            "since": since,
+            "until": until,
+            "limit": bounded_limit,
+        }
+
+        _ensure_archive_indexed()
+        try:
+            try:
+                results = _search(trimmed_query, kind, source, since, until, bounded_limit)
+            except sqlite3.OperationalError:
+                quoted = _quote_terms(trimmed_query)
+                if not quoted:
+                    raise ValueError("Query must contain at least one searchable word.")
+                results = _search(quoted, kind, source, since, until, bounded_limit)
+        except Exception as exc:
+            log_interaction(
+                "search_local_error",
+                input_payload,
+                {"error": str(exc), "type": exc.__class__.__name__},
+            )
+            raise
+
+        output = {"query": trimmed_query, "count": len(results), "results": results}
+        log_interaction("search_local", input_payload, {"count": len(results)})
+        return output
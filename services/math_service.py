@@ -36,7 +36,7 @@ def register_math_service(mcp: FastMCP) -> None:
     """Register a tool that performs common math operations."""
 
     @mcp.tool()
-    def math_operations(operation: str, values: list[float]) -> dict[str, float | int]:
+    def math_operations(operation: str, values: list[float]) -> dict[str, str | float | int]:
         """
         Perform a math operation on the provided values.
 
@@ -17,16 +17,23 @@ multiple statements separated by semicolons or disallowed verbs). These
 tools execute against the live database (they are not suggestions or
 dry-run responses). Use ``mysql_ping`` to verify connectivity and
 context before issuing queries.
+
+``mysql_select`` streams large results: rows are fetched in batches and, when
+the client asked for partial results, sent as they arrive instead of being
+collected into the final result (see ``mcp_framework.streaming``).
+
+``mysql.connector`` is imported on first use and the connectivity check runs
+from :func:`warm_up_mysql_service`, so registering the tools never blocks on
+the database.
 """
 from __future__ import annotations
 
 import os
 from typing import Any
 
-import mysql.connector
 from fastmcp import FastMCP
 
-from mcp_framework import log_interaction
+from mcp_framework import current_stream, invalidate_cache, log_interaction, span
 
 DB_NAME = os.getenv("LLM_PLAYGROUND_DB_NAME", "llm_playground")
 DB_USER = os.getenv("LLM_PLAYGROUND_DB_USER", "llm_playground")
@@ -37,11 +44,17 @@ DB_PORT = int(os.getenv("LLM_PLAYGROUND_DB_PORT", "3306"))
 
 ALLOWED_DDL = {"CREATE", "ALTER"}
 ALLOWED_DML = {"INSERT", "UPDATE", "DELETE"}
+# Statements that cannot change the schema, so ``get_db_schema`` results stay valid.
+SCHEMA_PRESERVING_VERBS = ALLOWED_DML | {"SELECT"}
+# Rows per fetch (and per partial result) when a query result is streamed.
+STREAM_BATCH_ROWS = 500
 
 
 def _get_connection():
     """Open a connection with explicit autocommit control and sane defaults."""
 
+    import mysql.connector  # deferred: the connector is slow to import
+
     conn = mysql.connector.connect(
         host=DB_HOST,
         port=DB_PORT,
@@ -70,15 +83,42 @@ def _assert_allowed(query: str, allowed_verbs: set[str]) -> str:
     return normalized
 
 
+def _fetch_rows(cursor) -> tuple[list[dict[str, Any]], int]:
+    """Fetch the remaining rows and return those not streamed to the client, and the row count."""
+
+    stream = current_stream()
+    if not (stream.active or stream.reports_progress):
+        rows = cursor.fetchall()
+        return rows, len(rows)
+
+    rows: list[dict[str, Any]] = []
+    fetched = 0
+    while batch := cursor.fetchmany(STREAM_BATCH_ROWS):
+        fetched += len(batch)
+        if stream.active:
+            stream.send({"rows": batch})
+        else:
+            rows.extend(batch)
+        stream.progress(fetched, message="rows fetched")
+    return rows, fetched
+
+
 def _run_statement(query: str, params: dict[str, Any] | None, expect_result: bool) -> dict[str, Any]:
     normalized = _validate_single_statement(query)
-    with _get_connection() as conn:
+    with span("connection_checkout"):
+        conn = _get_connection()
+    with conn:
         with conn.cursor(dictionary=True) as cursor:
-            cursor.execute(normalized, params or {})
+            with span("query_execute", verb=normalized.split(maxsplit=1)[0].upper()):
+                cursor.execute(normalized, params or {})
             result: dict[str, Any] = {"rowcount": cursor.rowcount}
             if expect_result:
-                result["rows"] = cursor.fetchall()
-            conn.commit()
+                with span("fetch") as attributes:
+                    result["rows"], attributes["rows"] = _fetch_rows(cursor)
+                if current_stream().chunks_sent:
+                    result["streamed_rows"] = attributes["rows"]
+            with span("commit"):
+                conn.commit()
     return result
 
 
@@ -89,10 +129,13 @@ def register_mysql_service(mcp: FastMCP) -> None:
     def mysql_ping() -> dict[str, Any]:
         """Test connectivity and report the current database/user context."""
 
-        with _get_connection() as conn:
+        with span("connection_checkout"):
+            conn = _get_connection()
+        with conn:
             with conn.cursor(dictionary=True) as cursor:
-                cursor.execute("SELECT DATABASE() AS db, CURRENT_USER() AS user")
-                info = cursor.fetchone() or {}
+                with span("query_execute", verb="SELECT"):
+                    cursor.execute("SELECT DATABASE() AS db, CURRENT_USER() AS user")
+                    info = cursor.fetchone() or {}
         log_interaction("mysql_ping", {}, info)
         return info
 
@@ -120,10 +163,15 @@ def register_mysql_service(mcp: FastMCP) -> None:
             ORDER BY table_name, ordinal_position
         """
 
-        with _get_connection() as conn:
+        with span("connection_checkout"):
+            conn = _get_connection()
+        with conn:
             with conn.cursor(dictionary=True) as cursor:
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
+                with span("query_execute", verb="SELECT"):
+                    cursor.execute(query, params)
+                with span("fetch") as attributes:
+                    rows = cursor.fetchall()
+                    attributes["rows"] = len(rows)
 
         result = {"rowcount": len(rows), "rows": rows}
         log_interaction("get_db_schema", params, result)
@@ -135,12 +183,17 @@ def register_mysql_service(mcp: FastMCP) -> None:
 
         normalized = _assert_allowed(sql, ALLOWED_DDL)
         result = _run_statement(normalized, params, expect_result=False)
+        invalidate_cache("get_db_schema")
         log_interaction("mysql_schema", {"sql": normalized, "params": params}, result)
         return result
 
     @mcp.tool()
     def mysql_select(sql: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
-        """Execute a parameterized ``SELECT`` query and return rows."""
+        """Execute a parameterized ``SELECT`` query and return rows.
+
+        Clients that request partial results receive the rows in batches while
+        they are fetched; the final result then only reports ``streamed_rows``.
+        """
 
         normalized = _assert_allowed(sql, {"SELECT"})
         result = _run_statement(normalized, params, expect_result=True)
@@ -165,6 +218,8 @@ def register_mysql_service(mcp: FastMCP) -> None:
         if verb in {"DROP", "TRUNCATE"}:
             raise ValueError("DROP and TRUNCATE statements are blocked for safety.")
         result = _run_statement(normalized, params, expect_result=verb == "SELECT")
+        if verb not in SCHEMA_PRESERVING_VERBS:
+            invalidate_cache("get_db_schema")
         log_interaction(
             "mysql_execute",
             {"sql": normalized, "params": params, "verb": verb},
@@ -172,10 +227,14 @@ def register_mysql_service(mcp: FastMCP) -> None:
         )
         return result
 
-    # Verify connectivity as soon as the tools are registered so that callers know
-    # the database is reachable and properly configured. If the database is
-    # temporarily unavailable we still want to register the tools so that callers
-    # receive a meaningful runtime error instead of the service failing to start.
+
+def warm_up_mysql_service() -> None:
+    """Verify connectivity so that callers know the database is reachable and configured.
+
+    Failures are only logged: the tools stay registered and report a meaningful
+    runtime error if the database is still unavailable when they are called.
+    """
+
     try:
         with _get_connection() as conn:
             with conn.cursor(dictionary=True) as cursor:
@@ -1,15 +1,64 @@
-"""NewsAPI search service for MCP."""
+"""NewsAPI search service for MCP.
+
+Searches are sent to the NewsAPI ``/v2/everything`` endpoint through a shared
+``httpx.AsyncClient`` so that connections are pooled and kept alive between
+calls. The endpoint and credentials can be overridden via environment
+variables, which also allows pointing the service at a local stand-in server:
+
+* ``NEWSAPI_API_KEY`` (defaults to the bundled development key)
+* ``NEWSAPI_BASE_URL`` (defaults to ``"https://newsapi.org"``)
+"""
 from __future__ import annotations
 
+import asyncio
+import math
+import os
 from typing import Any
 
+import anyio
+import httpx
 from fastmcp import FastMCP
-from newsapi import NewsApiClient
 
-from mcp_framework import log_interaction
+from mcp_framework import current_stream, log_interaction, span
+
+from .local_index_service import index_articles
+
+
+API_KEY = os.getenv("NEWSAPI_API_KEY", "14c58d3767904740bae0385bd524b702")
+BASE_URL = os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org")
+EVERYTHING_PATH = "/v2/everything"
+
+MAX_PAGE_SIZE = 100
+MAX_PAGES = 5
+# Errors for pages beyond what NewsAPI serves for a query; they end a search
+# the same way every time rather than truncating it by chance.
+RESULT_WINDOW_ERRORS = {"maximumResultsReached"}
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+_client: httpx.AsyncClient | None = None
+
 
+class NewsApiError(RuntimeError):
+    """Raised when the NewsAPI endpoint reports an error; ``code`` is NewsAPI's error code, if any."""
 
-API_KEY = "14c58d3767904740bae0385bd524b702"
+    def __init__(self, message: str, code: str | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared async client, creating it on first use."""
+
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            headers={"X-Api-Key": API_KEY, "User-Agent": "mcp-newsapi/1.0"},
+            timeout=REQUEST_TIMEOUT,
+            limits=POOL_LIMITS,
+        )
+    return _client
 
 
 def _summarize_article(article: dict[str, Any]) -> dict[str, Any]:
@@ -25,66 +74,159 @@ def _summarize_article(article: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+async def _fetch_page(params: dict[str, Any], page: int) -> dict[str, Any]:
+    with span("http_download", page=page) as download:
+        response = await _get_client().get(EVERYTHING_PATH, params={**params, "page": page})
+        download["bytes"] = len(response.content)
+    try:
+        with span("json_parse", page=page):
+            payload = response.json()
+    except ValueError as exc:
+        raise NewsApiError(f"Invalid response from NewsAPI (HTTP {response.status_code}).") from exc
+    if not isinstance(payload, dict):
+        # E.g. a proxy answering with a JSON list or string.
+        raise NewsApiError(f"Invalid response from NewsAPI (HTTP {response.status_code}).")
+
+    if response.status_code != 200 or payload.get("status") == "error":
+        code = payload.get("code") or f"http_{response.status_code}"
+        message = payload.get("message", "NewsAPI request failed.")
+        raise NewsApiError(f"{code}: {message}", code=payload.get("code"))
+    return payload
+
+
+def _merge_articles(pages: list[dict[str, Any]], limit: int) -> list[dict[str, Any]]:
+    """Concatenate page results in order, dropping repeated URLs."""
+
+    seen_urls: set[str] = set()
+    merged: list[dict[str, Any]] = []
+    for page in pages:
+        for article in page.get("articles", []):
+            summary = _summarize_article(article)
+            url = summary["url"]
+            if url:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+            merged.append(summary)
+            if len(merged) >= limit:
+                return merged
+    return merged
+
+
 def register_newsapi_service(mcp: FastMCP) -> None:
     """Register a NewsAPI search tool on the provided MCP instance."""
 
-    client = NewsApiClient(api_key=API_KEY)
-
     @mcp.tool()
-    def search_news(
+    async def search_news(
         query: str,
-        *,
         language: str = "en",
         sort_by: str = "relevancy",
         page_size: int = 5,
+        max_articles: int | None = None,
     ) -> dict[str, Any]:
-        """Search for recent articles matching the provided keywords."""
+        """
+        Search for recent articles matching the provided keywords.
+
+        ``page_size`` limits a single-page search. When ``max_articles`` is set,
+        up to five pages of 100 articles are retrieved concurrently and merged
+        in order, skipping articles whose URL was already returned; ``truncated``
+        reports that a later page failed and fewer articles were returned.
+        """
 
         trimmed_query = query.strip()
         if not trimmed_query:
             raise ValueError("Query must not be empty.")
 
-        bounded_page_size = max(1, min(page_size, 100))
+        bounded_page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        if max_articles is None:
+            article_limit = bounded_page_size
+            page_count = 1
+        else:
+            article_limit = max(1, min(max_articles, MAX_PAGE_SIZE * MAX_PAGES))
+            bounded_page_size = min(article_limit, MAX_PAGE_SIZE)
+            page_count = math.ceil(article_limit / bounded_page_size)
+
+        input_payload = {
+            "query": trimmed_query,
+            "language": language,
+            "sort_by": sort_by,
+            "page_size": bounded_page_size,
+            "max_articles": max_articles,
+        }
+        params = {
+            "q": trimmed_query,
+            "language": language,
+            "sortBy": sort_by,
+            "pageSize": bounded_page_size,
+        }
+
+        stream = current_stream()
+        pages_retrieved = 0
+
+        async def fetch_page(page: int) -> dict[str, Any]:
+            nonlocal pages_retrieved
+            payload = await _fetch_page(params, page)
+            pages_retrieved += 1
+            await stream.aprogress(pages_retrieved, page_count, "pages retrieved")
+            return payload
 
+        responses = await asyncio.gather(
+            *(fetch_page(page) for page in range(1, page_count + 1)),
+            return_exceptions=True,
+        )
+
+        # The first page decides success; later pages may legitimately fail
+        # (e.g. NewsAPI's result window limit) and simply truncate the result.
+        pages: list[dict[str, Any]] = []
+        truncated = False
+        for page_number, response in enumerate(responses, start=1):
+            if isinstance(response, BaseException):
+                log_interaction(
+                    "search_news_error",
+                    {**input_payload, "page": page_number},
+                    {"error": str(response), "type": response.__class__.__name__},
+                )
+                if page_number == 1:
+                    raise response
+                truncated = not (isinstance(response, NewsApiError) and response.code in RESULT_WINDOW_ERRORS)
+                break
+            pages.append(response)
+
+        articles = _merge_articles(pages, article_limit)
         try:
-            response = client.get_everything(
-                q=trimmed_query,
-                language=language,
-                sort_by=sort_by,
-                page_size=bounded_page_size,
-            )
-        except Exception as exc:
+            # SQLite may wait for other workers' writes; keep that off the event loop.
+            with span("index_write"):
+                await anyio.to_thread.run_sync(index_articles, articles)
+        except Exception as exc:  # pragma: no cover - indexing must not fail the search
             log_interaction(
-                "search_news_error",
-                {
-                    "query": trimmed_query,
-                    "language": language,
-                    "sort_by": sort_by,
-                    "page_size": bounded_page_size,
-                },
+                "local_index_error",
+                {"query": trimmed_query, "article_count": len(articles)},
                 {"error": str(exc), "type": exc.__class__.__name__},
             )
-            raise
 
-        articles = [_summarize_article(article) for article in response.get("articles", [])]
         result = {
             "query": trimmed_query,
             "language": language,
             "sort_by": sort_by,
             "page_size": bounded_page_size,
-            "total_results": response.get("totalResults", len(articles)),
+            "total_results": pages[0].get("totalResults", len(articles)),
             "articles": articles,
         }
+        if max_articles is not None:
+            result["max_articles"] = article_limit
+            result["pages_fetched"] = len(pages)
+            # A timeout, rate limit or failed progress update cut the result short.
+            result["truncated"] = truncated
 
         log_interaction(
             "search_news",
+            input_payload,
             {
-                "query": trimmed_query,
-                "language": language,
-                "sort_by": sort_by,
-                "page_size": bounded_page_size,
+                "total_results": result["total_results"],
+                "article_count": len(articles),
+                "pages_fetched": len(pages),
+                "truncated": truncated,
             },
-            {"total_results": result["total_results"], "article_count": len(articles)},
         )
 
         return result
@@ -4,6 +4,7 @@ from __future__ import annotations
 import hashlib
 import io
 import json
+import os
 from pathlib import Path
 import urllib.error
 import urllib.request
@@ -12,11 +13,14 @@ from html.parser import HTMLParser
 
 from fastmcp import FastMCP
 
-from mcp_framework import log_interaction
+from mcp_framework import current_stream, log_interaction, span
 
+from .local_index_service import index_page
 
-ARCHIVE_DIR = Path("archive/news_crawler")
-ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+
+ARCHIVE_DIR = Path(os.getenv("NEWS_ARCHIVE_DIR", "archive/news_crawler"))
+# Download block size; progress is reported after each block.
+READ_BLOCK_SIZE = 64 * 1024
 
 
 class _TextExtractor(HTMLParser):
@@ -69,6 +73,24 @@ def _extract_text_and_links(content: str, content_type: str, base_url: str) -> t
     return parser.get_text(), parser.get_links()
 
 
+def _read_body(response) -> bytes:
+    """Read the response body, reporting the bytes downloaded so far as progress."""
+
+    stream = current_stream()
+    if not stream.reports_progress:
+        return response.read()
+
+    length = response.headers.get("Content-Length")
+    total = int(length) if length and length.isdigit() else None
+    blocks: list[bytes] = []
+    downloaded = 0
+    while block := response.read(READ_BLOCK_SIZE):
+        blocks.append(block)
+        downloaded += len(block)
+        stream.progress(downloaded, total, "bytes downloaded")
+    return b"".join(blocks)
+
+
 def _archive_candidates(url: str) -> list[Path]:
     parsed = urlparse(url)
     digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
@@ -139,16 +161,17 @@ def register_web_fetch_service(mcp: FastMCP) -> None:
             return result
 
         try:
-            with urllib.request.urlopen(request, timeout=10) as response:
+            with span("http_download") as download, urllib.request.urlopen(request, timeout=10) as response:
                 status = getattr(response, "status", response.getcode())
                 if status == 308:  # Explicitly handle permanent redirects via archive fallback
                     raise urllib.error.HTTPError(
                         url, status, "Permanent Redirect", hdrs=response.headers, fp=None
                     )
 
-                raw_bytes = response.read()
+                raw_bytes = _read_body(response)
                 content_type = response.headers.get_content_type()
                 charset = response.headers.get_content_charset("utf-8")
+                download["bytes"] = len(raw_bytes)
         except urllib.error.HTTPError as exc:
             error_detail = {"error": str(exc), "status": exc.code}
             archive_action = (
@@ -169,11 +192,22 @@ def register_web_fetch_service(mcp: FastMCP) -> None:
             log_interaction("fetch_plain_text_error", {"url": url}, error_detail)
             raise
 
-        decoded_content = io.TextIOWrapper(io.BytesIO(raw_bytes), encoding=charset, errors="replace").read()
-        text, links = _extract_text_and_links(decoded_content, content_type, url)
+        with span("html_parse", content_type=content_type):
+            decoded_content = io.TextIOWrapper(io.BytesIO(raw_bytes), encoding=charset, errors="replace").read()
+            text, links = _extract_text_and_links(decoded_content, content_type, url)
 
         payload = {"url": url, "text": text, "links": links}
-        _save_to_archives(archive_paths, payload)
+        with span("archive_write"):
+            _save_to_archives(archive_paths, payload)
+        try:
+            with span("index_write"):
+                index_page(payload)
+        except Exception as exc:  # pragma: no cover - indexing must not fail the fetch
+            log_interaction(
+                "local_index_error",
+                {"url": url},
+                {"error": str(exc), "type": exc.__class__.__name__},
+            )
 
         log_interaction("fetch_plain_text", {"url": url}, payload)
         return payload
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from mcp_framework import AdmissionPolicy, ServiceOverloaded
+from mcp_framework.admission import AdmissionController
+
+
+@pytest.mark.anyio
+async def test_reserved_slots_stay_free_when_the_shared_pool_is_full():
+    controller = AdmissionController(
+        {
+            "slow": AdmissionPolicy(max_concurrency=4),
+            "fast": AdmissionPolicy(max_concurrency=2, reserved=1),
+        },
+        capacity=2,
+    )
+
+    slow = await controller.acquire("slow")
+    with pytest.raises(ServiceOverloaded) as rejected:
+        await controller.acquire("slow")
+    assert rejected.value.reason == "queue_full"
+
+    fast = await controller.acquire("fast")
+    assert fast.reserved
+    # The reserved slot is taken and the shared one is used by "slow".
+    with pytest.raises(ServiceOverloaded):
+        await controller.acquire("fast")
+
+    controller.release(slow)
+    shared = await controller.acquire("fast")
+    assert not shared.reserved
+    assert controller.stats()["fast"]["active"] == 2
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected_and_waiters_get_released_slots():
+    controller = AdmissionController({"db": AdmissionPolicy(max_concurrency=1, max_queue=1, retry_after=2.0)})
+
+    first = await controller.acquire("db")
+    queued = asyncio.ensure_future(controller.acquire("db"))
+    await asyncio.sleep(0)
+    assert controller.stats()["db"]["queued"] == 1
+
+    with pytest.raises(ServiceOverloaded) as rejected:
+        await controller.acquire("db")
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after == 2.0
+
+    controller.release(first)
+    second = await asyncio.wait_for(queued, timeout=1)
+    assert second.service == "db"
+    stats = controller.stats()["db"]
+    assert (stats["active"], stats["queued"], stats["admitted"], stats["rejected"]) == (1, 0, 2, 1)
+
+
+@pytest.mark.anyio
+async def test_expected_wait_beyond_max_wait_is_rejected_up_front():
+    controller = AdmissionController(
+        {"db": AdmissionPolicy(max_concurrency=1, max_queue=8, max_wait=0.05)}
+    )
+    slot = await controller.acquire("db")
+    await asyncio.sleep(0.2)
+    controller.release(slot)  # Calls now take about 0.2 s.
+
+    await controller.acquire("db")
+    with pytest.raises(ServiceOverloaded) as rejected:
+        await controller.acquire("db")
+    assert rejected.value.reason == "deadline"
+    assert rejected.value.retry_after >= 0.2
+    assert controller.stats()["db"]["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_queued_call_times_out_after_max_wait():
+    controller = AdmissionController(
+        {"db": AdmissionPolicy(max_concurrency=1, max_queue=8, max_wait=0.05)}
+    )
+    slot = await controller.acquire("db")
+
+    with pytest.raises(ServiceOverloaded) as rejected:
+        await controller.acquire("db")
+    assert rejected.value.reason == "timeout"
+    assert controller.stats()["db"]["queued"] == 0
+
+    controller.release(slot)
+    assert controller.stats()["db"]["active"] == 0
+    await asyncio.wait_for(controller.acquire("db"), timeout=1)
+
+
+def test_capacity_must_cover_reserved_slots():
+    with pytest.raises(ValueError):
+        AdmissionController({"fast": AdmissionPolicy(max_concurrency=4, reserved=3)}, capacity=2)
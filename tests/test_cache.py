@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from mcp_framework import CachePolicy
+from mcp_framework.cache import MemoryCacheBackend, _pickled_size
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = MemoryCacheBackend(CachePolicy(max_entries=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)
+
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lfu_evicts_the_least_frequently_used_entry():
+    cache = MemoryCacheBackend(CachePolicy(max_entries=2, eviction="lfu"))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    for _ in range(3):
+        cache.get("a")
+    cache.get("b")  # Most recent, but used less often than "a".
+
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    # The entry just stored is never the victim, even without hits.
+    assert cache.get("c") == (True, 3)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = MemoryCacheBackend(CachePolicy(ttl=10))
+    cache.set("a", 1)
+
+    clock[0] += 9.9
+    assert cache.get("a") == (True, 1)
+    clock[0] += 0.2
+    assert cache.get("a") == (False, None)
+    assert cache.stats() == {"entries": 0, "bytes": 0, "evictions": 0, "expirations": 1}
+
+
+def test_entries_without_ttl_never_expire(clock):
+    cache = MemoryCacheBackend(CachePolicy(ttl=None))
+    cache.set("a", 1)
+    clock[0] += 10**9
+    assert cache.get("a") == (True, 1)
+
+
+def test_byte_bound_evicts_until_the_total_fits():
+    value = "x" * 1000
+    size = _pickled_size(value)
+    cache = MemoryCacheBackend(CachePolicy(max_entries=None, max_bytes=2 * size))
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * size, 1)
+    assert cache.get("a") == (False, None)
+
+
+def test_values_larger_than_the_byte_bound_are_not_stored():
+    cache = MemoryCacheBackend(CachePolicy(max_bytes=100))
+    cache.set("small", "x")
+    cache.set("large", "x" * 1000)
+
+    assert cache.get("large") == (False, None)
+    assert cache.get("small") == (True, "x")
+    assert cache.stats()["evictions"] == 0
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = MemoryCacheBackend(CachePolicy(max_bytes=10_000))
+    cache.set("a", "x" * 1000)
+    cache.set("a", "x")
+
+    assert cache.stats()["bytes"] == _pickled_size("x")
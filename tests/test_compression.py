@@ -0,0 +1,119 @@
+import gzip
+
+import anyio
+import pytest
+
+from mcp_framework import compression
+from mcp_framework.compression import negotiate_encoding
+
+
+@pytest.fixture
+def with_brotli():
+    if compression.brotli is None:
+        pytest.skip("brotli is not installed")
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0.8, gzip;q=0.8", "br"),
+        ("gzip;q=0.2, br;q=0.9", "br"),
+        ("br;q=0, gzip;q=0", None),
+        ("br;q=0, *", "gzip"),
+        ("*;q=0.5, gzip;q=0.1", "br"),
+        ("*;q=0", None),
+        ("GZIP; Q=0.7, br;q=0.3", "gzip"),
+        ("br;q=oops, gzip;q=0.1", "gzip"),
+    ],
+)
+def test_negotiate_encoding_follows_q_values(with_brotli, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [("br", None), ("br, gzip;q=0.1", "gzip"), ("*", "gzip")],
+)
+def test_negotiate_encoding_without_brotli(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def event(data):
+    return f"event: message\r\ndata: {data}\r\n\r\n".encode()
+
+
+def event_stream_app(*events, before_each=None):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", b"text/event-stream")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for body in events:
+            if before_each is not None:
+                await before_each()
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return app
+
+
+async def collect(app, on_body=None):
+    """Run ``app`` behind the middleware for a gzip-accepting client; return the headers and body sent."""
+
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+        if on_body is not None and message["type"] == "http.response.body":
+            on_body()
+
+    scope = {"type": "http", "method": "POST", "path": "/mcp", "headers": [(b"accept-encoding", b"gzip")]}
+    await compression.CompressionMiddleware(app, minimum_size=1024)(scope, receive, send)
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return dict(messages[0]["headers"]), body
+
+
+@pytest.mark.anyio
+async def test_short_event_streams_are_not_compressed():
+    response = event('{"jsonrpc":"2.0","id":1,"result":{}}')
+    headers, body = await collect(event_stream_app(response))
+
+    assert b"content-encoding" not in headers
+    assert body == response
+
+
+@pytest.mark.anyio
+async def test_event_streams_are_compressed_once_past_the_threshold():
+    events = [event('{"jsonrpc":"2.0","id":1,"result":{"text":"%s"}}' % ("x" * 600)) for _ in range(3)]
+    headers, body = await collect(event_stream_app(*events))
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == b"".join(events)
+
+
+@pytest.mark.anyio
+async def test_notifications_are_sent_without_waiting_for_the_threshold():
+    progress = event('{"jsonrpc":"2.0","method":"notifications/progress","params":{"progress":1}}')
+    result = event('{"jsonrpc":"2.0","id":1,"result":{}}')
+    received = anyio.Event()
+    first = True
+
+    async def wait_until_received():
+        # The app only sends the result once the client got the progress notification.
+        nonlocal first
+        if not first:
+            with anyio.fail_after(1):
+                await received.wait()
+        first = False
+
+    headers, body = await collect(event_stream_app(progress, result, before_each=wait_until_received), received.set)
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == progress + result
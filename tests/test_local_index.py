@@ -0,0 +1,130 @@
+import json
+import threading
+
+import pytest
+
+from benchmarks.harness import McpClient
+from mcp_framework import ServiceDefinition, create_mcp_server
+from services import local_index_service
+from services.local_index_service import index_archive_dir, index_articles, index_page
+
+ARTICLES = [
+    {
+        "url": "https://news.example/solar-1",
+        "title": "Solar storage breaks records",
+        "description": "Grid batteries absorbed the midday surplus.",
+        "source": "Energy Daily",
+        "published_at": "2024-05-01T15:30:00Z",
+    },
+    {
+        "url": "https://news.example/solar-2",
+        "title": "Rooftop solar in winter",
+        "description": "Output drops, but storage helps.",
+        "source": "Home Power",
+        "published_at": "2024-05-02T08:00:00Z",
+    },
+    {
+        "url": "https://news.example/wind-1",
+        "title": "Offshore wind auction",
+        "description": "Solar bidders stayed away.",
+        "source": "Energy Daily",
+        "published_at": "2024-04-20T09:00:00Z",
+    },
+]
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index_service, "INDEX_PATH", tmp_path / "index.sqlite3")
+    monkeypatch.setattr(local_index_service, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(local_index_service, "_local", threading.local())
+    monkeypatch.setattr(local_index_service, "_archive_scanned", False)
+
+
+def search(query, kind=None, source=None, since=None, until=None, limit=10):
+    rows = local_index_service._search(query, kind, source, since, until, limit)
+    return [row["url"] for row in rows]
+
+
+def test_reindexing_unchanged_documents_is_a_no_op():
+    assert index_articles(ARTICLES) == 3
+    assert index_articles(ARTICLES) == 0
+    assert index_articles([{**ARTICLES[0], "description": "Updated text."}, ARTICLES[1]]) == 1
+    # Articles without a URL cannot be keyed and are skipped.
+    assert index_articles([{"title": "No link"}]) == 0
+
+    page = {"url": "https://blog.example/post", "text": "Storage notes\nSolar and batteries."}
+    assert index_page(page) == 1
+    assert index_page(page) == 0
+    assert index_page({"url": "https://blog.example/empty", "text": "  "}) == 0
+
+
+def test_updates_keep_the_known_publication_date():
+    index_articles(ARTICLES[:1])
+    index_articles([{**ARTICLES[0], "description": "Corrected.", "published_at": None}])
+
+    (row,) = local_index_service._search('"corrected"', None, None, None, None, 10)
+    assert row["published_at"] == "2024-05-01T15:30:00Z"
+
+
+def test_kind_and_source_filters():
+    index_articles(ARTICLES)
+    index_page({"url": "https://blog.example/post", "text": "Solar diary\nPanels again."})
+
+    assert search('"solar"', kind="page") == ["https://blog.example/post"]
+    assert set(search('"solar"', kind="article")) == {article["url"] for article in ARTICLES}
+    assert set(search('"solar"', source="energy daily")) == {ARTICLES[0]["url"], ARTICLES[2]["url"]}
+    assert search('"solar"', source="blog.example") == ["https://blog.example/post"]
+
+
+def test_title_matches_rank_first():
+    index_articles(ARTICLES)
+
+    assert search('"solar"', kind="article")[-1] == ARTICLES[2]["url"]
+
+
+def test_since_and_until_are_inclusive():
+    index_articles(ARTICLES)
+
+    assert set(search('"solar"', since="2024-05-01")) == {ARTICLES[0]["url"], ARTICLES[1]["url"]}
+    # A bare date covers the whole day, including articles published in the afternoon.
+    assert set(search('"solar"', until="2024-05-01")) == {ARTICLES[0]["url"], ARTICLES[2]["url"]}
+    assert search('"solar"', since="2024-05-01", until="2024-05-01") == [ARTICLES[0]["url"]]
+    assert search('"solar"', until="2024-05-01T12:00") == [ARTICLES[2]["url"]]
+    assert search('"solar"', since="2024-05-03") == []
+
+
+def test_archived_pages_are_indexed_once(tmp_path):
+    archive = tmp_path / "archive" / "blog.example"
+    archive.mkdir(parents=True)
+    (archive / "post.txt").write_text(
+        json.dumps({"url": "https://blog.example/post", "text": "Archived\nSolar notes."}), encoding="utf-8"
+    )
+    (archive / "broken.txt").write_text("not json", encoding="utf-8")
+
+    assert index_archive_dir(tmp_path / "archive") == 1
+    assert index_archive_dir(tmp_path / "archive") == 0
+    assert search('"archived"') == ["https://blog.example/post"]
+
+
+@pytest.mark.anyio
+async def test_invalid_fts_queries_fall_back_to_plain_words():
+    index_articles(ARTICLES)
+    service = ServiceDefinition(
+        name="local_index",
+        description="Local search.",
+        register=local_index_service.register_local_index_service,
+    )
+    _, app = create_mcp_server([service], warmup="lazy")
+
+    async with McpClient.in_process(app) as client:
+        # An unbalanced quote is an FTS5 syntax error.
+        fallback = await client.call_tool("search_local", {"query": 'solar "storage'})
+        syntax = await client.call_tool("search_local", {"query": "solar AND storage", "kind": "article"})
+        empty = await client.call_tool("search_local", {"query": "(*"})
+
+    assert fallback.ok, fallback.error
+    urls = [row["url"] for row in fallback.result["structuredContent"]["results"]]
+    assert set(urls) == {ARTICLES[0]["url"], ARTICLES[1]["url"]}
+    assert syntax.result["structuredContent"]["count"] == 2
+    assert not empty.ok and "searchable word" in empty.error
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.harness import McpClient
+from benchmarks.standins import StandInServer, newsapi_page
+from mcp_framework import ServiceDefinition, create_mcp_server
+from services import local_index_service, newsapi_service
+
+
+@pytest.fixture(autouse=True)
+def local_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index_service, "INDEX_PATH", tmp_path / "index.sqlite3")
+    monkeypatch.setattr(local_index_service, "_local", threading.local())
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Start a stand-in server answering NewsAPI requests with ``newsapi`` and point the service at it."""
+
+    servers = []
+
+    def start(newsapi=None, latency_ms=0.0):
+        server = StandInServer(latency_ms=latency_ms, newsapi=newsapi).start()
+        servers.append(server)
+        monkeypatch.setattr(newsapi_service, "BASE_URL", server.base_url)
+        # The shared client is bound to the base URL and to the event loop of its first use.
+        monkeypatch.setattr(newsapi_service, "_client", None)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+async def search(arguments):
+    service = ServiceDefinition(
+        name="newsapi", description="News search.", register=newsapi_service.register_newsapi_service
+    )
+    _, app = create_mcp_server([service], warmup="lazy")
+    async with McpClient.in_process(app) as client:
+        result = await client.call_tool("search_news", arguments)
+        await newsapi_service._get_client().aclose()
+    return result
+
+
+@pytest.mark.anyio
+async def test_pages_are_fetched_concurrently_and_merged_in_order(serve):
+    serve(latency_ms=200)
+
+    started = time.perf_counter()
+    result = await search({"query": "solar", "max_articles": 500})
+    elapsed = time.perf_counter() - started
+
+    assert result.ok, result.error
+    content = result.result["structuredContent"]
+    urls = [article["url"] for article in content["articles"]]
+    assert urls == [f"https://news.example.org/solar/{index}" for index in range(500)]
+    assert (content["pages_fetched"], content["truncated"]) == (5, False)
+    # Five sequential requests would take at least a second.
+    assert elapsed < 0.9
+
+
+@pytest.mark.anyio
+async def test_repeated_urls_are_dropped_keeping_the_first_occurrence(serve):
+    def overlapping(query, page, page_size):
+        # Results shift between requests, so each page repeats the last two articles of the previous one.
+        payload = newsapi_page(query, 1, 200)
+        start = (page - 1) * (page_size - 2)
+        return 200, {**payload, "articles": payload["articles"][start:start + page_size]}
+
+    serve(overlapping)
+    result = await search({"query": "wind", "max_articles": 150})
+
+    urls = [article["url"] for article in result.result["structuredContent"]["articles"]]
+    assert urls == [f"https://news.example.org/wind/{index}" for index in range(150)]
+
+
+@pytest.mark.anyio
+async def test_first_page_error_fails_the_search(serve):
+    serve(lambda query, page, page_size: (429, {"status": "error", "code": "rateLimited", "message": "Slow down."}))
+
+    result = await search({"query": "grid", "max_articles": 200})
+
+    assert not result.ok
+    assert "rateLimited: Slow down." in result.error
+
+
+@pytest.mark.anyio
+async def test_later_page_error_truncates_the_result(serve):
+    def failing_third_page(query, page, page_size):
+        if page == 3:
+            return 500, {"status": "error", "code": "unexpectedError", "message": "Try again."}
+        return 200, newsapi_page(query, page, page_size)
+
+    serve(failing_third_page)
+    result = await search({"query": "grid", "max_articles": 400})
+
+    assert result.ok, result.error
+    content = result.result["structuredContent"]
+    assert len(content["articles"]) == 200
+    assert (content["pages_fetched"], content["truncated"]) == (2, True)
+
+
+@pytest.mark.anyio
+async def test_result_window_limit_is_not_truncation(serve):
+    def developer_plan(query, page, page_size):
+        if page > 1:
+            return 426, {"status": "error", "code": "maximumResultsReached", "message": "Upgrade."}
+        return 200, newsapi_page(query, page, page_size)
+
+    serve(developer_plan)
+    result = await search({"query": "grid", "max_articles": 300})
+
+    content = result.result["structuredContent"]
+    assert (len(content["articles"]), content["truncated"]) == (100, False)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("body", [b"[]", b'"maintenance"', b"<html>proxy error</html>"])
+async def test_unexpected_bodies_raise_news_api_errors(serve, body):
+    serve(lambda query, page, page_size: (200, body))
+
+    result = await search({"query": "grid"})
+
+    assert not result.ok
+    assert "Invalid response from NewsAPI (HTTP 200)" in result.error
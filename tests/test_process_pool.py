@@ -0,0 +1,88 @@
+import json
+import time
+
+import anyio
+import pytest
+
+from benchmarks.harness import McpClient
+from mcp_framework import (
+    ProcessPolicy,
+    ServiceDefinition,
+    ServiceOverloaded,
+    attach_request_logger,
+    create_mcp_server,
+    span,
+    tracing,
+)
+from mcp_framework.process_pool import ServiceProcessPool
+
+
+def register_sleep_service(mcp):
+    @mcp.tool()
+    def nap(seconds: float) -> str:
+        """Sleep for ``seconds``."""
+        with span("nap_inner", seconds=seconds):
+            time.sleep(seconds)
+        return "rested"
+
+
+def pooled_app(policy):
+    service = ServiceDefinition(
+        name="sleep", description="Sleeps.", register=register_sleep_service, processes=policy
+    )
+    _, app = create_mcp_server([service], warmup="lazy")
+    return app
+
+
+@pytest.mark.anyio
+async def test_full_pool_is_rejected_like_admission():
+    app = pooled_app(ProcessPolicy(processes=1, threads=1, max_pending=0))
+    async with McpClient.in_process(app) as client:
+        results = []
+
+        async def call():
+            results.append(await client.call_tool("nap", {"seconds": 0.5}))
+
+        async with anyio.create_task_group() as task_group:
+            for _ in range(3):
+                task_group.start_soon(call)
+
+    assert sum(result.ok for result in results) == 1
+    rejected = [result for result in results if not result.ok]
+    assert len(rejected) == 2
+    assert all(result.status_code == 503 and "overloaded" in result.error for result in rejected)
+
+
+@pytest.mark.anyio
+async def test_child_spans_are_part_of_the_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", tmp_path / "traces.jsonl")
+    app = pooled_app(ProcessPolicy(processes=1))
+    attach_request_logger(app)
+    async with McpClient.in_process(app) as client:
+        result = await client.call_tool("nap", {"seconds": 0.1}, headers={"X-Trace-Sampled": "1"})
+
+    assert result.ok, result.error
+    records = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    (record,) = [record for record in records if record["request"].get("tool") == "nap"]
+    spans = {recorded["name"]: recorded for recorded in record["spans"]}
+    assert spans["nap_inner"]["parent"] == spans["process_call"]["id"]
+    assert spans["nap_inner"]["duration_ms"] >= 100
+    assert spans["process_call"]["start_ms"] <= spans["nap_inner"]["start_ms"]
+
+
+@pytest.mark.anyio
+async def test_cancelled_call_holds_its_slot_until_the_child_is_done():
+    pool = ServiceProcessPool("sleep", register_sleep_service, None, ProcessPolicy(processes=1, max_pending=0))
+    await anyio.to_thread.run_sync(pool.start)
+    try:
+        with anyio.move_on_after(0.1):
+            await pool.call("nap", {"seconds": 0.5})
+        assert pool.stats()["busy"] == 1
+        with pytest.raises(ServiceOverloaded):
+            await pool.call("nap", {"seconds": 0})
+
+        await anyio.sleep(0.6)
+        assert pool.stats()["busy"] == 0
+        assert await pool.call("nap", {"seconds": 0}) == "rested"
+    finally:
+        pool.stop()
@@ -0,0 +1,34 @@
+import json
+
+import anyio
+import pytest
+
+from benchmarks.harness import McpClient
+from mcp_framework import ServiceDefinition, attach_request_logger, create_mcp_server, tracing
+
+
+def register_slow_service(mcp):
+    @mcp.tool()
+    async def slow(delay: float) -> str:
+        """Sleep for ``delay`` seconds."""
+        await anyio.sleep(delay)
+        return "done"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("json_response", [True, False], ids=["json", "sse"])
+async def test_trace_covers_whole_tool_call(json_response, tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", tmp_path / "traces.jsonl")
+    service = ServiceDefinition(name="slow", description="Sleeps.", register=register_slow_service)
+    _, app = create_mcp_server([service], json_response=json_response, warmup="lazy")
+    attach_request_logger(app)
+
+    async with McpClient.in_process(app) as client:
+        result = await client.call_tool("slow", {"delay": 0.2}, headers={"X-Trace-Sampled": "1"})
+
+    assert result.ok, result.error
+    records = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    (record,) = [record for record in records if record["request"].get("tool") == "slow"]
+    assert record["duration_ms"] >= 200
+    assert record["response"]["duration_ms"] >= 200
+    assert record["breakdown"]["tool"] >= 200
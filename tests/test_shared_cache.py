@@ -0,0 +1,172 @@
+import pickle
+import sqlite3
+import time
+
+import anyio
+import pytest
+
+from benchmarks.harness import McpClient
+from mcp_framework import CachePolicy, ServiceDefinition, create_mcp_server, shared_cache
+from mcp_framework.shared_cache import SQLiteCacheBackend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def make_cache(tmp_path, namespace="tool", **policy):
+    return SQLiteCacheBackend(namespace, CachePolicy(**policy), path=tmp_path / "cache.sqlite3")
+
+
+def stored(cache):
+    """Entry count and byte total actually stored in the namespace."""
+
+    with sqlite3.connect(cache._path) as conn:
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (cache.namespace,),
+        ).fetchone()
+    return entries, size
+
+
+def assert_usage_matches(cache):
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == stored(cache)
+
+
+def test_usage_tracks_inserts_and_replacements(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("a", "x" * 100)
+    cache.set("b", "y")
+    cache.set("a", "z")
+
+    assert_usage_matches(cache)
+    assert cache.stats()["entries"] == 2
+
+
+def test_usage_tracks_lru_eviction_by_entries(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    for key in ("a", "b"):
+        cache.set(key, key)
+        clock[0] += 5
+    cache.get("a")  # Touched after the touch interval, so "b" is now least recent.
+
+    cache.set("c", "c")
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, "a")
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"]) == (1, 0)
+    assert_usage_matches(cache)
+
+
+def test_usage_tracks_lfu_eviction_by_bytes(tmp_path):
+    value = "x" * 1000
+    size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    cache = make_cache(tmp_path, max_entries=None, max_bytes=2 * size, eviction="lfu")
+    cache.set("a", value)
+    cache.set("b", value)
+    cache.get("a")
+
+    cache.set("c", value)
+
+    assert cache.get("b") == (False, None)
+    assert cache.stats()["bytes"] == 2 * size
+    assert_usage_matches(cache)
+
+
+def test_usage_tracks_expiry_on_read(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=10)
+    cache.set("a", "a")
+    cache.set("b", "b")
+
+    clock[0] += 11
+    assert cache.get("a") == (False, None)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["expirations"], stats["evictions"]) == (1, 1, 0)
+    assert_usage_matches(cache)
+
+
+def test_expired_entries_are_removed_first_when_bounds_are_exceeded(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=10, max_entries=2)
+    cache.set("old", "old")
+    clock[0] += 8
+    cache.set("recent", "recent")
+    clock[0] += 4  # "old" has expired, "recent" has not.
+
+    cache.set("new", "new")
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["expirations"], stats["evictions"]) == (2, 1, 0)
+    assert cache.get("recent") == (True, "recent")
+    assert_usage_matches(cache)
+
+
+def test_namespaces_are_accounted_separately(tmp_path):
+    first = make_cache(tmp_path, "first", max_entries=1)
+    second = make_cache(tmp_path, "second")
+    first.set("a", "a")
+    first.set("b", "b")
+    second.set("a", "a")
+
+    first.clear()
+
+    assert first.stats()["entries"] == 0
+    assert second.stats()["entries"] == 1
+    assert_usage_matches(first)
+    assert_usage_matches(second)
+
+
+def register_lookup_service(mcp):
+    @mcp.tool()
+    def lookup(name: str) -> str:
+        """Return a greeting for ``name``."""
+        return f"hello {name}"
+
+    @mcp.tool()
+    def echo(message: str) -> str:
+        """Return ``message``."""
+        return message
+
+
+@pytest.mark.anyio
+async def test_locked_shared_cache_does_not_block_other_calls(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite3"
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_PATH", path)
+    service = ServiceDefinition(
+        name="lookup",
+        description="Greets.",
+        register=register_lookup_service,
+        cache={"lookup": CachePolicy(backend="shared")},
+    )
+    _, app = create_mcp_server([service], warmup="lazy")
+
+    async with McpClient.in_process(app) as client:
+        assert (await client.call_tool("echo", {"message": "warm"})).ok
+        # Create the database first: the schema setup itself would fail fast on the lock.
+        SQLiteCacheBackend("other", CachePolicy(), path=path).set("key", 1)
+        # Another worker holds the write lock, so storing the result waits for it.
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        results = {}
+
+        async def call_lookup():
+            results["lookup"] = await client.call_tool("lookup", {"name": "ada"})
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(call_lookup)
+                await anyio.sleep(0.3)
+                echo = await client.call_tool("echo", {"message": "still here"})
+                assert "lookup" not in results
+                blocker.execute("ROLLBACK")
+        finally:
+            blocker.close()
+
+    assert echo.ok and echo.elapsed_ms < 1000
+    assert results["lookup"].ok
+    assert SQLiteCacheBackend("lookup", CachePolicy(), path=path).stats()["entries"] == 1
@@ -0,0 +1,64 @@
+import importlib
+import sys
+
+import pytest
+
+from mcp_framework import CachePolicy, cache
+from mcp_framework.cache import _source_fingerprint, wrap_with_cache
+from mcp_framework.warm_state import restore_warm_state, save_warm_state
+
+
+@pytest.fixture
+def app_modules(tmp_path, monkeypatch):
+    """Write a tool module, its helper and an unrelated module to ``tmp_path`` and import the tool module."""
+
+    (tmp_path / "warm_helpers.py").write_text("def double(value):\n    return 2 * value\n")
+    (tmp_path / "warm_unrelated.py").write_text("VALUE = 1\n")
+    (tmp_path / "warm_tools.py").write_text(
+        "import json\n"
+        "from warm_helpers import double\n\n"
+        "def doubled(value: int) -> int:\n"
+        "    return double(value)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in ("warm_helpers", "warm_unrelated", "warm_tools"):
+        sys.modules.pop(name, None)
+    yield tmp_path, importlib.import_module("warm_tools")
+    for name in ("warm_helpers", "warm_unrelated", "warm_tools"):
+        sys.modules.pop(name, None)
+
+
+def test_fingerprint_follows_the_modules_a_tool_uses(app_modules, monkeypatch):
+    directory, tools = app_modules
+    fingerprint = _source_fingerprint(tools.doubled)
+    assert fingerprint is not None
+
+    (directory / "warm_unrelated.py").write_text("VALUE = 2\n")
+    assert _source_fingerprint(tools.doubled) == fingerprint
+
+    (directory / "warm_helpers.py").write_text("def double(value):\n    return value + value\n")
+    changed = _source_fingerprint(tools.doubled)
+    assert changed != fingerprint
+
+    monkeypatch.setattr(cache, "DEPLOY_VERSION", "2024.05")
+    assert _source_fingerprint(tools.doubled) != changed
+
+
+def test_snapshot_entries_survive_a_restart_but_not_a_helper_change(app_modules, tmp_path, monkeypatch):
+    directory, tools = app_modules
+    path = tmp_path / "warm.pickle"
+    monkeypatch.setattr(cache, "_TOOL_CACHES", {})
+    doubled = wrap_with_cache("doubled", CachePolicy(ttl=None), tools.doubled)
+    doubled(21)
+    assert save_warm_state(path) == {"doubled": 1}
+
+    # A restart without code changes restores the entry.
+    monkeypatch.setattr(cache, "_TOOL_CACHES", {})
+    wrap_with_cache("doubled", CachePolicy(ttl=None), tools.doubled)
+    assert restore_warm_state(path) == {"doubled": 1}
+
+    # A deploy that changes the helper drops it.
+    (directory / "warm_helpers.py").write_text("def double(value):\n    return value * 3\n")
+    monkeypatch.setattr(cache, "_TOOL_CACHES", {})
+    wrap_with_cache("doubled", CachePolicy(ttl=None), tools.doubled)
+    assert restore_warm_state(path) == {}